@@ -9,7 +9,7 @@ import sys
 import logging
 import json
 from datetime import datetime
-from flask import Flask, render_template, jsonify, request, send_file, make_response
+from flask import Flask, render_template, jsonify, request, send_file, make_response, Response, stream_with_context
 try:
     from flask_cors import CORS
 except ImportError:
@@ -18,16 +18,20 @@ try:
     import requests
 except ImportError:
     requests = None
-import tempfile
 import subprocess
 from pathlib import Path
 from goose_client import GooseClient
 # intent classification is handled in orchestrator now
 from stt_manager import stt_manager
+from stt_stream import detect_interruption, start_stt_stream_server, get_stream_info
+from tts_dispatcher import TTSDispatcher, TTSQueueTimeout
+from log_index import LogIndex
+from health_monitor import HealthMonitor
+from translator import get_translator
 from typing import Optional
 import io
 import wave
-from threading import Lock
+from threading import Thread, Lock
 from time import monotonic
 import re
 
@@ -68,6 +72,22 @@ ORCHESTRATOR_URL = os.environ.get('ORCHESTRATOR_URL', 'http://localhost:5101')
 TTS_SERVER_URL = os.environ.get('TTS_SERVER_URL', 'http://127.0.0.1:3001')
 # Optional: comma-separated list of TTS endpoints for round-robin failover, e.g. "http://127.0.0.1:3001,http://127.0.0.1:3002"
 TTS_SERVER_URLS = os.environ.get('TTS_SERVER_URLS', '')
+# Audio format requested from the TTS server when the client does not specify one (wav | ogg | opus)
+TTS_AUDIO_FORMAT = os.environ.get('TTS_AUDIO_FORMAT', 'wav')
+TTS_AUDIO_FORMATS = ('wav', 'ogg', 'opus')
+# Upstream headers forwarded to the browser alongside the encoded audio
+TTS_PASSTHROUGH_HEADERS = ('X-Audio-Format', 'X-Audio-Bytes', 'X-Audio-Duration', 'X-Sample-Rate',
+                           'X-Synthesis-Time', 'X-Encode-Time', 'X-DSP-Backend')
+
+# Service logs served by /logs (tailed incrementally, see log_index)
+log_index = LogIndex({
+    name: CURRENT_DIR.parent / 'logs' / f'{name}.log'
+    for name in ('frontend', 'orchestrator', 'recovery_bridge')
+})
+# Одночасні підписники /logs/stream (кожен тримає потік сервера)
+LOG_STREAM_MAX_CLIENTS = int(os.getenv('LOG_STREAM_MAX_CLIENTS', 16))
+_log_stream_clients = {'active': 0, 'total': 0, 'rejected': 0}
+_log_stream_lock = Lock()
 
 # Agent voice configuration
 AGENT_VOICES = {
@@ -89,7 +109,6 @@ AGENT_VOICES = {
 }
 
 # Global TTS coordination and HTTP session
-tts_lock = Lock()
 _voices_cache = {
     'timestamp': 0.0,
     'ttl': 60.0,
@@ -121,13 +140,52 @@ def _build_http_session():
 
 http = _build_http_session()
 
-# Multi-endpoint TTS management
-_tts_endpoints = []  # list[str]
-_tts_index = 0
-_tts_failures = {}  # base_url -> cooldown_until (monotonic seconds)
+def _build_tts_session():
+    """Session for TTSDispatcher: retries only failed connects.
 
-def _init_tts_endpoints():
-    global _tts_endpoints, _tts_index
+    503 {retry: true} from a busy backend must reach the dispatcher at once so it can
+    reroute; urllib3 status retries would hammer the same backend while holding its slot.
+    """
+    if not requests:
+        return None
+    s = requests.Session()
+    if HTTPAdapter and Retry:
+        retry_strategy = Retry(total=2, connect=2, read=0, status=0, other=0, backoff_factor=0.2,
+                               allowed_methods=["GET", "POST"], raise_on_status=False)
+        adapter = HTTPAdapter(max_retries=retry_strategy, pool_connections=10, pool_maxsize=10)
+        s.mount('http://', adapter)
+        s.mount('https://', adapter)
+    s.headers.update({
+        'Accept': 'audio/wav, audio/*;q=0.9, */*;q=0.8',
+        'Connection': 'keep-alive'
+    })
+    return s
+
+tts_session = _build_tts_session()
+
+# Chat proxy to the orchestrator: timeouts (connect, read between chunks) and its own keep-alive pool.
+# Без Retry: повтор POST /chat/stream запустив би обробку повідомлення вдруге.
+CHAT_PROXY_CONNECT_TIMEOUT = float(os.environ.get('CHAT_PROXY_CONNECT_TIMEOUT', 5))
+CHAT_PROXY_READ_TIMEOUT = float(os.environ.get('CHAT_PROXY_READ_TIMEOUT', 120))
+CHAT_PROXY_HEADERS = ('Content-Type', 'Cache-Control', 'X-Accel-Buffering')
+# Максимум рядків в одному batch-запиті /api/translate
+TRANSLATE_MAX_TEXTS = int(os.environ.get('TRANSLATE_MAX_TEXTS', 200))
+
+def _build_chat_session():
+    if not requests:
+        return None
+    s = requests.Session()
+    if HTTPAdapter:
+        adapter = HTTPAdapter(max_retries=0, pool_connections=4, pool_maxsize=16)
+        s.mount('http://', adapter)
+        s.mount('https://', adapter)
+    s.headers.update({'Connection': 'keep-alive'})
+    return s
+
+chat_session = _build_chat_session()
+
+# Multi-endpoint TTS management: per-backend slots and least-loaded routing (see tts_dispatcher)
+def _init_tts_endpoints() -> list:
     urls = []
     # Primary from TTS_SERVER_URL always first
     if TTS_SERVER_URL:
@@ -138,31 +196,17 @@ def _init_tts_endpoints():
             u = u.strip()
             if u and u not in urls:
                 urls.append(u)
-    _tts_endpoints = urls or ['http://127.0.0.1:3001']
-    _tts_index = 0
+    return urls or ['http://127.0.0.1:3001']
 
-_init_tts_endpoints()
+_tts_endpoints = _init_tts_endpoints()
+tts_dispatcher = TTSDispatcher(_tts_endpoints, session=tts_session or requests)
 
 def _pick_tts_base() -> str:
-    """Pick next healthy TTS base url with simple round-robin and cooldown.
-    If all are on cooldown, pick the next in order anyway."""
-    global _tts_index
-    now = monotonic()
-    n = len(_tts_endpoints)
-    for i in range(n):
-        idx = (_tts_index + i) % n
-        base = _tts_endpoints[idx]
-        cooldown = _tts_failures.get(base, 0)
-        if now >= cooldown:
-            _tts_index = (idx + 1) % n
-            return base
-    # All on cooldown: return next in order
-    base = _tts_endpoints[_tts_index]
-    _tts_index = (_tts_index + 1) % len(_tts_endpoints)
-    return base
+    """Least-loaded healthy TTS base url (warm backends first); does not take a slot."""
+    return tts_dispatcher.pick()
 
 def _mark_tts_failure(base: str, backoff: float = 5.0):
-    _tts_failures[base] = monotonic() + backoff
+    tts_dispatcher.mark_failure(base, backoff)
 
 def _tts_get(path: str, timeout: int = 5):
     base = _pick_tts_base()
@@ -176,17 +220,46 @@ def _tts_get(path: str, timeout: int = 5):
         _mark_tts_failure(base)
         raise
 
-def _tts_post(path: str, json_payload: dict, timeout: int):
-    base = _pick_tts_base()
+# Dependency health is probed in the background; status endpoints read the cached snapshot
+health_monitor = HealthMonitor()
+# Окрема сесія без Retry: перевірка має відповідати одразу, а не після трьох повторів
+_health_session = requests.Session() if requests else None
+
+def _probe_http(url: str, timeout: float = 3):
+    r = _health_session.get(url, timeout=timeout)
+    return 'running' if r.status_code == 200 else 'error'
+
+def _probe_goose():
+    # goosed має /status, веб-версія Goose — лише /
     try:
-        r = (http or requests).post(f"{base}{path}", json=json_payload, timeout=timeout)
-        if r.status_code >= 500:
-            _mark_tts_failure(base)
-        return r, base
-    except Exception as e:
-        logger.warning(f"TTS POST failed for {base}{path}: {e}")
-        _mark_tts_failure(base)
-        raise
+        if _probe_http(f"{goose_client.base_url}/status") == 'running':
+            return 'running'
+    except Exception:
+        pass
+    return _probe_http(f"{goose_client.base_url}/")
+
+def _probe_tts(base: str):
+    r = _health_session.get(f"{base}/health", timeout=3)
+    if r.status_code != 200:
+        return 'error'
+    data = r.json()
+    return 'running', {'warm': data.get('warm'), 'workers': data.get('workers')}
+
+def _probe_stt():
+    state = stt_manager.load_state
+    status = {'ready': 'running', 'failed': 'error'}.get(state, state)
+    return status, {'state': state, 'streaming': get_stream_info()}
+
+if requests:
+    health_monitor.register('goose', _probe_goose)
+    health_monitor.register('orchestrator', lambda: _probe_http(f'{ORCHESTRATOR_URL}/health', timeout=5))
+    for _base in _tts_endpoints:
+        health_monitor.register(f'tts:{_base}', lambda base=_base: _probe_tts(base))
+health_monitor.register('stt', _probe_stt)
+
+def _tts_post(path: str, json_payload: dict, timeout: int, queue_timeout: Optional[float] = None):
+    """POST through a dispatcher slot; raises TTSQueueTimeout when every slot stays busy."""
+    return tts_dispatcher.post(path, json_payload, timeout=timeout, queue_timeout=queue_timeout)
 
 def _dynamic_timeout_for_text(text: str) -> int:
     # ~60ms per char with floor/ceiling
@@ -273,159 +346,70 @@ def health():
             'frontend': 'running',
             'orchestrator': check_orchestrator_health(),
             'tts': check_tts_health()
-        }
+        },
+        'health': health_monitor.snapshot()
     })
 
 @app.route('/logs')
 def get_logs():
-    """Get system logs"""
+    """Get system logs.
+
+    Query: limit (default 100), since (seq cursor from a previous response), source, level
+    (comma-separated). Each call reads only lines appended since the previous poll.
+    """
     try:
         limit = int(request.args.get('limit', 100))
+        since = request.args.get('since')
+        since = int(since) if since not in (None, '') else None
+        sources = [x for x in request.args.get('source', '').split(',') if x] or None
+        levels = [x.lower() for x in request.args.get('level', '').split(',') if x] or None
 
-        # Read and normalize logs from multiple sources
-        logs = []
-        log_files = [
-            '../logs/frontend.log',
-            '../logs/orchestrator.log',
-            '../logs/recovery_bridge.log'
-        ]
-
-        # Timestamp patterns we support:
-        # 1) 2025-09-04 20:19:54,360
-        ts_pat_1 = re.compile(r'^(\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2},\d{3})')
-        # 2) [2025-09-05T00:23:19.735Z] ...
-        ts_pat_2 = re.compile(r'^\[(\d{4}-\d{2}-\d{2}T[^\]]+)\]')
-        # 3) 03:13:48 or 03:13:48.123 (time-only)
-        ts_pat_3 = re.compile(r'^(\d{2}:\d{2}:\d{2}(?:[\.,]\d{1,3})?)')
-        # Levels
-        lvl_pat = re.compile(r'\[(DEBUG|INFO|WARN|WARNING|ERROR|CRITICAL|TRACE)\]', re.IGNORECASE)
-
-        def parse_ts(ts_str: str):
-            """Return (iso_str, sort_key_dt) from known formats; fallback to now."""
-            now_dt = datetime.now()
-            # 2025-09-04 20:19:54,360
-            try:
-                if 'T' not in ts_str and ',' in ts_str:
-                    dt = datetime.strptime(ts_str, '%Y-%m-%d %H:%M:%S,%f')
-                    return dt.isoformat(timespec='milliseconds'), dt
-            except Exception:
-                pass
-            # ISO in brackets e.g. 2025-09-05T00:23:19.735Z
-            try:
-                iso = ts_str.replace('Z', '+00:00')
-                dt = datetime.fromisoformat(iso)
-                return dt.isoformat(timespec='milliseconds'), dt
-            except Exception:
-                pass
-            # Time-only: 03:13:48(.123)
-            try:
-                # Normalize decimal separator
-                ts_norm = ts_str.replace(',', '.')
-                fmt = '%H:%M:%S.%f' if '.' in ts_norm else '%H:%M:%S'
-                t = datetime.strptime(ts_norm, fmt).time()
-                dt = datetime.combine(now_dt.date(), t)
-                return dt.isoformat(timespec='milliseconds'), dt
-            except Exception:
-                pass
-            # Fallback
-            return now_dt.isoformat(timespec='milliseconds'), now_dt
-
-        for log_file in log_files:
-            log_path = CURRENT_DIR.parent / log_file.replace('../', '')
-            if not log_path.exists():
-                continue
-            try:
-                with open(log_path, 'r') as f:
-                    # Read a bit more to allow multi-line grouping
-                    raw_lines = [ln.rstrip('\n') for ln in f.readlines()[-max(limit * 4, 200):]]
-
-                source = log_path.name.replace('.log', '')
-                current = None  # current aggregated entry
-
-                def push_current():
-                    nonlocal current
-                    if current and current.get('message'):
-                        logs.append({
-                            'timestamp': current['timestamp_iso'],
-                            'source': source,
-                            'level': current['level'],
-                            'message': current['message']
-                        })
-                    current = None
-
-                for line in raw_lines:
-                    text = line.strip('\r')
-                    if not text:
-                        # keep empty lines as part of the message if we have one
-                        if current:
-                            current['message'] += '\n'
-                        continue
-
-                    # Detect timestamp
-                    ts_iso = None
-                    ts_dt = None
-                    ts_match = ts_pat_1.match(text) or ts_pat_2.match(text) or ts_pat_3.match(text)
-                    if ts_match:
-                        ts_iso, ts_dt = parse_ts(ts_match.group(1))
-
-                    # Detect level
-                    level = 'info'
-                    m_lvl = lvl_pat.search(text)
-                    if m_lvl:
-                        level = m_lvl.group(1).lower()
-                        if level == 'warning':
-                            level = 'warn'
-                    else:
-                        low = text.lower()
-                        if ' error' in low or low.startswith('error'):
-                            level = 'error'
-                        elif ' warn' in low or low.startswith('warn'):
-                            level = 'warn'
-                        elif ' debug' in low or low.startswith('debug'):
-                            level = 'debug'
-
-                    # New entry if has timestamp, else continuation
-                    if ts_iso is not None:
-                        push_current()
-                        current = {
-                            'timestamp_iso': ts_iso,
-                            'timestamp_dt': ts_dt,
-                            'level': level,
-                            'message': text
-                        }
-                    else:
-                        # Continuation: append to previous entry if exists, else create minimal
-                        if current is None:
-                            ts_iso, ts_dt = parse_ts('')
-                            current = {
-                                'timestamp_iso': ts_iso,
-                                'timestamp_dt': ts_dt,
-                                'level': level,
-                                'message': text
-                            }
-                        else:
-                            # Append with newline to keep multi-line structure (e.g., markdown like "### [ТЕТЯНА]")
-                            current['message'] += f"\n{text}"
-
-                # push the last aggregated entry for this source
-                push_current()
-            except Exception as e:
-                logger.warning(f"Failed to read {log_file}: {e}")
-
-        # Sort by timestamp (we normalized to ISO for strings, but sorting by ISO may still be off for time-only)
-        # To be safe, convert back to dt for sorting where possible
-        def sort_key(item):
-            try:
-                return datetime.fromisoformat(item['timestamp'])
-            except Exception:
-                return datetime.now()
-
-        logs.sort(key=sort_key)
-        return jsonify({'logs': logs[-limit:]})
+        logs, cursor = log_index.query(limit=limit, since=since, sources=sources, levels=levels)
+        return jsonify({
+            'logs': logs,
+            'cursor': cursor,
+            # Hit the limit: older entries after `since` may have been skipped
+            'truncated': len(logs) >= limit
+        })
     except Exception as e:
         logger.error(f"Error getting logs: {e}")
         return jsonify({'error': 'Failed to get logs', 'logs': []}), 500
 
+@app.route('/logs/stream')
+def stream_logs():
+    """Live log stream (Server-Sent Events).
+
+    Query: source, level (comma-separated, filtered on the server), since (seq cursor).
+    EventSource reconnects send Last-Event-ID, which takes precedence over since, so the
+    client resumes exactly after the last entry it saw.
+    """
+    sources = [x for x in request.args.get('source', '').split(',') if x] or None
+    levels = [x.lower() for x in request.args.get('level', '').split(',') if x] or None
+    since = request.headers.get('Last-Event-ID') or request.args.get('since')
+    try:
+        since = int(since) if since not in (None, '') else None
+    except ValueError:
+        return jsonify({'error': 'Invalid cursor'}), 400
+
+    with _log_stream_lock:
+        if _log_stream_clients['active'] >= LOG_STREAM_MAX_CLIENTS:
+            _log_stream_clients['rejected'] += 1
+            return jsonify({'error': 'Too many log stream clients', 'fallback': '/logs'}), 503
+        _log_stream_clients['active'] += 1
+        _log_stream_clients['total'] += 1
+
+    def generate():
+        try:
+            yield from log_index.stream(cursor=since, sources=sources, levels=levels)
+        finally:
+            with _log_stream_lock:
+                _log_stream_clients['active'] -= 1
+
+    return Response(stream_with_context(generate()), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'
+    })
+
 @app.route('/api/voice/health')
 def voice_health():
     """Check voice/TTS health status"""
@@ -437,7 +421,9 @@ def voice_health():
             'timestamp': datetime.now().isoformat(),
             'tts_url': TTS_SERVER_URL,
             'backends': _tts_endpoints,
-            'available': tts_status == 'running'
+            'available': tts_status == 'running',
+            'dispatcher': tts_dispatcher.stats(),
+            'probes': health_monitor.snapshot('tts:')
         })
     except Exception as e:
         logger.error(f"Error checking voice health: {e}")
@@ -448,9 +434,50 @@ def get_agents():
     """Get agent configuration"""
     return jsonify(AGENT_VOICES)
 
+def _tetyana_reply(session_id: str, response_text: str) -> dict:
+    return {
+        'success': True,
+        'response': [{
+            'role': 'assistant',
+            'content': f'[ТЕТЯНА] {response_text}',
+            'agent': 'tetyana',
+            'voice': 'tetiana',
+            'color': '#00ffff',
+            'timestamp': datetime.now().isoformat()
+        }],
+        'session': {
+            'id': session_id,
+            'currentAgent': 'tetyana'
+        }
+    }
+
+def _stream_tetyana(session_id: str, message: str):
+    """SSE: `data:` {type: token, text} as Goose produces them, then `event: done` with the full reply"""
+    chunks = []
+    try:
+        for event in goose_client.stream_reply(session_id, message):
+            if event['type'] == 'token':
+                chunks.append(event['text'])
+                yield f"data: {json.dumps(event, ensure_ascii=False)}\n\n"
+            elif event['type'] == 'error':
+                logger.error(f"Goose client error: {event['error']}")
+                payload = {'error': f"Tetyana is unavailable: {event['error']}"}
+                yield f"event: error\ndata: {json.dumps(payload, ensure_ascii=False)}\n\n"
+                return
+    except Exception as e:
+        logger.error(f"Tetyana stream error: {e}")
+        yield f"event: error\ndata: {json.dumps({'error': 'Internal error'})}\n\n"
+        return
+    done = _tetyana_reply(session_id, ''.join(chunks).strip())
+    yield f"event: done\ndata: {json.dumps(done, ensure_ascii=False)}\n\n"
+
 @app.route('/api/agents/tetyana', methods=['POST'])
 def chat_with_tetyana():
-    """Direct chat with Tetyana via Goose"""
+    """Direct chat with Tetyana via Goose.
+
+    With `stream: true` in the body (or Accept: text/event-stream) the reply is streamed as SSE
+    token events while Goose generates it; otherwise the full reply comes back as JSON.
+    """
     try:
         data = request.get_json()
         message = data.get('message', '')
@@ -458,27 +485,17 @@ def chat_with_tetyana():
         
         if not message.strip():
             return jsonify({'error': 'Message cannot be empty'}), 400
+
+        if data.get('stream') or 'text/event-stream' in request.headers.get('Accept', ''):
+            return Response(stream_with_context(_stream_tetyana(session_id, message)),
+                            mimetype='text/event-stream',
+                            headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
         
         # Send message to Goose (Tetyana)
         result = goose_client.send_reply(session_id, message)
         
         if result.get('success'):
-            response_text = result.get('response', '')
-            return jsonify({
-                'success': True,
-                'response': [{
-                    'role': 'assistant',
-                    'content': f'[ТЕТЯНА] {response_text}',
-                    'agent': 'tetyana',
-                    'voice': 'tetiana',
-                    'color': '#00ffff',
-                    'timestamp': datetime.now().isoformat()
-                }],
-                'session': {
-                    'id': session_id,
-                    'currentAgent': 'tetyana'
-                }
-            })
+            return jsonify(_tetyana_reply(session_id, result.get('response', '')))
         else:
             error_msg = result.get('error', 'Unknown error')
             logger.error(f"Goose client error: {error_msg}")
@@ -523,15 +540,34 @@ def chat():
         if not requests:
             return jsonify({'error': 'Requests module unavailable'}), 500
 
-        response = requests.post(
+        # NDJSON-режим оркестратора: рядок на кожну фазу агентів + порожні keep-alive рядки між ними
+        upstream = chat_session.post(
             f'{ORCHESTRATOR_URL}/chat/stream',
             json={'message': message, 'sessionId': session_id, 'userId': user_id},
-            timeout=30
+            headers={'Accept': 'application/x-ndjson'},
+            timeout=(CHAT_PROXY_CONNECT_TIMEOUT, CHAT_PROXY_READ_TIMEOUT),
+            stream=True
         )
-        if response.status_code == 200:
-            return jsonify(response.json())
-        else:
-            return jsonify({'error': 'Orchestrator error'}), response.status_code
+        if upstream.status_code != 200:
+            upstream.close()
+            return jsonify({'error': 'Orchestrator error'}), upstream.status_code
+
+        def relay():
+            # Чанки йдуть клієнту як прийшли, без буферизації та перекодування JSON.
+            # Обрив браузера Werkzeug помічає на черговому записі (фаза або keep-alive рядок),
+            # закриває генератор → закриваємо upstream-з'єднання, і оркестратор скасовує цикл.
+            try:
+                for chunk in upstream.iter_content(chunk_size=None):
+                    if chunk:
+                        yield chunk
+            except Exception as e:
+                logger.warning(f"Chat proxy stream interrupted: {e}")
+            finally:
+                upstream.close()
+
+        headers = {k: upstream.headers[k] for k in CHAT_PROXY_HEADERS if k in upstream.headers}
+        headers.setdefault('X-Accel-Buffering', 'no')
+        return Response(stream_with_context(relay()), status=upstream.status_code, headers=headers)
 
     except Exception as e:
         if requests and hasattr(e, '__class__') and 'RequestException' in str(e.__class__):
@@ -552,12 +588,17 @@ def synthesize_voice():
         req_fx = data.get('fx')
         req_rate = data.get('rate')  # 1.0 по умолчанию
         req_speed = data.get('speed')  # совместимость, приоритетнее, если задано
+        req_format = str(data.get('format') or TTS_AUDIO_FORMAT).lower()  # wav | ogg | opus
+        req_sample_rate = data.get('sample_rate')
         
         if not text.strip():
             return jsonify({'error': 'Text is required'}), 400
             
         if agent not in AGENT_VOICES:
             return jsonify({'error': f'Unknown agent: {agent}'}), 400
+        
+        if req_format not in TTS_AUDIO_FORMATS:
+            return jsonify({'error': f'Unsupported format: {req_format}', 'formats': list(TTS_AUDIO_FORMATS)}), 400
             
         # Базовые значения по агенту
         agent_defaults = AGENT_VOICES.get(agent, {})
@@ -571,16 +612,6 @@ def synthesize_voice():
         
         # Try Ukrainian TTS server with retries, sanitization and dynamic timeout
         if requests:
-            acquired = tts_lock.acquire(timeout=30)
-            if not acquired:
-                logger.warning("TTS busy: lock acquire timeout")
-                # Return a short silence to keep pipeline flowing without throwing 502
-                silence = _make_silence_wav(250)
-                resp = make_response(send_file(silence, mimetype='audio/wav', as_attachment=False,
-                                               download_name=f'{agent}_busy_silent.wav'))
-                resp.headers['X-TTS-Fallback'] = 'busy-silence'
-                resp.headers['Cache-Control'] = 'no-store'
-                return resp
             try:
                 started = monotonic()
                 voice_name = _sanitize_voice(agent, voice_name)
@@ -593,28 +624,51 @@ def synthesize_voice():
                 }
                 if req_fx and str(req_fx).lower() != 'none':
                     tts_payload['fx'] = req_fx
+                if req_format != 'wav':
+                    tts_payload['format'] = req_format
+                if req_sample_rate:
+                    # Перевіряє TTS-сервер (400 на непідтримувану частоту)
+                    tts_payload['sample_rate'] = req_sample_rate
 
                 timeout_sec = _dynamic_timeout_for_text(text)
+                # Waits for a free backend slot (FIFO) only when every backend is busy
                 tts_response, base = _tts_post('/tts', tts_payload, timeout=timeout_sec)
                 elapsed = monotonic() - started
                 if tts_response.status_code == 200 and tts_response.content:
-                    with tempfile.NamedTemporaryFile(delete=False, suffix='.wav') as temp_file:
-                        temp_file.write(tts_response.content)
-                        temp_path = temp_file.name
-                    logger.info(f"TTS OK [{voice_name}] in {elapsed:.2f}s, size={len(tts_response.content)} bytes")
-                    resp = make_response(send_file(temp_path, mimetype='audio/wav', as_attachment=False,
-                                                   download_name=f'{agent}_{int(datetime.now().timestamp())}.wav'))
+                    audio_bytes = tts_response.content
+                    content_type = tts_response.headers.get('Content-Type', 'audio/wav')
+                    ext = req_format if content_type != 'audio/wav' else 'wav'
+                    logger.info(f"TTS OK [{voice_name}] in {elapsed:.2f}s, size={len(audio_bytes)} bytes ({content_type})")
+                    # Forward the upstream encoded bytes as-is (encoded once by the TTS server)
+                    resp = make_response(audio_bytes)
+                    resp.headers['Content-Type'] = content_type
+                    resp.headers['Content-Disposition'] = f'inline; filename={agent}_{int(datetime.now().timestamp())}.{ext}'
                     resp.headers['Cache-Control'] = 'no-store'
+                    for header in TTS_PASSTHROUGH_HEADERS:
+                        if header in tts_response.headers:
+                            resp.headers[header] = tts_response.headers[header]
+                    resp.headers['X-TTS-Upstream-Time'] = f"{elapsed:.3f}"
                     return resp
+                elif tts_response.status_code == 400:
+                    # Помилка параметрів запиту (format, sample_rate) — тишина тут лише сховала б її
+                    try:
+                        details = tts_response.json()
+                    except ValueError:
+                        details = {'error': tts_response.text[:200]}
+                    return jsonify(details), 400
                 else:
                     logger.warning(f"TTS server HTTP {tts_response.status_code} from {base}: {tts_response.text[:200] if hasattr(tts_response, 'text') else 'no text'}")
+            except TTSQueueTimeout as e:
+                logger.warning(f"TTS busy: {e}")
+                # Return a short silence to keep pipeline flowing without throwing 502
+                silence = _make_silence_wav(250)
+                resp = make_response(send_file(silence, mimetype='audio/wav', as_attachment=False,
+                                               download_name=f'{agent}_busy_silent.wav'))
+                resp.headers['X-TTS-Fallback'] = 'busy-silence'
+                resp.headers['Cache-Control'] = 'no-store'
+                return resp
             except Exception as e:
                 logger.warning(f"TTS server request failed: {e}")
-            finally:
-                try:
-                    tts_lock.release()
-                except Exception:
-                    pass
 
         # Safe fallback: return a short silent WAV to avoid client 502 handling and keep UI smooth
         silence = _make_silence_wav(300)
@@ -636,27 +690,26 @@ def handle_voice_interrupt():
         transcript = data.get('transcript', '')
         session_id = data.get('sessionId', 'default')
         confidence = data.get('confidence', 0)
+        # Partial transcripts come from the streaming STT socket while the user is still speaking
+        is_partial = bool(data.get('partial', False))
         
-        # Detect interruption intent
-        interrupt_keywords = [
-            'стоп', 'stop', 'чекай', 'wait', 'припини', 'pause',
-            'наказую', 'command', 'я наказую', 'слухайте'
-        ]
-        
-        transcript_lower = transcript.lower()
-        is_interruption = any(keyword in transcript_lower for keyword in interrupt_keywords)
+        is_interruption = detect_interruption(transcript)
         
         if is_interruption:
+            interrupt_payload = {
+                'message': transcript,
+                'sessionId': session_id,
+                'userId': 'user',
+                'type': 'voice_interruption'
+            }
             # Forward interruption to orchestrator
-            if requests:
+            if requests and is_partial:
+                # Barge-in must not wait for the orchestrator round trip: pause now, notify in background
+                Thread(target=_forward_interruption, args=(interrupt_payload,), daemon=True).start()
+            elif requests:
                 try:
                     response = requests.post(f'{ORCHESTRATOR_URL}/chat/stream',
-                                           json={
-                                               'message': transcript,
-                                               'sessionId': session_id,
-                                               'userId': 'user',
-                                               'type': 'voice_interruption'
-                                           },
+                                           json=interrupt_payload,
                                            timeout=10)
                     
                     return jsonify({
@@ -674,6 +727,7 @@ def handle_voice_interrupt():
                 'success': True,
                 'interruption_detected': True,
                 'transcript': transcript,
+                'partial': is_partial,
                 'action': 'interrupt',
                 'response': {
                     'success': True,
@@ -686,6 +740,7 @@ def handle_voice_interrupt():
             'success': True,
             'interruption_detected': False,
             'transcript': transcript,
+            'partial': is_partial,
             'action': 'continue'
         })
         
@@ -693,16 +748,24 @@ def handle_voice_interrupt():
         logger.error(f"Voice interruption handling error: {e}")
         return jsonify({'error': 'Voice interruption handling failed'}), 500
 
+def _forward_interruption(payload: dict):
+    try:
+        requests.post(f'{ORCHESTRATOR_URL}/chat/stream', json=payload, timeout=10)
+    except Exception as e:
+        logger.warning(f"Forwarding voice interruption failed: {e}")
+
 @app.route('/api/status')
 def status():
     """Simple status endpoint for Status Manager"""
+    orchestrator_status = check_orchestrator_health()
+    tts_status = check_tts_health()
     return jsonify({
         'timestamp': datetime.now().isoformat(),
         'processes': {
             'frontend': {'count': 1, 'status': 'running'},
-            'orchestrator': {'count': 1 if check_orchestrator_health() == 'running' else 0, 'status': check_orchestrator_health()},
+            'orchestrator': {'count': 1 if orchestrator_status == 'running' else 0, 'status': orchestrator_status},
             'recovery': {'count': 1, 'status': 'running'},  # Recovery bridge is usually running if frontend is up
-            'tts': {'count': 1 if check_tts_health() == 'running' else 0, 'status': check_tts_health()}
+            'tts': {'count': 1 if tts_status == 'running' else 0, 'status': tts_status}
         },
         'memory': {'usage': 50},  # Placeholder
         'network': {'active': True}
@@ -726,8 +789,17 @@ def system_status():
             'tts': {
                 'status': check_tts_health(),
                 'url': TTS_SERVER_URL
+            },
+            'goose': {
+                'status': health_monitor.status('goose'),
+                'url': goose_client.base_url
+            },
+            'stt': {
+                'status': health_monitor.status('stt')
             }
         },
+        'health': health_monitor.snapshot(),
+        'monitor': health_monitor.stats(),
         'agents': AGENT_VOICES
     })
 
@@ -833,60 +905,46 @@ def voice_prepare_response():
         return jsonify({'success': False, 'error': 'Failed to prepare response'}), 500
 
 def check_orchestrator_health():
-    """Check if orchestrator is responding"""
+    """Orchestrator status from the last background probe"""
     if not requests:
         return 'unavailable'
-    try:
-        response = requests.get(f'{ORCHESTRATOR_URL}/health', timeout=5)
-        return 'running' if response.status_code == 200 else 'error'
-    except:
-        return 'stopped'
+    return health_monitor.status('orchestrator')
 
 def check_tts_health():
-    """Check if TTS server is responding"""
+    """TTS status from the last background probes: running if any backend answers"""
     if not requests:
-        return 'fallback'
-    try:
-        # Try multiple backends quickly
-        for _ in range(len(_tts_endpoints)):
-            try:
-                r, base = _tts_get('/health', timeout=3)
-                if r.status_code == 200:
-                    return 'running'
-            except Exception:
-                continue
-        return 'error'
-    except:
         return 'fallback'  # Can use browser TTS
+    statuses = [state['status'] for state in health_monitor.snapshot('tts:').values()]
+    if 'running' in statuses:
+        return 'running'
+    if statuses and all(s == 'unknown' for s in statuses):
+        return 'unknown'
+    return 'error'
 
 
 @app.route('/api/translate', methods=['POST'])
 def translate_api():
-    """Lightweight translation endpoint (en->uk by default). Uses Goose as a stub if available.
-    Body: { text: str, source?: str, target?: str }
+    """Translation endpoint (en->uk by default) via a direct LLM call with LRU + sqlite cache.
+    Body: { text: str, source?: str, target?: str } or { texts: [str, ...], ... } (batched per LLM call)
     """
     try:
         data = request.get_json(force=True) or {}
-        text = data.get('text', '')
         source = (data.get('source') or '').lower() or 'auto'
         target = (data.get('target') or '').lower() or 'uk'
+        texts = data.get('texts')
+        if texts is not None:
+            if not isinstance(texts, list) or not all(isinstance(t, str) for t in texts):
+                return jsonify({'success': False, 'error': 'texts must be a list of strings'}), 400
+            if len(texts) > TRANSLATE_MAX_TEXTS:
+                return jsonify({'success': False, 'error': f'At most {TRANSLATE_MAX_TEXTS} texts per request'}), 413
+            results = get_translator().translate_batch(texts, source, target)
+            return jsonify({'success': True, 'texts': [r['text'] for r in results], 'results': results})
+
+        text = data.get('text', '')
         if not text.strip():
             return jsonify({'success': False, 'error': 'Text is required'}), 400
-
-        # For now, perform a no-op for non-English or already Ukrainian, to avoid bad machine output
-        if target.startswith('uk') and (source == 'uk' or 'а' in text or 'і' in text or 'є' in text or 'ї' in text):
-            return jsonify({'success': True, 'text': text, 'detected': 'uk'})
-
-        # Try Goose paraphrase to Ukrainian (placeholder). If unavailable, return original.
-        try:
-            prompt = f"Переклади українською коротко і природно: {text}"
-            result = goose_client.send_reply('atlas_translate', prompt)
-            if result.get('success'):
-                return jsonify({'success': True, 'text': result.get('response', text), 'detected': source or 'auto'})
-        except Exception as e:
-            logger.warning(f"Translate via Goose failed: {e}")
-
-        return jsonify({'success': True, 'text': text, 'detected': source or 'auto', 'note': 'noop'}), 200
+        result = get_translator().translate(text, source, target)
+        return jsonify({'success': True, **result})
     except Exception as e:
         logger.error(f"/api/translate error: {e}")
         return jsonify({'success': False, 'error': 'Translation failed'}), 500
@@ -897,12 +955,35 @@ def translate_api():
 def stt_status():
     """Повертає статус STT системи."""
     try:
+        # Запит статусу означає, що STT потрібен: якщо модель ще не вантажили (сервер запущено
+        # не через __main__, наприклад під WSGI), починаємо завантаження зараз
+        stt_manager.start_loading()
         status = stt_manager.get_status()
+        status['streaming'] = get_stream_info()
         return jsonify(status)
     except Exception as e:
         logger.error(f"/api/stt/status error: {e}")
         return jsonify({'error': 'STT status check failed'}), 500
 
+def _stt_unavailable_response():
+    """503 для транскрибації, поки модель вантажиться або недоступна."""
+    state = stt_manager.load_state
+    if state in ('idle', 'loading'):
+        response = jsonify({
+            'success': False,
+            'state': state,
+            'error': 'Whisper model is still loading, retry shortly.',
+            'fallback': 'Use Web Speech API on client side'
+        })
+        response.headers['Retry-After'] = '5'
+        return response, 503
+    return jsonify({
+        'success': False,
+        'state': state,
+        'error': stt_manager.load_error or 'Whisper not available. Please install faster-whisper.',
+        'fallback': 'Use Web Speech API on client side'
+    }), 503
+
 @app.route('/api/stt/transcribe', methods=['POST'])
 def stt_transcribe():
     """Транскрибує аудіофайл за допомогою Whisper."""
@@ -930,52 +1011,74 @@ def stt_transcribe():
                 'error': f'Unsupported file format. Supported: {", ".join(stt_manager.allowed_extensions)}'
             }), 400
 
-        # Перевіряємо доступність Whisper
-        if not stt_manager.is_whisper_available():
+        # Чекаємо фонове завантаження Whisper не довше WHISPER_READY_WAIT_SECONDS
+        if not stt_manager.wait_ready():
+            return _stt_unavailable_response()
+
+        # Отримуємо параметри з форми
+        # Якщо мова не задана клієнтом, дефолтимо на українську ('uk')
+        language = request.form.get('language') or 'uk'
+        beam_size = int(request.form.get('beam_size', 5))
+        temperature = float(request.form.get('temperature', 0.0))
+
+        # Декодуємо завантаження в пам'яті (тимчасовий файл лише як fallback для ffmpeg-форматів)
+        result = stt_manager.transcribe_bytes(
+            file.read(),
+            file.filename,
+            language=language,
+            beam_size=beam_size,
+            temperature=temperature
+        )
+
+        return jsonify(result)
+
+    except Exception as e:
+        logger.error(f"/api/stt/transcribe error: {e}")
+        return jsonify({
+            'success': False,
+            'error': f'Transcription failed: {str(e)}'
+        }), 500
+
+STT_BATCH_MAX_FILES = int(os.environ.get('STT_BATCH_MAX_FILES', 64))
+
+@app.route('/api/stt/transcribe_batch', methods=['POST'])
+def stt_transcribe_batch():
+    """Транскрибує кілька аудіофайлів (поле 'files') за один запит."""
+    try:
+        files = request.files.getlist('files') or request.files.getlist('file')
+        files = [f for f in files if f and f.filename]
+        if not files:
             return jsonify({
                 'success': False,
-                'error': 'Whisper not available. Please install faster-whisper.',
-                'fallback': 'Use Web Speech API on client side'
-            }), 503
+                'error': 'No files uploaded'
+            }), 400
 
-        # Створюємо тимчасовий файл
-        temp_file = tempfile.NamedTemporaryFile(
-            suffix=f".{file.filename.rsplit('.', 1)[1].lower()}",
-            delete=False
+        if len(files) > STT_BATCH_MAX_FILES:
+            return jsonify({
+                'success': False,
+                'error': f'Too many files: {len(files)} > {STT_BATCH_MAX_FILES}'
+            }), 413
+
+        if not stt_manager.wait_ready():
+            return _stt_unavailable_response()
+
+        language = request.form.get('language') or 'uk'
+        beam_size = int(request.form.get('beam_size', 5))
+        temperature = float(request.form.get('temperature', 0.0))
+
+        result = stt_manager.transcribe_batch(
+            [(f.read(), f.filename) for f in files],
+            language=language,
+            beam_size=beam_size,
+            temperature=temperature
         )
-        
-        try:
-            # Зберігаємо файл
-            file.save(temp_file.name)
-            
-            # Отримуємо параметри з форми
-            # Якщо мова не задана клієнтом, дефолтимо на українську ('uk')
-            language = request.form.get('language') or 'uk'
-            beam_size = int(request.form.get('beam_size', 5))
-            temperature = float(request.form.get('temperature', 0.0))
-            
-            # Виконуємо транскрибацію
-            result = stt_manager.transcribe_file(
-                temp_file.name,
-                language=language,
-                beam_size=beam_size,
-                temperature=temperature
-            )
-            
-            return jsonify(result)
-            
-        finally:
-            # Видаляємо тимчасовий файл
-            try:
-                os.unlink(temp_file.name)
-            except OSError:
-                pass
-                
+        return jsonify(result)
+
     except Exception as e:
-        logger.error(f"/api/stt/transcribe error: {e}")
+        logger.error(f"/api/stt/transcribe_batch error: {e}")
         return jsonify({
             'success': False,
-            'error': f'Transcription failed: {str(e)}'
+            'error': f'Batch transcription failed: {str(e)}'
         }), 500
 
 @app.route('/api/stt/models', methods=['GET'])
@@ -991,6 +1094,7 @@ def stt_models():
         ]
         
         return jsonify({
+            'state': stt_manager.load_state,
             'whisper_available': stt_manager.is_whisper_available(),
             'current_model': stt_manager.model_size if stt_manager.is_whisper_available() else None,
             'available_models': available_models,
@@ -1018,20 +1122,19 @@ def intent_classification():
         
         # Import here to avoid circular dependencies
         try:
-            from intent_router import classify_intent, generate_casual_reply
-            
-            intent = classify_intent(text)
-            reply = ''
+            from intent_router import route_message
             
-            # Generate casual reply for chat intents
-            if intent == 'chat':
-                reply = generate_casual_reply(text)
+            # Intent and casual reply (for chat) in a single LLM round trip at most
+            routed = route_message(text)
+            confidence = routed['confidence']
                 
             return jsonify({
                 'success': True,
-                'intent': intent,
-                'reply': reply,
-                'source': 'intent_router'
+                'intent': routed['intent'],
+                'reply': routed['reply'],
+                'source': 'intent_router',
+                'tier': routed['tier'],
+                'confidence': round(confidence, 3) if confidence is not None else None
             })
             
         except ImportError as e:
@@ -1054,4 +1157,12 @@ if __name__ == '__main__':
     logger.info(f"Orchestrator URL: {ORCHESTRATOR_URL}")
     logger.info(f"TTS Server URL: {TTS_SERVER_URL}")
     
-    app.run(host='0.0.0.0', port=FRONTEND_PORT, debug=True)
\ No newline at end of file
+    debug = True
+    # With the debug reloader only the serving child process (WERKZEUG_RUN_MAIN) should own the socket
+    if not debug or os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+        # Whisper вантажиться у фоні — Flask починає обслуговувати запити одразу
+        stt_manager.start_loading()
+        start_stt_stream_server()
+        health_monitor.start()
+    
+    app.run(host='0.0.0.0', port=FRONTEND_PORT, debug=debug)
\ No newline at end of file
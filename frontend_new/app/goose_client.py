@@ -1,23 +1,49 @@
 import json
 import time
 import os
+import atexit
+import queue
+import threading
 import requests
 import aiohttp
 import asyncio
+from requests.adapters import HTTPAdapter
+
+# Скільки секунд вважати визначений транспорт (ws | sse) актуальним
+GOOSE_TRANSPORT_TTL = float(os.getenv('GOOSE_TRANSPORT_TTL', 300))
+
 
 class GooseClient:
-    """Клієнт для взаємодії з Goose (web/ws або goosed /reply SSE)."""
+    """Клієнт для взаємодії з Goose (web/ws або goosed /reply SSE).
 
-    def __init__(self, base_url: str | None = None, secret_key: str | None = None):
+    Транспорт визначається один раз і кешується на GOOSE_TRANSPORT_TTL (скидається при помилці).
+    HTTP іде через спільну requests.Session, WS — через постійний event loop у фоновому потоці;
+    aiohttp.ClientSession кешується на кожен event loop, тож на повідомлення припадає лише сам запит.
+    """
+
+    def __init__(self, base_url: str | None = None, secret_key: str | None = None,
+                 transport_ttl: float = GOOSE_TRANSPORT_TTL):
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=2, pool_maxsize=8)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
         # Порядок пріоритетів: аргумент -> env -> авто-вибір
         env_url = os.getenv('GOOSE_BASE_URL')
         self.base_url = base_url or env_url or self._auto_pick_goose_url()
         self.secret_key = secret_key or os.getenv('GOOSE_SECRET_KEY', 'test')
 
+        self.transport_ttl = transport_ttl
+        self._transport = None
+        self._transport_checked = 0.0
+        self._lock = threading.Lock()
+        self._loop = None
+        self._aio_sessions = {}  # event loop -> aiohttp.ClientSession (сесія прив'язана до свого loop)
+        self.stats = {'messages': 0, 'detections': 0, 'invalidations': 0}
+
     def _auto_pick_goose_url(self) -> str:
         # Спочатку перевіряємо goose web на стандартному порті 3000
         try:
-            r = requests.get("http://127.0.0.1:3000/", timeout=2)
+            r = self.session.get("http://127.0.0.1:3000/", timeout=2)
             if r.status_code == 200 and "Goose Chat" in r.text:
                 print("🌐 Знайдено Goose Web на порті 3000")
                 return "http://127.0.0.1:3000"
@@ -28,7 +54,7 @@ class GooseClient:
         for base in ("http://127.0.0.1:3000", "http://127.0.0.1:3001"):
             for ep in ("/status", "/api/health", "/"):
                 try:
-                    r = requests.get(f"{base}{ep}", timeout=2)
+                    r = self.session.get(f"{base}{ep}", timeout=2)
                     if r.status_code in (200, 404):
                         return base
                 except Exception:
@@ -38,63 +64,192 @@ class GooseClient:
     def _is_web(self) -> bool:
         try:
             # Перевіряємо чи це goose web (завжди на 3000 порту)
-            r = requests.get(f"{self.base_url}/", timeout=3)
+            r = self.session.get(f"{self.base_url}/", timeout=3)
             return r.status_code == 200 and "Goose Chat" in r.text
         except Exception:
             return False
 
     def _is_goosed(self) -> bool:
         try:
-            r = requests.get(f"{self.base_url}/status", timeout=3)
+            r = self.session.get(f"{self.base_url}/status", timeout=3)
             return r.status_code == 200
         except Exception:
             return False
 
-    def send_reply(self, session_name: str, message: str, timeout: int = 90) -> dict:
-        if self._is_web():
-            try:
-                return asyncio.run(self._via_ws(session_name, message, timeout))
-            except RuntimeError:
+    # ---- транспорт ----
+
+    def transport(self) -> str:
+        """'ws' для goose web, інакше 'sse' (goosed /reply); кешується на transport_ttl"""
+        with self._lock:
+            now = time.monotonic()
+            if self._transport is None or now - self._transport_checked > self.transport_ttl:
+                self._transport = 'ws' if self._is_web() else 'sse'
+                self._transport_checked = now
+                self.stats['detections'] += 1
+            return self._transport
+
+    def invalidate_transport(self):
+        with self._lock:
+            if self._transport is not None:
+                self.stats['invalidations'] += 1
+            self._transport = None
+
+    # ---- постійний event loop для WS ----
+
+    def _ensure_loop(self) -> asyncio.AbstractEventLoop:
+        with self._lock:
+            if self._loop is None:
                 loop = asyncio.new_event_loop()
-                try:
-                    asyncio.set_event_loop(loop)
-                    return loop.run_until_complete(self._via_ws(session_name, message, timeout))
-                finally:
-                    asyncio.set_event_loop(None)
-                    loop.close()
-        return self._via_sse(session_name, message, timeout)
-
-    async def _via_ws(self, session_name: str, message: str, timeout: int):
-        ws_url = self.base_url.replace("http://", "ws://").replace("https://", "wss://") + "/ws"
-        payload = {"type": "message", "content": message, "session_id": session_name, "timestamp": int(time.time()*1000)}
+                threading.Thread(target=loop.run_forever, name='goose-client-loop', daemon=True).start()
+                self._loop = loop
+                atexit.register(self.close)
+            return self._loop
+
+    async def _get_aio_session(self) -> aiohttp.ClientSession:
+        """Кешована aiohttp-сесія поточного event loop (фонового або того, де працює astream_reply)"""
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            for other in [l for l in self._aio_sessions if l.is_closed()]:
+                del self._aio_sessions[other]
+            session = self._aio_sessions.get(loop)
+            if session is None or session.closed:
+                session = self._aio_sessions[loop] = aiohttp.ClientSession()
+            return session
+
+    def close(self):
+        """Закриває HTTP-пул, aiohttp-сесію та фоновий loop"""
+        self.session.close()
+        loop, self._loop = self._loop, None
+        with self._lock:
+            sessions, self._aio_sessions = self._aio_sessions, {}
+        for owner, session in sessions.items():
+            if owner is not loop and owner.is_running() and not session.closed:
+                # Чужий loop: закриття плануємо в ньому ж, не чекаючи
+                owner.call_soon_threadsafe(owner.create_task, session.close())
+        if loop is not None:
+            session = sessions.get(loop)
+            if session is not None and not session.closed:
+                asyncio.run_coroutine_threadsafe(session.close(), loop).result(5)
+            loop.call_soon_threadsafe(loop.stop)
+
+    # ---- повідомлення ----
+
+    def send_reply(self, session_name: str, message: str, timeout: int = 90) -> dict:
+        """Повна відповідь одним dict; зібрана з подій stream_reply"""
         chunks = []
-        timeout_total = aiohttp.ClientTimeout(total=timeout)
-        async with aiohttp.ClientSession(timeout=timeout_total) as session:
-            async with session.ws_connect(ws_url, heartbeat=30) as ws:
-                await ws.send_str(json.dumps(payload))
-                async for msg in ws:
-                    if msg.type == aiohttp.WSMsgType.TEXT:
-                        try:
-                            obj = json.loads(msg.data)
-                        except Exception:
-                            obj = None
-                        if isinstance(obj, dict):
-                            t = obj.get("type")
-                            if t == "response":
-                                content = obj.get("content")
-                                if content:
-                                    chunks.append(str(content))
-                            elif t in ("complete", "cancelled"):
-                                break
-                            elif t == "error":
-                                return {"success": False, "error": obj.get("message", "websocket error")}
-                        else:
-                            chunks.append(str(msg.data))
-                    elif msg.type in (aiohttp.WSMsgType.CLOSE, aiohttp.WSMsgType.CLOSED, aiohttp.WSMsgType.ERROR):
-                        break
+        for event in self.stream_reply(session_name, message, timeout):
+            if event["type"] == "token":
+                chunks.append(event["text"])
+            elif event["type"] == "error":
+                result = {"success": False, "error": event["error"]}
+                if "response" in event:
+                    result["response"] = event["response"]
+                return result
         return {"success": True, "response": "".join(chunks).strip()}
 
-    def _via_sse(self, session_name: str, message: str, timeout: int):
+    def stream_reply(self, session_name: str, message: str, timeout: int = 90):
+        """Генератор подій відповіді: {'type': 'token', 'text'}, {'type': 'error', 'error'}, {'type': 'done'}.
+
+        Закриття генератора (клієнт відключився) закриває з'єднання з Goose.
+        """
+        self.stats['messages'] += 1
+        try:
+            if self.transport() == 'ws':
+                events = self._bridge(self._aiter_ws(session_name, message), timeout)
+            else:
+                events = self._iter_sse(session_name, message, timeout)
+            for event in events:
+                if event["type"] == "error" and str(event["error"]).startswith("HTTP"):
+                    self.invalidate_transport()
+                yield event
+        except Exception:
+            # Goose міг перезапуститись в іншому режимі — наступний запит визначить транспорт заново
+            self.invalidate_transport()
+            raise
+
+    async def astream_reply(self, session_name: str, message: str, timeout: int = 90):
+        """Async-варіант stream_reply для коду, що працює у власному event loop"""
+        self.stats['messages'] += 1
+        # Визначення транспорту — блокуючі requests-проби (до 3 с), тож не в event loop
+        transport = await asyncio.get_running_loop().run_in_executor(None, self.transport)
+        session = await self._get_aio_session()
+        if transport == 'ws':
+            events = self._aiter_ws(session_name, message, session)
+        else:
+            events = self._aiter_sse(session_name, message, session)
+        try:
+            async for event in _with_deadline(events, timeout):
+                if event["type"] == "error" and str(event["error"]).startswith("HTTP"):
+                    self.invalidate_transport()
+                yield event
+        except (aiohttp.ClientError, asyncio.TimeoutError):
+            self.invalidate_transport()
+            raise
+
+    def _bridge(self, agen, timeout: float):
+        """Проганяє async-генератор на фоновому loop і віддає події синхронно через чергу"""
+        events = queue.Queue()
+        end = object()
+
+        async def pump():
+            try:
+                async for event in _with_deadline(agen, timeout):
+                    events.put(event)
+            except BaseException as e:
+                events.put(e)
+                if isinstance(e, asyncio.CancelledError):
+                    raise
+            finally:
+                events.put(end)
+
+        future = asyncio.run_coroutine_threadsafe(pump(), self._ensure_loop())
+        try:
+            while True:
+                item = events.get(timeout=timeout + 5)
+                if item is end:
+                    return
+                if isinstance(item, BaseException):
+                    raise item
+                yield item
+        finally:
+            future.cancel()
+
+    # ---- WS (goose web) ----
+
+    def _ws_payload(self, session_name: str, message: str) -> dict:
+        return {"type": "message", "content": message, "session_id": session_name, "timestamp": int(time.time()*1000)}
+
+    async def _aiter_ws(self, session_name: str, message: str, session=None):
+        ws_url = self.base_url.replace("http://", "ws://").replace("https://", "wss://") + "/ws"
+        session = session or await self._get_aio_session()
+        async with session.ws_connect(ws_url, heartbeat=30) as ws:
+            await ws.send_str(json.dumps(self._ws_payload(session_name, message)))
+            async for msg in ws:
+                if msg.type == aiohttp.WSMsgType.TEXT:
+                    try:
+                        obj = json.loads(msg.data)
+                    except Exception:
+                        obj = None
+                    if isinstance(obj, dict):
+                        t = obj.get("type")
+                        if t == "response":
+                            content = obj.get("content")
+                            if content:
+                                yield {"type": "token", "text": str(content)}
+                        elif t in ("complete", "cancelled"):
+                            break
+                        elif t == "error":
+                            yield {"type": "error", "error": obj.get("message", "websocket error")}
+                            return
+                    else:
+                        yield {"type": "token", "text": str(msg.data)}
+                elif msg.type in (aiohttp.WSMsgType.CLOSE, aiohttp.WSMsgType.CLOSED, aiohttp.WSMsgType.ERROR):
+                    break
+        yield {"type": "done"}
+
+    # ---- SSE (goosed /reply) ----
+
+    def _sse_request(self, session_name: str, message: str):
         url = f"{self.base_url}/reply"
         headers = {"Accept": "text/event-stream", "Cache-Control": "no-cache", "X-Secret-Key": self.secret_key}
         payload = {
@@ -102,42 +257,163 @@ class GooseClient:
             "session_id": session_name,
             "session_working_dir": os.getcwd(),
         }
-        with requests.post(url, json=payload, headers=headers, stream=True, timeout=timeout) as resp:
+        return url, payload, headers
+
+    def _iter_sse(self, session_name: str, message: str, timeout: int):
+        url, payload, headers = self._sse_request(session_name, message)
+        with self.session.post(url, json=payload, headers=headers, stream=True, timeout=timeout) as resp:
             if resp.status_code != 200:
                 try:
                     text = resp.text[:500]
                 except Exception:
                     text = "<no body>"
-                return {"success": False, "error": f"HTTP {resp.status_code}", "response": text}
-            chunks = []
-            for raw_line in resp.iter_lines(decode_unicode=True):
-                if raw_line is None:
-                    continue
-                line = raw_line.strip()
-                if not line or line.startswith(":"):
-                    continue
-                if line.startswith("data:"):
-                    data_part = line[5:].lstrip()
-                    try:
-                        obj = json.loads(data_part)
-                        if isinstance(obj, dict):
-                            if obj.get("type") == "Message" and isinstance(obj.get("message"), dict):
-                                msg = obj["message"]
-                                for c in msg.get("content", []) or []:
-                                    if isinstance(c, dict) and c.get("type") == "text":
-                                        t = c.get("text")
-                                        if t:
-                                            chunks.append(str(t))
-                            else:
-                                token = obj.get("text") or obj.get("token") or obj.get("content")
-                                if token:
-                                    chunks.append(str(token))
-                                if obj.get("final") is True or obj.get("done") is True:
-                                    break
-                        else:
-                            chunks.append(str(obj))
-                    except Exception:
-                        chunks.append(data_part)
-                elif line.lower() == "event: done":
-                    break
-        return {"success": True, "response": "".join(chunks).strip()}
+                yield {"type": "error", "error": f"HTTP {resp.status_code}", "response": text}
+                return
+            parser = SSEParser()
+            # Сирі байти: розбиття на рядки і декодування робить парсер, а не iter_lines
+            for data in resp.iter_content(chunk_size=None):
+                for sse in parser.feed(data):
+                    tokens, final = _sse_tokens(sse)
+                    for token in tokens:
+                        yield {"type": "token", "text": token}
+                    if final:
+                        yield {"type": "done"}
+                        return
+        yield {"type": "done"}
+
+    async def _aiter_sse(self, session_name: str, message: str, session=None):
+        url, payload, headers = self._sse_request(session_name, message)
+        session = session or await self._get_aio_session()
+        async with session.post(url, json=payload, headers=headers) as resp:
+            if resp.status != 200:
+                text = (await resp.text(errors="replace"))[:500]
+                yield {"type": "error", "error": f"HTTP {resp.status}", "response": text}
+                return
+            parser = SSEParser()
+            async for data in resp.content.iter_any():
+                for sse in parser.feed(data):
+                    tokens, final = _sse_tokens(sse)
+                    for token in tokens:
+                        yield {"type": "token", "text": token}
+                    if final:
+                        yield {"type": "done"}
+                        return
+        yield {"type": "done"}
+
+
+async def _with_deadline(agen, timeout: float):
+    """Async-генератор з загальним дедлайном на весь потік (asyncio.TimeoutError)"""
+    deadline = asyncio.get_running_loop().time() + timeout
+    try:
+        while True:
+            remaining = deadline - asyncio.get_running_loop().time()
+            if remaining <= 0:
+                raise asyncio.TimeoutError()
+            try:
+                yield await asyncio.wait_for(agen.__anext__(), remaining)
+            except StopAsyncIteration:
+                return
+    finally:
+        await agen.aclose()
+
+
+def _sse_tokens(sse: dict):
+    """Текстові фрагменти з однієї SSE-події goosed; повертає (tokens, final)"""
+    if sse["event"] == "done":
+        return [], True
+    data = sse["data"]
+    try:
+        obj = json.loads(data)
+    except Exception:
+        return ([data] if data else []), False
+    if not isinstance(obj, dict):
+        return [str(obj)], False
+    if obj.get("type") == "Message" and isinstance(obj.get("message"), dict):
+        tokens = []
+        for c in obj["message"].get("content", []) or []:
+            if isinstance(c, dict) and c.get("type") == "text" and c.get("text"):
+                tokens.append(str(c["text"]))
+        return tokens, False
+    token = obj.get("text") or obj.get("token") or obj.get("content")
+    final = obj.get("final") is True or obj.get("done") is True
+    return ([str(token)] if token else []), final
+
+
+class SSEParser:
+    """Інкрементальний парсер text/event-stream (WHATWG) поверх сирих байтів.
+
+    feed() приймає довільні шматки мережевого потоку і повертає завершені події
+    {'event', 'data', 'id', 'retry'}: рядки розділяються CRLF/LF/CR (зокрема CR на межі
+    шматків), багаторядкові data: склеюються через '\n', коментарі ':' ігноруються.
+    На відміну від WHATWG, подія з назвою (event: ...) без жодного data: теж віддається
+    з data='' — goosed може завершити потік голим `event: done`.
+    """
+
+    def __init__(self):
+        self._buf = b""
+        self._pending_cr = False
+        self._first = True
+        self._event = ""
+        self._data = []
+        self.last_event_id = ""
+        self.retry = None
+
+    def feed(self, chunk: bytes) -> list:
+        if self._pending_cr and chunk.startswith(b"\n"):
+            chunk = chunk[1:]
+        self._pending_cr = False
+        buf = self._buf + chunk
+        events = []
+        start = 0
+        n = len(buf)
+        while True:
+            lf = buf.find(b"\n", start)
+            cr = buf.find(b"\r", start)
+            if lf < 0 and cr < 0:
+                break
+            if cr >= 0 and (lf < 0 or cr < lf):
+                end, nxt = cr, cr + 1
+                if nxt < n and buf[nxt:nxt + 1] == b"\n":
+                    nxt += 1
+                elif nxt == n:
+                    # CR наприкінці шматка: наступний може почитатись з LF того ж розриву
+                    self._pending_cr = True
+            else:
+                end, nxt = lf, lf + 1
+            event = self._line(buf[start:end].decode("utf-8", errors="replace"))
+            if event is not None:
+                events.append(event)
+            start = nxt
+        self._buf = buf[start:]
+        return events
+
+    def _line(self, line: str):
+        if self._first:
+            self._first = False
+            line = line.lstrip("\ufeff")
+        if not line:
+            return self._dispatch()
+        if line.startswith(":"):
+            return None
+        field, sep, value = line.partition(":")
+        if sep and value.startswith(" "):
+            value = value[1:]
+        if field == "data":
+            self._data.append(value)
+        elif field == "event":
+            self._event = value
+        elif field == "id":
+            if "\0" not in value:
+                self.last_event_id = value
+        elif field == "retry":
+            if value.isdigit():
+                self.retry = int(value)
+        return None
+
+    def _dispatch(self):
+        data, event = self._data, self._event
+        self._data, self._event = [], ""
+        if not data and not event:
+            return None
+        return {"event": event or "message", "data": "\n".join(data), "id": self.last_event_id,
+                "retry": self.retry}
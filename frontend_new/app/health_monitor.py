@@ -0,0 +1,137 @@
+"""
+Health monitor for ATLAS frontend
+Background probing of dependencies (Goose, orchestrator, TTS, STT) into a cached snapshot
+"""
+
+import os
+import time
+import random
+import logging
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Інтервал між раундами перевірок і частка випадкового розкиду (щоб не бити всі сервіси синхронно)
+HEALTH_INTERVAL = float(os.getenv('HEALTH_INTERVAL', 10))
+HEALTH_JITTER = float(os.getenv('HEALTH_JITTER', 0.2))
+# Скільки останніх перевірок тримати в історії кожного сервісу
+HEALTH_HISTORY = int(os.getenv('HEALTH_HISTORY', 20))
+
+
+class HealthMonitor:
+    """Probes registered services on a jittered interval; status endpoints only read the snapshot.
+
+    A probe is a callable returning a status string ('running', 'error', 'stopped', ...) or a
+    (status, details) tuple; exceptions count as 'stopped'. Probes of one round run in parallel,
+    so a dead dependency delays only its own entry, never a request handler.
+    """
+
+    def __init__(self, interval: float = HEALTH_INTERVAL, jitter: float = HEALTH_JITTER,
+                 history: int = HEALTH_HISTORY):
+        self.interval = interval
+        self.jitter = jitter
+        self.history = history
+        self._probes: Dict[str, Callable] = {}
+        self._state: Dict[str, Dict] = {}
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread = None
+        self._pool = None
+        self.rounds = 0
+
+    def register(self, name: str, probe: Callable):
+        with self._lock:
+            self._probes[name] = probe
+            self._state.setdefault(name, {
+                'status': 'unknown',
+                'details': None,
+                'error': None,
+                'checked_at': None,
+                'latency_ms': None,
+                'history': deque(maxlen=self.history)
+            })
+
+    # ---- probing ----
+
+    def _probe(self, name: str, probe: Callable):
+        started = time.monotonic()
+        details, error = None, None
+        try:
+            result = probe()
+            status, details = result if isinstance(result, tuple) else (result, None)
+        except Exception as e:
+            status, error = 'stopped', str(e)
+        latency_ms = round((time.monotonic() - started) * 1000.0, 1)
+        with self._lock:
+            state = self._state[name]
+            state.update(status=status, details=details, error=error,
+                         checked_at=time.time(), latency_ms=latency_ms)
+            state['history'].append({'at': round(state['checked_at'], 3), 'status': status,
+                                     'latency_ms': latency_ms})
+
+    def refresh(self, names: Optional[List[str]] = None):
+        """One synchronous round (all probes in parallel)"""
+        with self._lock:
+            probes = [(n, p) for n, p in self._probes.items() if not names or n in names]
+            if self._pool is None:
+                self._pool = ThreadPoolExecutor(max_workers=max(4, len(self._probes)),
+                                                thread_name_prefix='health-probe')
+        futures = [self._pool.submit(self._probe, n, p) for n, p in probes]
+        for future in futures:
+            future.result()
+        self.rounds += 1
+
+    def _run(self):
+        while True:
+            try:
+                self.refresh()
+            except Exception as e:
+                logger.warning(f"Health round failed: {e}")
+            delay = self.interval * (1 + random.uniform(-self.jitter, self.jitter))
+            self._wake.wait(delay)
+            self._wake.clear()
+
+    def start(self):
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._thread = threading.Thread(target=self._run, name='health-monitor', daemon=True)
+            self._thread.start()
+
+    def poke(self):
+        """Позачерговий раунд (наприклад, після помилки запиту до сервісу)"""
+        self._wake.set()
+
+    # ---- snapshot ----
+
+    def status(self, name: str) -> str:
+        self.start()
+        with self._lock:
+            state = self._state.get(name)
+            return state['status'] if state else 'unknown'
+
+    def snapshot(self, prefix: Optional[str] = None) -> Dict[str, Dict]:
+        """Cached state per service with age_s and latency history; never probes inline"""
+        self.start()
+        now = time.time()
+        with self._lock:
+            items = [(n, dict(s, history=list(s['history']))) for n, s in self._state.items()
+                     if prefix is None or n.startswith(prefix)]
+        result = {}
+        for name, state in items:
+            state['age_s'] = round(now - state['checked_at'], 1) if state['checked_at'] else None
+            latencies = [h['latency_ms'] for h in state['history']]
+            state['latency_avg_ms'] = round(sum(latencies) / len(latencies), 1) if latencies else None
+            result[name] = state
+        return result
+
+    def stats(self) -> Dict:
+        return {
+            'interval_s': self.interval,
+            'jitter': self.jitter,
+            'rounds': self.rounds,
+            'running': self._thread is not None
+        }
@@ -0,0 +1,156 @@
+"""
+Local intent model for ATLAS frontend
+Character n-gram linear classifier (hashed features, softmax) trained offline on logged LLM labels.
+
+The artifact is a small .npz (weights, bias, labels, hashing params) loaded once per process;
+prediction is a few dozen crc32 hashes plus one gather over the weight matrix (~0.1 ms).
+See train_intent_model.py for training and the accuracy/latency report.
+"""
+from __future__ import annotations
+
+import os
+import re
+import zlib
+import json
+import time
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+try:
+    import numpy as np  # type: ignore
+except Exception:  # pragma: no cover
+    np = None
+
+CURRENT_DIR = Path(__file__).parent
+INTENT_MODEL_PATH = os.environ.get('INTENT_MODEL_PATH', str(CURRENT_DIR / 'models' / 'intent_ngram.npz'))
+# Нижче цієї впевненості рішення віддаємо LLM
+INTENT_MODEL_THRESHOLD = float(os.environ.get('INTENT_MODEL_THRESHOLD', 0.85))
+# Куди дописувати пари (text, intent), отримані від LLM — дані для навчання. Вимкнено за замовчуванням:
+# файл містить сирий текст повідомлень користувача. Увімкнення: INTENT_LABEL_LOG=../logs/intent_labels.jsonl
+INTENT_LABEL_LOG = os.environ.get('INTENT_LABEL_LOG', '')
+# Ліміт розміру: при перевищенні файл ротується в .1 (зберігається одна попередня копія)
+INTENT_LABEL_LOG_MAX_BYTES = int(os.environ.get('INTENT_LABEL_LOG_MAX_BYTES', 5 * 1024 * 1024))
+
+DEFAULT_DIM = 1 << 15
+DEFAULT_NGRAMS = (2, 4)
+
+_SPACES = re.compile(r'\s+')
+
+
+def normalize(text: str) -> str:
+    return _SPACES.sub(' ', (text or '').strip().lower())
+
+
+def features(text: str, dim: int = DEFAULT_DIM, ngrams: Tuple[int, int] = DEFAULT_NGRAMS) -> List[int]:
+    """Hashed character n-grams of ' text ' (word boundaries included); unique indices"""
+    s = f" {normalize(text)} "
+    lo, hi = ngrams
+    idx = set()
+    for n in range(lo, hi + 1):
+        for i in range(len(s) - n + 1):
+            # crc32, а не hash(): хеш має бути стабільним між процесами (PYTHONHASHSEED)
+            idx.add(zlib.crc32(s[i:i + n].encode('utf-8')) % dim)
+    return sorted(idx)
+
+
+class IntentModel:
+    """Softmax over hashed n-gram features; weights shape (n_labels, dim)"""
+
+    def __init__(self, weights, bias, labels: List[str], dim: int = DEFAULT_DIM,
+                 ngrams: Tuple[int, int] = DEFAULT_NGRAMS, meta: Optional[Dict] = None):
+        self.weights = weights
+        self.bias = bias
+        self.labels = list(labels)
+        self.dim = int(dim)
+        self.ngrams = (int(ngrams[0]), int(ngrams[1]))
+        self.meta = meta or {}
+
+    def scores(self, text: str):
+        idx = features(text, self.dim, self.ngrams)
+        if not idx:
+            return self.bias.copy()
+        # Бінарні ознаки з L2-нормуванням: сума стовпців / sqrt(кількість)
+        return self.weights[:, idx].sum(axis=1) / np.sqrt(len(idx)) + self.bias
+
+    def predict(self, text: str) -> Tuple[str, float]:
+        """(label, confidence) where confidence is the softmax probability of the label"""
+        z = self.scores(text)
+        z = z - z.max()
+        p = np.exp(z)
+        p /= p.sum()
+        k = int(p.argmax())
+        return self.labels[k], float(p[k])
+
+    def save(self, path: str):
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        np.savez_compressed(
+            path,
+            weights=self.weights.astype(np.float32),
+            bias=self.bias.astype(np.float32),
+            labels=np.array(self.labels),
+            dim=np.array(self.dim),
+            ngrams=np.array(self.ngrams),
+            meta=np.array(json.dumps(self.meta, ensure_ascii=False))
+        )
+
+    @classmethod
+    def load(cls, path: str) -> 'IntentModel':
+        with np.load(path, allow_pickle=False) as data:
+            return cls(
+                weights=data['weights'],
+                bias=data['bias'],
+                labels=[str(x) for x in data['labels']],
+                dim=int(data['dim']),
+                ngrams=tuple(int(x) for x in data['ngrams']),
+                meta=json.loads(str(data['meta'])) if 'meta' in data else {}
+            )
+
+
+_model = None
+_model_loaded = False
+_model_lock = threading.Lock()
+_log_lock = threading.Lock()
+
+
+def get_model(path: Optional[str] = None) -> Optional[IntentModel]:
+    """Модель з диска, завантажена один раз на процес; None, якщо артефакту немає або немає numpy"""
+    global _model, _model_loaded
+    if _model_loaded and path is None:
+        return _model
+    with _model_lock:
+        if _model_loaded and path is None:
+            return _model
+        model = None
+        model_path = path or INTENT_MODEL_PATH
+        if np is not None and model_path and os.path.exists(model_path):
+            try:
+                model = IntentModel.load(model_path)
+            except Exception:
+                model = None
+        if path is None:
+            _model, _model_loaded = model, True
+        return model
+
+
+def log_label(text: str, intent: str, source: str = 'llm', path: Optional[str] = None,
+              max_bytes: Optional[int] = None):
+    """Appends one (text, intent) pair for offline training (opt-in via INTENT_LABEL_LOG); failures are ignored.
+
+    Only messages that reached the LLM are logged: once the local model is confident on a
+    kind of message, it stops appearing here, so retraining sees mostly the hard cases.
+    """
+    path = path if path is not None else INTENT_LABEL_LOG
+    max_bytes = INTENT_LABEL_LOG_MAX_BYTES if max_bytes is None else max_bytes
+    if not path or not text:
+        return
+    try:
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        record = {'ts': round(time.time(), 3), 'text': text, 'intent': intent, 'source': source}
+        with _log_lock:
+            if max_bytes > 0 and os.path.exists(path) and os.path.getsize(path) >= max_bytes:
+                os.replace(path, path + '.1')
+            with open(path, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(record, ensure_ascii=False) + '\n')
+    except Exception:
+        pass
@@ -6,6 +6,16 @@ Environment variables (optional):
 - INTENT_LLM_BASE: OpenAI-compatible base URL (e.g., http://127.0.0.1:3010/v1)
 - INTENT_LLM_MODEL: Model name (e.g., gpt-4o-mini). Default: 'gpt-4o-mini'
 - INTENT_LLM_API_KEY: API key if required by the endpoint
+- INTENT_MODEL_PATH / INTENT_MODEL_THRESHOLD: local n-gram model tier (see intent_model.py);
+  confident local predictions skip the LLM call
+- INTENT_LABEL_LOG: JSONL file where LLM-labelled (text, intent) pairs are appended for training.
+  Off by default (stores raw user text); size-capped by INTENT_LABEL_LOG_MAX_BYTES
+- INTENT_LLM_TIMEOUT_MS: budget for the intent-only classification call. Default: 800
+- INTENT_ROUTE_TIMEOUT_MS: budget for the combined intent+reply call, used by route_message only for
+  messages that are likely chat. Default: 8000
+- INTENT_LLM_JSON_MODE: '1' to request response_format=json_object (endpoint must support it)
+- INTENT_REPLY_CACHE_SIZE / INTENT_REPLY_CACHE_TTL / INTENT_REPLY_CACHE_MAX_CHARS: LRU of casual
+  replies for short repeated messages (greetings)
 
 If not configured or request errors happen, we default to intent='chat' and a
 simple safe reply stub to avoid blocking the UX.
@@ -14,12 +24,21 @@ from __future__ import annotations
 
 import os
 import json
-from typing import Optional, List, Dict, Any
+import time
+import threading
+from collections import OrderedDict
+from typing import Optional, List, Dict, Any, Tuple
+
+from intent_model import get_model, log_label, normalize, INTENT_MODEL_THRESHOLD
 
 try:
     import requests  # type: ignore
+    from requests.adapters import HTTPAdapter  # type: ignore
 except Exception:  # pragma: no cover
     requests = None
+    HTTPAdapter = None
+
+INTENT_LLM_JSON_MODE = os.environ.get('INTENT_LLM_JSON_MODE', '0') == '1'
 
 
 INTENT_SYSTEM_PROMPT = (
@@ -31,6 +50,17 @@ INTENT_SYSTEM_PROMPT = (
     "Формат: {\"intent\": \"chat|task\"}"
 )
 
+ROUTE_SYSTEM_PROMPT = (
+    "Ти — Atlas і водночас РОУТЕР НАМІРІВ. Нічого не виконуєш.\n"
+    "Поверни РІВНО один JSON-об’єкт БЕЗ будь-якого оточуючого тексту.\n"
+    "Поле intent ∈ {\"chat\", \"task\"}.\n"
+    "chat — коли користувач просто спілкується/бесідує, без просьби щось виконати.\n"
+    "task — коли користувач просить ВИКОНАТИ завдання/дію/інструкцію/розробку тощо.\n"
+    "Якщо intent = chat, поле reply — коротка дружня відповідь Atlas (1–2 речення), без пропозицій\n"
+    "щось виконати і без прохань підтвердити. Якщо intent = task, reply — порожній рядок.\n"
+    "Формат: {\"intent\": \"chat|task\", \"reply\": \"...\"}"
+)
+
 CASUAL_SYSTEM_PROMPT = (
     "Ти — Atlas, дружній співрозмовник. Твоє завдання — вести коротку та легку\n"
     "бесіду на будь-яку тему, ввічливо і доброзичливо. НЕ пропонуй виконувати\n"
@@ -38,21 +68,42 @@ CASUAL_SYSTEM_PROMPT = (
 )
 
 
+_session = None
+_session_lock = threading.Lock()
+
+
+def _shared_session():
+    """One keep-alive connection pool for all LLMClient instances (they are created per call)"""
+    global _session
+    if _session is None and requests:
+        with _session_lock:
+            if _session is None:
+                s = requests.Session()
+                if HTTPAdapter:
+                    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=16)
+                    s.mount('http://', adapter)
+                    s.mount('https://', adapter)
+                _session = s
+    return _session
+
+
 class LLMClient:
     def __init__(self,
                  base_url: Optional[str] = None,
                  model: Optional[str] = None,
                  api_key: Optional[str] = None,
-                 timeout: float = 20.0):
+                 timeout: float = 20.0,
+                 session=None):
         self.base_url = (base_url or os.environ.get('INTENT_LLM_BASE') or '').rstrip('/')
         self.model = model or os.environ.get('INTENT_LLM_MODEL') or 'gpt-4o-mini'
         self.api_key = api_key or os.environ.get('INTENT_LLM_API_KEY') or ''
         self.timeout = max(0.5, float(timeout))
+        self.session = session
 
     def is_configured(self) -> bool:
         return bool(self.base_url and requests)
 
-    def chat(self, messages: List[Dict[str, str]]) -> Optional[str]:
+    def chat(self, messages: List[Dict[str, str]], json_mode: bool = False) -> Optional[str]:
         if not self.is_configured():
             return None
         url = f"{self.base_url}/chat/completions"
@@ -64,8 +115,10 @@ class LLMClient:
             "messages": messages,
             "stream": False
         }
+        if json_mode:
+            payload["response_format"] = {"type": "json_object"}
         try:
-            r = requests.post(url, json=payload, headers=headers, timeout=self.timeout)
+            r = (self.session or _shared_session()).post(url, json=payload, headers=headers, timeout=self.timeout)
             if r.status_code != 200:
                 return None
             data = r.json()
@@ -104,7 +157,31 @@ def _heuristic_intent(user_text: str) -> str:
 
 
 def classify_intent(user_text: str, client: Optional[LLMClient] = None) -> str:
-    """Return 'chat' or 'task' using LLM; fallback to heuristic if LLM unavailable/invalid."""
+    """Return 'chat' or 'task': local model if confident, else LLM, else heuristic."""
+    return classify_intent_detailed(user_text, client)[0]
+
+
+def classify_intent_detailed(user_text: str, client: Optional[LLMClient] = None) -> Tuple[str, str, Optional[float]]:
+    """(intent, source, confidence); source ∈ {'local', 'llm', 'heuristic'}"""
+    model = get_model()
+    local, confidence = None, None
+    if model is not None and user_text and user_text.strip():
+        label, confidence = model.predict(user_text)
+        local = 'task' if label == 'task' else 'chat'
+        if confidence >= INTENT_MODEL_THRESHOLD:
+            return local, 'local', confidence
+    intent = _classify_intent_llm(user_text, client)
+    if intent is None:
+        # LLM недоступний: невпевнена локальна модель все одно точніша за пошук підрядків
+        if local is not None:
+            return local, 'local', confidence
+        return _heuristic_intent(user_text), 'heuristic', None
+    log_label(user_text, intent)
+    return intent, 'llm', confidence
+
+
+def _classify_intent_llm(user_text: str, client: Optional[LLMClient] = None) -> Optional[str]:
+    """LLM tier; None if the LLM is unavailable or its answer is invalid."""
     # Prefer a short timeout for intent
     try:
         ms = int(os.environ.get('INTENT_LLM_TIMEOUT_MS', '800'))
@@ -117,10 +194,18 @@ def classify_intent(user_text: str, client: Optional[LLMClient] = None) -> str:
         {"role": "user", "content": user_text or ''}
     ]
     if not client.is_configured():
-        return _heuristic_intent(user_text)
-    raw = client.chat(messages)
+        return None
+    obj = _parse_json_object(client.chat(messages, json_mode=INTENT_LLM_JSON_MODE))
+    if obj is None:
+        return None
+    intent = str(obj.get('intent', 'chat')).lower()
+    return 'task' if intent == 'task' else 'chat'
+
+
+def _parse_json_object(raw: Optional[str]) -> Optional[Dict[str, Any]]:
+    """JSON object from an LLM answer (tolerates ```json fences); None if invalid"""
     if not raw:
-        return _heuristic_intent(user_text)
+        return None
     try:
         s = raw.strip()
         if s.startswith('```'):
@@ -128,10 +213,121 @@ def classify_intent(user_text: str, client: Optional[LLMClient] = None) -> str:
             if s.lower().startswith('json'):
                 s = s[4:]
         obj = json.loads(s)
-        intent = str(obj.get('intent', 'chat')).lower()
-        return 'task' if intent == 'task' else 'chat'
+        return obj if isinstance(obj, dict) else None
     except Exception:
-        return _heuristic_intent(user_text)
+        return None
+
+
+class _ReplyCache:
+    """LRU (з TTL) відповідей на короткі повторювані повідомлення: привітання, подяки"""
+
+    def __init__(self, maxsize: int, ttl: float, max_chars: int):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.max_chars = max_chars
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def key(self, text: str) -> Optional[str]:
+        k = normalize(text).strip(' .,!?…')
+        return k if k and len(k) <= self.max_chars else None
+
+    def get(self, text: str) -> Optional[str]:
+        k = self.key(text)
+        if k is None or self.maxsize <= 0:
+            return None
+        with self._lock:
+            item = self._items.get(k)
+            if item is None or time.monotonic() - item[1] > self.ttl:
+                self.misses += 1
+                return None
+            self._items.move_to_end(k)
+            self.hits += 1
+            return item[0]
+
+    def put(self, text: str, reply: str):
+        k = self.key(text)
+        if k is None or self.maxsize <= 0 or not reply:
+            return
+        with self._lock:
+            self._items[k] = (reply, time.monotonic())
+            self._items.move_to_end(k)
+            while len(self._items) > self.maxsize:
+                self._items.popitem(last=False)
+
+    def stats(self) -> Dict[str, Any]:
+        return {'size': len(self._items), 'hits': self.hits, 'misses': self.misses}
+
+
+reply_cache = _ReplyCache(
+    maxsize=int(os.environ.get('INTENT_REPLY_CACHE_SIZE', '256')),
+    ttl=float(os.environ.get('INTENT_REPLY_CACHE_TTL', '3600')),
+    max_chars=int(os.environ.get('INTENT_REPLY_CACHE_MAX_CHARS', '40'))
+)
+
+
+def route_message(user_text: str, client: Optional[LLMClient] = None) -> Dict[str, Any]:
+    """Intent and (for chat) a casual reply in at most one LLM round trip for chat messages.
+
+    Order: reply cache for short repeated messages → local model (confident 'task' needs no
+    LLM at all) → if the message is likely a task (local model or, without a model, the
+    heuristic says so) only the short INTENT_LLM_TIMEOUT_MS classification, so routing a task
+    never waits on reply generation → otherwise one combined completion {"intent", "reply"}
+    → heuristic with a stub reply. Returns {'intent', 'reply', 'tier', 'confidence', 'cached'}.
+    """
+    cached = reply_cache.get(user_text)
+    if cached is not None:
+        return {'intent': 'chat', 'reply': cached, 'tier': 'cache', 'confidence': None, 'cached': True}
+
+    model = get_model()
+    local, confidence = None, None
+    if model is not None and user_text and user_text.strip():
+        label, confidence = model.predict(user_text)
+        local = 'task' if label == 'task' else 'chat'
+        if local == 'task' and confidence >= INTENT_MODEL_THRESHOLD:
+            return {'intent': 'task', 'reply': '', 'tier': 'local', 'confidence': confidence, 'cached': False}
+    prior, prior_tier = (local, 'local') if local is not None else (_heuristic_intent(user_text), 'heuristic')
+
+    if prior == 'task':
+        intent = _classify_intent_llm(user_text, client)
+        if intent is None:
+            return {'intent': 'task', 'reply': '', 'tier': prior_tier, 'confidence': confidence, 'cached': False}
+        log_label(user_text, intent)
+        if intent == 'task':
+            return {'intent': 'task', 'reply': '', 'tier': 'llm', 'confidence': confidence, 'cached': False}
+        # LLM виправив апріорну 'task' на розмову — відповідь потрібна, тож далі комбінований виклик
+
+    if client is None:
+        try:
+            ms = int(os.environ.get('INTENT_ROUTE_TIMEOUT_MS', '8000'))
+        except Exception:
+            ms = 8000
+        client = LLMClient(timeout=max(0.5, ms / 1000.0))
+    obj = None
+    if client.is_configured():
+        obj = _parse_json_object(client.chat([
+            {"role": "system", "content": ROUTE_SYSTEM_PROMPT},
+            {"role": "user", "content": user_text or ''}
+        ], json_mode=INTENT_LLM_JSON_MODE))
+
+    if obj is not None:
+        # Після класифікації вище наміром уже є 'chat', комбінований виклик дає лише відповідь
+        intent = 'chat' if prior == 'task' else ('task' if str(obj.get('intent', 'chat')).lower() == 'task' else 'chat')
+        if prior != 'task':
+            log_label(user_text, intent)
+        reply = str(obj.get('reply') or '').strip() if intent == 'chat' else ''
+        if intent == 'chat':
+            if reply:
+                reply_cache.put(user_text, reply)
+            else:
+                reply = _fallback_reply(user_text)
+        return {'intent': intent, 'reply': reply, 'tier': 'llm', 'confidence': confidence, 'cached': False}
+
+    intent, tier = ('chat', 'llm') if prior == 'task' else (prior, prior_tier)
+    reply = _fallback_reply(user_text) if intent == 'chat' else ''
+    return {'intent': intent, 'reply': reply, 'tier': tier, 'confidence': confidence, 'cached': False}
 
 
 def generate_casual_reply(user_text: str, client: Optional[LLMClient] = None) -> str:
@@ -144,6 +340,10 @@ def generate_casual_reply(user_text: str, client: Optional[LLMClient] = None) ->
     out = client.chat(messages)
     if isinstance(out, str) and out.strip():
         return out.strip()
+    return _fallback_reply(user_text)
+
+
+def _fallback_reply(user_text: str) -> str:
     # Safe fallback reply without triggering actions
     text = (user_text or '').strip()
     if not text:
@@ -0,0 +1,335 @@
+"""
+Log index for ATLAS frontend
+Incremental tailing of service logs into bounded, merge-ready ring buffers
+
+intelligent_atlas/core/log_stream.py mirrors the tailing, cursor/gap and SSE logic for a single
+file (that app does not import from frontend_new); keep the two in sync.
+"""
+
+import os
+import re
+import json
+import time
+import heapq
+import logging
+import threading
+from collections import deque
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Скільки записів тримати на кожне джерело
+LOG_INDEX_MAX_ENTRIES = int(os.getenv('LOG_INDEX_MAX_ENTRIES', 2000))
+# При першому відкритті великого файлу читаємо лише хвіст такого розміру
+LOG_INDEX_BOOTSTRAP_BYTES = int(os.getenv('LOG_INDEX_BOOTSTRAP_BYTES', 256 * 1024))
+# Live stream (/logs/stream): інтервал опитування файлів, heartbeat, максимум записів за одну відправку
+LOG_WATCH_INTERVAL = float(os.getenv('LOG_WATCH_INTERVAL', 0.5))
+LOG_STREAM_HEARTBEAT = float(os.getenv('LOG_STREAM_HEARTBEAT', 15))
+LOG_STREAM_MAX_BATCH = int(os.getenv('LOG_STREAM_MAX_BATCH', 200))
+
+# Timestamp patterns we support:
+# 1) 2025-09-04 20:19:54,360
+TS_PAT_1 = re.compile(r'^(\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2},\d{3})')
+# 2) [2025-09-05T00:23:19.735Z] ...
+TS_PAT_2 = re.compile(r'^\[(\d{4}-\d{2}-\d{2}T[^\]]+)\]')
+# 3) 03:13:48 or 03:13:48.123 (time-only)
+TS_PAT_3 = re.compile(r'^(\d{2}:\d{2}:\d{2}(?:[\.,]\d{1,3})?)')
+LEVEL_PAT = re.compile(r'\[(DEBUG|INFO|WARN|WARNING|ERROR|CRITICAL|TRACE)\]', re.IGNORECASE)
+
+
+def parse_ts(ts_str: str) -> datetime:
+    """Parse the known timestamp formats; time-only stamps get today's date, unknown → now."""
+    if 'T' not in ts_str and ',' in ts_str:
+        try:
+            return datetime.strptime(ts_str, '%Y-%m-%d %H:%M:%S,%f')
+        except ValueError:
+            pass
+    if 'T' in ts_str:
+        try:
+            dt = datetime.fromisoformat(ts_str.replace('Z', '+00:00'))
+            # Наївний локальний час, як у решти форматів, щоб порівнювати між джерелами
+            return dt.astimezone().replace(tzinfo=None) if dt.tzinfo else dt
+        except ValueError:
+            pass
+    try:
+        ts_norm = ts_str.replace(',', '.')
+        fmt = '%H:%M:%S.%f' if '.' in ts_norm else '%H:%M:%S'
+        return datetime.combine(datetime.now().date(), datetime.strptime(ts_norm, fmt).time())
+    except ValueError:
+        return datetime.now()
+
+
+def detect_level(text: str) -> str:
+    m_lvl = LEVEL_PAT.search(text)
+    if m_lvl:
+        level = m_lvl.group(1).lower()
+        return 'warn' if level == 'warning' else level
+    low = text.lower()
+    if ' error' in low or low.startswith('error'):
+        return 'error'
+    if ' warn' in low or low.startswith('warn'):
+        return 'warn'
+    if ' debug' in low or low.startswith('debug'):
+        return 'debug'
+    return 'info'
+
+
+class LogTail:
+    """Tails one log file from a saved byte offset; multi-line records are grouped into one entry."""
+
+    def __init__(self, path: Path, source: str, max_entries: int = LOG_INDEX_MAX_ENTRIES,
+                 bootstrap_bytes: int = LOG_INDEX_BOOTSTRAP_BYTES):
+        self.path = Path(path)
+        self.source = source
+        self.bootstrap_bytes = bootstrap_bytes
+        self.entries = deque(maxlen=max_entries)
+        self.offset = None      # None — файл ще не відкривали
+        self.inode = None
+        self._partial = b''     # неповний останній рядок
+        self._current = None    # запис, до якого ще можуть дописатися рядки-продовження
+        self.rotations = 0
+        self.lines_read = 0
+        self.evicted_seq = 0    # найбільший seq, витіснений з кільцевого буфера
+
+    def _reset(self, offset: int):
+        self.offset = offset
+        self._partial = b''
+
+    def poll(self, assign_seq) -> int:
+        """Read bytes appended since the last poll; returns the number of new entries."""
+        try:
+            st = self.path.stat()
+        except FileNotFoundError:
+            return 0
+        skip_first = False
+        if self.offset is None:
+            start = max(0, st.st_size - self.bootstrap_bytes)
+            self._reset(start)
+            skip_first = start > 0  # перший рядок, найімовірніше, обрізаний
+        elif st.st_ino != self.inode or st.st_size < self.offset:
+            # Ротація (новий inode) або truncate — читаємо новий файл з початку
+            self.rotations += 1
+            self._flush(assign_seq)
+            self._reset(0)
+        self.inode = st.st_ino
+        if st.st_size == self.offset:
+            return 0
+
+        with open(self.path, 'rb') as f:
+            f.seek(self.offset)
+            data = f.read(st.st_size - self.offset)
+        self.offset += len(data)
+
+        chunk = self._partial + data
+        lines = chunk.split(b'\n')
+        self._partial = lines.pop()
+        if skip_first and lines:
+            lines.pop(0)
+
+        added = 0
+        for raw in lines:
+            added += self._ingest(raw.decode('utf-8', errors='replace').rstrip('\r'), assign_seq)
+        self.lines_read += len(lines)
+        if not self._partial:
+            # Запис завершено рядком — файл «затих», віддаємо накопичений запис
+            added += self._flush(assign_seq)
+        return added
+
+    def _ingest(self, text: str, assign_seq) -> int:
+        if not text.strip():
+            # keep empty lines as part of the message if we have one
+            if self._current:
+                self._current['message'] += '\n'
+            return 0
+        ts_match = TS_PAT_1.match(text) or TS_PAT_2.match(text) or TS_PAT_3.match(text)
+        if ts_match is None and self._current is not None:
+            # Continuation line (traceback, markdown like "### [ТЕТЯНА]") of the previous record
+            self._current['message'] += f"\n{text}"
+            return 0
+        flushed = self._flush(assign_seq)
+        dt = parse_ts(ts_match.group(1)) if ts_match else datetime.now()
+        self._current = {
+            'timestamp': dt.isoformat(timespec='milliseconds'),
+            'ts': dt.timestamp(),
+            'source': self.source,
+            'level': detect_level(text),
+            'message': text
+        }
+        return flushed
+
+    def _flush(self, assign_seq) -> int:
+        if not self._current:
+            return 0
+        entry, self._current = self._current, None
+        entry['seq'] = assign_seq()
+        if len(self.entries) == self.entries.maxlen:
+            self.evicted_seq = self.entries[0]['seq']
+        self.entries.append(entry)
+        return 1
+
+
+class LogIndex:
+    """Incremental index over several log files.
+
+    poll() reads only bytes appended since the previous poll (rotation and truncation are
+    detected by inode/size), so a request costs O(new lines). query() k-way merges the
+    per-source ring buffers by (timestamp, seq) and supports a `since` cursor on seq.
+    """
+
+    def __init__(self, sources: Dict[str, Path], max_entries: int = LOG_INDEX_MAX_ENTRIES,
+                 bootstrap_bytes: int = LOG_INDEX_BOOTSTRAP_BYTES):
+        self._lock = threading.Lock()
+        self._changed = threading.Condition(self._lock)
+        self._watcher = None
+        self._seq = 0
+        self.tails = [LogTail(path, name, max_entries, bootstrap_bytes) for name, path in sources.items()]
+        self.polls = 0
+
+    def _next_seq(self) -> int:
+        self._seq += 1
+        return self._seq
+
+    @property
+    def cursor(self) -> int:
+        return self._seq
+
+    def poll(self) -> int:
+        added = 0
+        with self._lock:
+            self.polls += 1
+            for tail in self.tails:
+                try:
+                    added += tail.poll(self._next_seq)
+                except Exception as e:
+                    logger.warning(f"Failed to read {tail.path}: {e}")
+            if added:
+                self._changed.notify_all()
+        return added
+
+    def start_watcher(self, interval: float = LOG_WATCH_INTERVAL):
+        """Background poller for live streams: one thread reads the files, stream clients only wait."""
+        with self._lock:
+            if self._watcher is not None:
+                return
+            self._watcher = threading.Thread(target=self._watch, args=(interval,), name='log-index-watcher',
+                                             daemon=True)
+            self._watcher.start()
+
+    def _watch(self, interval: float):
+        while True:
+            self.poll()
+            time.sleep(interval)
+
+    def wait_for(self, cursor: int, timeout: float) -> int:
+        """Block until entries newer than cursor exist (or timeout); returns the current cursor."""
+        with self._changed:
+            if self._seq <= cursor:
+                self._changed.wait(timeout)
+            return self._seq
+
+    def entries_since(self, cursor: int, sources: Optional[List[str]] = None,
+                      levels: Optional[List[str]] = None, max_items: int = LOG_STREAM_MAX_BATCH):
+        """Entries with seq > cursor in arrival (seq) order for live streams.
+
+        Returns (entries, new_cursor, gap). gap = (first_missing, last_missing) when entries after
+        the cursor were evicted from the ring or dropped because the reader fell more than
+        max_items behind; the reader resumes from the newest entries instead of buffering.
+        """
+        with self._lock:
+            new_cursor = self._seq
+            evicted = 0
+            streams = []
+            for tail in self.tails:
+                if sources and tail.source not in sources:
+                    continue
+                # Розрив рахуємо лише по джерелах, на які підписаний читач
+                evicted = max(evicted, tail.evicted_seq)
+                fresh = []
+                for entry in reversed(tail.entries):
+                    if entry['seq'] <= cursor:
+                        break
+                    if not levels or entry['level'] in levels:
+                        fresh.append(entry)
+                streams.append(fresh[::-1])
+        entries = list(heapq.merge(*streams, key=lambda e: e['seq']))
+        gap = (cursor + 1, evicted) if evicted > cursor else None
+        if len(entries) > max_items:
+            dropped_to = entries[-max_items - 1]['seq']
+            gap = (cursor + 1, max(dropped_to, gap[1] if gap else 0))
+            entries = entries[-max_items:]
+        return [{k: v for k, v in e.items() if k != 'ts'} for e in entries], new_cursor, gap
+
+    def query(self, limit: int = 100, since: Optional[int] = None, sources: Optional[List[str]] = None,
+              levels: Optional[List[str]] = None) -> Tuple[List[dict], int]:
+        """Newest `limit` entries (ascending by time) with seq > since; returns (entries, cursor)."""
+        self.poll()
+        with self._lock:
+            streams = []
+            for tail in self.tails:
+                if sources and tail.source not in sources:
+                    continue
+                # Записи одного файлу вже впорядковані; з since беремо лише хвіст після курсора
+                entries = tail.entries
+                if since is not None:
+                    fresh = []
+                    for entry in reversed(entries):
+                        if entry['seq'] <= since:
+                            break
+                        fresh.append(entry)
+                    entries = reversed(fresh)
+                if levels:
+                    entries = (e for e in entries if e['level'] in levels)
+                streams.append(list(entries))
+            cursor = self._seq
+        merged = list(heapq.merge(*streams, key=lambda e: (e['ts'], e['seq'])))
+        result = [{k: v for k, v in e.items() if k != 'ts'} for e in merged[-limit:]] if limit > 0 else []
+        return result, cursor
+
+    def stream(self, cursor: Optional[int] = None, sources: Optional[List[str]] = None,
+               levels: Optional[List[str]] = None, heartbeat: float = LOG_STREAM_HEARTBEAT):
+        """SSE generator: backlog after cursor, then live entries; `id:` is the seq for Last-Event-ID.
+
+        Without a cursor the stream starts at the current end (no backlog). A slow client never
+        grows a per-client buffer: each send takes at most LOG_STREAM_MAX_BATCH entries and
+        anything older is reported as an `event: gap`.
+        """
+        self.start_watcher()
+        if cursor is None:
+            self.poll()
+            cursor = self._seq
+        yield f"retry: 3000\nid: {cursor}\n\n"
+        last_sent = time.monotonic()
+        while True:
+            entries, new_cursor, gap = self.entries_since(cursor, sources, levels)
+            if gap:
+                yield f"event: gap\ndata: {json.dumps({'from': gap[0], 'to': gap[1]})}\n\n"
+            for entry in entries:
+                yield f"id: {entry['seq']}\ndata: {json.dumps(entry, ensure_ascii=False)}\n\n"
+            if entries or gap or new_cursor != cursor:
+                if not entries or entries[-1]['seq'] != new_cursor:
+                    # Відфільтровані записи теж просувають Last-Event-ID клієнта
+                    yield f"id: {new_cursor}\n\n"
+                cursor = new_cursor
+                last_sent = time.monotonic()
+            elif time.monotonic() - last_sent >= heartbeat:
+                yield ": ping\n\n"
+                last_sent = time.monotonic()
+            self.wait_for(cursor, timeout=heartbeat)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                'cursor': self._seq,
+                'polls': self.polls,
+                'sources': {
+                    tail.source: {
+                        'path': str(tail.path),
+                        'offset': tail.offset,
+                        'entries': len(tail.entries),
+                        'lines_read': tail.lines_read,
+                        'rotations': tail.rotations
+                    } for tail in self.tails
+                }
+            }
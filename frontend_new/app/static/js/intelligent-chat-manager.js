@@ -53,7 +53,10 @@ class AtlasIntelligentChatManager {
             ttsQueue: [], // Queue for TTS processing
             isProcessingTTS: false, // Flag to prevent parallel TTS processing
             lastAgentComplete: null, // Track when agent finishes speaking
-            firstTtsDone: false // Guard to avoid double TTS on very first response
+            firstTtsDone: false, // Guard to avoid double TTS on very first response
+            // Формат аудіо від TTS: Opus/OGG, якщо браузер його відтворює, інакше WAV
+            audioFormat: this.detectTTSAudioFormat(),
+            ttsTimings: [] // останні заміри: байти на дроті та затримка до початку звучання
         };
 
     // Режим озвучування: 'quick' (коротко) або 'standard' (повністю)
@@ -498,6 +501,79 @@ class AtlasIntelligentChatManager {
         }
     }
     
+    async readChatStream(response, onPhase) {
+        // Reads /api/chat NDJSON: {type:'phase'} per agent reply, blank keep-alive lines,
+        // final {type:'done'} (or {type:'error'}) carrying the usual JSON payload
+        const reader = response.body.getReader();
+        const decoder = new TextDecoder();
+        let buffer = '';
+        let result = null;
+        const handleLine = async (line) => {
+            if (!line.trim()) return;
+            const event = JSON.parse(line);
+            if (event.type === 'phase' && event.response) {
+                await onPhase(event.response);
+            } else if (event.type === 'done') {
+                result = event;
+            } else if (event.type === 'error') {
+                throw new Error(event.details || event.error || 'Processing failed');
+            }
+        };
+        while (true) {
+            const { value, done } = await reader.read();
+            if (done) break;
+            buffer += decoder.decode(value, { stream: true });
+            let newline;
+            while ((newline = buffer.indexOf('\n')) >= 0) {
+                const line = buffer.slice(0, newline);
+                buffer = buffer.slice(newline + 1);
+                await handleLine(line);
+            }
+        }
+        await handleLine(buffer + decoder.decode());
+        if (!result) {
+            throw new Error('Chat stream ended before the final response');
+        }
+        return result;
+    }
+    
+    async handleAgentResponse(agentResponse) {
+        const agent = agentResponse.agent || 'atlas';
+        const content = agentResponse.content || '';
+        const signature = agentResponse.signature || this.voiceSystem.agents[agent]?.signature;
+        const phase = agentResponse.phase || null;
+        if (phase === 'grisha_verdict' && agentResponse.verification) {
+            this._lastVerdictVerification = agentResponse.verification;
+        }
+
+        if (this.shouldSkipDuplicatePhase(agent, phase, content)) {
+            this.log(`[PIPELINE] Skipping duplicate phase message: ${agent}:${phase}`);
+            return;
+        }
+        this.addVoiceMessage(content, agent, signature, phase);
+        
+        // Add to TTS queue if voice is enabled
+        if (this.voiceSystem.enabled && this.isVoiceEnabled() && content.trim()) {
+            if (this.isQuickMode && this.isQuickMode()) {
+                const shortText = this.buildQuickTTS(content, agent);
+                if (shortText) {
+                    this.voiceSystem.ttsQueue.push({ text: shortText, agent });
+                } else {
+                    const segments = this.segmentForTTS(content, agent);
+                    const batched = this.combineSegmentsForAgent(segments, agent);
+                    for (const seg of batched) this.voiceSystem.ttsQueue.push({ text: seg, agent });
+                }
+            } else {
+                const segments = this.segmentForTTS(content, agent);
+                const batched = this.combineSegmentsForAgent(segments, agent);
+                for (const seg of batched) this.voiceSystem.ttsQueue.push({ text: seg, agent });
+            }
+        }
+        
+        // Small delay between messages for better UX
+        await this.delay(500);
+    }
+    
     async streamFromOrchestrator(message, retryAttempt = 0) {
         const maxRetries = 3;
         const timeoutDuration = 30000; // 30 seconds timeout
@@ -535,48 +611,32 @@ class AtlasIntelligentChatManager {
                 throw new Error(`HTTP ${response.status}: ${response.statusText} - ${errorText}`);
             }
             
-            // Handle JSON response from orchestrator
-            const data = await response.json();
+            // NDJSON: фази агентів приходять по одній, щойно готові (останній рядок — підсумок {type:'done'});
+            // звичайний JSON — усі фази однією відповіддю
+            let data;
+            let streamedPhases = 0;
+            const contentType = response.headers.get('Content-Type') || '';
+            if (contentType.includes('application/x-ndjson') && response.body) {
+                data = await this.readChatStream(response, async (agentResponse) => {
+                    streamedPhases++;
+                    await this.handleAgentResponse(agentResponse);
+                    // Озвучуємо вже отримані фази, не чекаючи решти циклу
+                    if (this.voiceSystem.ttsQueue.length > 0) {
+                        this.processTTSQueue();
+                    }
+                });
+            } else {
+                data = await response.json();
+            }
             
             if (data.success && data.response && Array.isArray(data.response)) {
                 this.log(`Received ${data.response.length} agent responses`);
                 
-                // Process each agent response sequentially
-                for (const agentResponse of data.response) {
-                    const agent = agentResponse.agent || 'atlas';
-                    const content = agentResponse.content || '';
-                    const signature = agentResponse.signature || this.voiceSystem.agents[agent]?.signature;
-                    const phase = agentResponse.phase || null;
-                    if (phase === 'grisha_verdict' && agentResponse.verification) {
-                        this._lastVerdictVerification = agentResponse.verification;
-                    }
-
-                    if (this.shouldSkipDuplicatePhase(agent, phase, content)) {
-                        this.log(`[PIPELINE] Skipping duplicate phase message: ${agent}:${phase}`);
-                        continue;
-                    }
-                    this.addVoiceMessage(content, agent, signature, phase);
-                    
-                    // Add to TTS queue if voice is enabled
-                    if (this.voiceSystem.enabled && this.isVoiceEnabled() && content.trim()) {
-                        if (this.isQuickMode && this.isQuickMode()) {
-                            const shortText = this.buildQuickTTS(content, agent);
-                            if (shortText) {
-                                this.voiceSystem.ttsQueue.push({ text: shortText, agent });
-                            } else {
-                                const segments = this.segmentForTTS(content, agent);
-                                const batched = this.combineSegmentsForAgent(segments, agent);
-                                for (const seg of batched) this.voiceSystem.ttsQueue.push({ text: seg, agent });
-                            }
-                        } else {
-                            const segments = this.segmentForTTS(content, agent);
-                            const batched = this.combineSegmentsForAgent(segments, agent);
-                            for (const seg of batched) this.voiceSystem.ttsQueue.push({ text: seg, agent });
-                        }
+                // Process each agent response sequentially (already done while streaming)
+                if (!streamedPhases) {
+                    for (const agentResponse of data.response) {
+                        await this.handleAgentResponse(agentResponse);
                     }
-                    
-                    // Small delay between messages for better UX
-                    await this.delay(500);
                 }
                 
                 // Process TTS queue
@@ -1039,6 +1099,8 @@ class AtlasIntelligentChatManager {
             const t = setTimeout(() => controller.abort(), timeout);
             
             // Синтезуємо голос з налаштуваннями агента
+            const audioFormat = this.voiceSystem.audioFormat;
+            const requestStarted = performance.now();
             const response = await fetch(`${this.frontendBase}/api/voice/synthesize`, {
                 method: 'POST',
                 headers: {
@@ -1049,7 +1111,8 @@ class AtlasIntelligentChatManager {
                     agent: agent,
                     voice: voice,
                     pitch: agentConfig.pitch || 1.0,
-                    rate: agentConfig.rate || 1.0
+                    rate: agentConfig.rate || 1.0,
+                    format: audioFormat
                 }),
                 signal: controller.signal
             });
@@ -1104,7 +1167,10 @@ class AtlasIntelligentChatManager {
                 throw new Error('Empty audio blob received');
             }
             
-            await this.playAudioBlob(audioBlob, `${agent} (${voice})`, { agent, text: speechText });
+            await this.playAudioBlob(audioBlob, `${agent} (${voice})`, {
+                agent, text: speechText, format: audioFormat, requestStarted,
+                receivedAt: performance.now(), audioDuration: parseFloat(response.headers.get('X-Audio-Duration')) || null
+            });
             
         } catch (error) {
             const agentConfig = this.voiceSystem.agents[agent] || this.voiceSystem.agents.atlas;
@@ -1172,6 +1238,32 @@ class AtlasIntelligentChatManager {
         return parts.join('. ').trim().slice(0, 300);
     }
     
+    detectTTSAudioFormat() {
+        try {
+            const probe = document.createElement('audio');
+            if (probe.canPlayType('audio/ogg; codecs=opus')) return 'opus';
+        } catch (_) {}
+        return 'wav';
+    }
+
+    // Байти на дроті та затримка від запиту до початку звучання (лише для відповіді, що почала грати вперше)
+    recordTTSTiming(audioBlob, meta = {}) {
+        if (!meta.requestStarted || meta.timingRecorded) return;
+        meta.timingRecorded = true;
+        const now = performance.now();
+        const timing = {
+            format: meta.format || 'wav',
+            bytes: audioBlob.size,
+            fetchMs: Math.round((meta.receivedAt || now) - meta.requestStarted),
+            startMs: Math.round(now - meta.requestStarted),
+            kbps: meta.audioDuration ? Math.round(audioBlob.size * 8 / meta.audioDuration / 1000) : null
+        };
+        const timings = this.voiceSystem.ttsTimings;
+        timings.push(timing);
+        if (timings.length > 50) timings.shift();
+        this.log(`[VOICE] TTS ${timing.format}: ${timing.bytes} bytes, fetch ${timing.fetchMs}ms, start ${timing.startMs}ms`);
+    }
+
     async playAudioBlob(audioBlob, description, meta = {}) {
         return new Promise((resolve, reject) => {
             try {
@@ -1234,6 +1326,10 @@ class AtlasIntelligentChatManager {
                 
                 audio.onerror = (error) => {
                     console.error(`[ATLAS-TTS] Audio error for ${description}:`, error);
+                    if (meta.format && meta.format !== 'wav') {
+                        // Браузер не декодував стиснений формат — далі просимо WAV
+                        this.voiceSystem.audioFormat = 'wav';
+                    }
                     console.error(`[ATLAS-TTS] Audio error details:`, {
                         src: audio.src,
                         readyState: audio.readyState,
@@ -1257,6 +1353,7 @@ class AtlasIntelligentChatManager {
                 
                 audio.onplaying = () => {
                     console.log(`[ATLAS-TTS] Audio is playing: ${description}`);
+                    this.recordTTSTiming(audioBlob, meta);
                     // Как только пошло воспроизведение — пробуем снять mute
                     tryUnmute();
                     // schedule mid-subtitle update
@@ -1833,7 +1930,12 @@ class AtlasIntelligentChatManager {
             const response = await fetch(`${this.frontendBase}/api/stt/status`);
             const status = await response.json();
             this.speechSystem.whisperAvailable = status.whisper_available || false;
-            this.log(`[STT] Whisper availability: ${this.speechSystem.whisperAvailable}`);
+            this.log(`[STT] Whisper availability: ${this.speechSystem.whisperAvailable} (state: ${status.state})`);
+            // Модель вантажиться у фоні на сервері (запит статусу сам запускає завантаження) —
+            // перевіряємо ще раз лише поки триває 'loading'; idle/ready/failed/unavailable — кінцеві для опитування
+            if (status.state === 'loading') {
+                setTimeout(() => this.checkWhisperAvailability(), 3000);
+            }
         } catch (error) {
             this.log(`[STT] Failed to check Whisper: ${error.message}`);
             this.speechSystem.whisperAvailable = false;
@@ -13,6 +13,10 @@ class AtlasLogger {
         this.lastActivity = Date.now();
         this.isActive = false;
         this.lastLogTimestamp = null; // Трекінг останнього лога для оптимізації
+        this.logCursor = null; // seq-курсор /logs (since)
+        this.eventSource = null; // живий потік /logs/stream (SSE)
+        this.streamConnected = false;
+        this.streamFailures = 0;
         
         this.init();
     }
@@ -63,11 +67,12 @@ class AtlasLogger {
     }
     
     startLogStream() {
-        // Початкове завантаження логів
-        this.refreshLogs();
+        // Початкове завантаження логів, далі — живий потік від поточного курсора
+        this.refreshLogs().then(() => this.openEventStream());
         
-        // Адаптивне періодичне оновлення
+        // Адаптивне періодичне оновлення (лише коли SSE недоступний)
         setInterval(() => {
+            if (this.streamConnected) return;
             // Використовуємо швидкий інтервал, якщо була нещодавня активність
             const timeSinceActivity = Date.now() - this.lastActivity;
             const shouldUseFastInterval = timeSinceActivity < 60000; // 1 хвилина
@@ -89,7 +94,45 @@ class AtlasLogger {
         });
     }
     
+    openEventStream() {
+        if (!window.EventSource || this.eventSource) return;
+
+        // Last-Event-ID при перепідключенні браузер надсилає сам; since — лише для першого з'єднання
+        const since = this.logCursor != null ? `?since=${this.logCursor}` : '';
+        const source = new EventSource(`${this.apiBase}/logs/stream${since}`);
+        this.eventSource = source;
+
+        source.onopen = () => {
+            this.streamConnected = true;
+            this.streamFailures = 0;
+        };
+        source.onmessage = (event) => {
+            if (event.lastEventId) {
+                this.logCursor = Number(event.lastEventId);
+            }
+            if (!event.data) return;
+            try {
+                this.displayLogs([JSON.parse(event.data)], true);
+            } catch (_) { /* no-op */ }
+        };
+        source.addEventListener('gap', () => {
+            // Клієнт відстав або буфер сервера перезаписано — частину записів пропущено
+            this.addLog('Some log entries were skipped (stream fell behind)', 'warn', 'logger');
+        });
+        source.onerror = () => {
+            this.streamConnected = false;
+            this.streamFailures++;
+            // 503 (забагато клієнтів) або постійні обриви — повертаємось до опитування /logs
+            if (source.readyState === EventSource.CLOSED || this.streamFailures >= 3) {
+                source.close();
+                this.eventSource = null;
+                setTimeout(() => this.openEventStream(), 60000);
+            }
+        };
+    }
+
     async refreshLogs() {
+        if (this.streamConnected) return;
         const now = Date.now();
         const timeSinceActivity = now - this.lastActivity;
         
@@ -111,7 +154,9 @@ class AtlasLogger {
             const controller = new AbortController();
             const timeoutId = setTimeout(() => controller.abort(), 5000); // 5 секунд timeout
             
-            const response = await fetch(`${this.apiBase}/logs?limit=100`, {
+            // Курсор seq: сервер віддає лише записи, що з'явилися після попереднього опитування
+            const since = this.logCursor != null ? `&since=${this.logCursor}` : '';
+            const response = await fetch(`${this.apiBase}/logs?limit=100${since}`, {
                 signal: controller.signal,
                 headers: {
                     'Cache-Control': 'no-cache'
@@ -123,7 +168,10 @@ class AtlasLogger {
             
             const data = await response.json();
             if (data.logs && Array.isArray(data.logs)) {
-                this.displayLogs(data.logs);
+                this.displayLogs(data.logs, data.cursor != null);
+            }
+            if (data.cursor != null) {
+                this.logCursor = data.cursor;
             }
         } catch (error) {
             // Тихо ігноруємо помилки логів, щоб не спамити консоль
@@ -131,7 +179,7 @@ class AtlasLogger {
         }
     }
     
-    displayLogs(newLogs) {
+    displayLogs(newLogs, byCursor = false) {
         // Не очищуємо контейнер! Логи повинні накопичуватися
         // Нормализуем и сортируем по времени по возрастанию, чтобы порядок был корректным
         const normalizeTime = (t) => new Date(t || Date.now()).getTime();
@@ -141,7 +189,8 @@ class AtlasLogger {
         for (const log of sorted) {
             const logTime = normalizeTime(log.timestamp);
             const lastTime = this.lastLogTimestamp ? normalizeTime(this.lastLogTimestamp) : -Infinity;
-            if (logTime <= lastTime) continue; // пропускаем уже показанные
+            // З курсором сервер уже відфільтрував показані; інакше відсікаємо за часом
+            if (!byCursor && logTime <= lastTime) continue; // пропускаем уже показанные
 
             const tsStr = log.timestamp || new Date().toTimeString().split(' ')[0];
             const source = log.source ? `[${log.source}]` : '';
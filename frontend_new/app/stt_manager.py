@@ -1,22 +1,150 @@
 """
 STT (Speech-to-Text) module for ATLAS frontend
 Integrates Faster-Whisper with fallback to Web Speech API
+
+The in-memory decoding (resample_audio, _decode_wav_bytes, decode_audio_bytes) and
+TranscriptionCache are mirrored in intelligent_atlas/core/audio_utils.py; keep them in sync.
 """
 
+import io
 import os
+import importlib.util
 import tempfile
 import logging
+import wave
+import time
+import hashlib
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, Union, List, Tuple
 
 try:
-    from faster_whisper import WhisperModel
-    FASTER_WHISPER_AVAILABLE = True
+    import numpy as np
 except ImportError:
-    FASTER_WHISPER_AVAILABLE = False
+    np = None
+
+# faster-whisper тягне ctranslate2/av/tokenizers — імпортуємо його у фоновому
+# завантажувачі, а тут лише перевіряємо наявність пакета
+FASTER_WHISPER_AVAILABLE = importlib.util.find_spec('faster_whisper') is not None
+WhisperModel = None
+# PyAV-based decoder shipped with faster-whisper; accepts file-like objects
+_fw_decode_audio = None
+
+from vad import speech_bounds
 
 logger = logging.getLogger(__name__)
 
+# Whisper очікує моно float32 на 16 кГц
+WHISPER_SAMPLE_RATE = 16000
+# Скільки запит на транскрибацію чекає завантаження моделі перед 503
+WHISPER_READY_WAIT_SECONDS = float(os.getenv('WHISPER_READY_WAIT_SECONDS', 5))
+
+
+def resample_audio(audio: "np.ndarray", orig_sr: int, target_sr: int = WHISPER_SAMPLE_RATE) -> "np.ndarray":
+    """Передискретизує моно float32 сигнал (box-фільтр для цілих коефіцієнтів, інакше лінійна інтерполяція)."""
+    if orig_sr == target_sr or audio.size == 0:
+        return audio.astype(np.float32, copy=False)
+    if orig_sr % target_sr == 0:
+        # 48k/32k -> 16k: усереднення сусідніх відліків працює як простий anti-alias фільтр
+        factor = orig_sr // target_sr
+        usable = (audio.size // factor) * factor
+        return audio[:usable].reshape(-1, factor).mean(axis=1).astype(np.float32)
+    duration = audio.size / float(orig_sr)
+    n_out = max(1, int(round(duration * target_sr)))
+    x_old = np.linspace(0.0, duration, num=audio.size, endpoint=False)
+    x_new = np.linspace(0.0, duration, num=n_out, endpoint=False)
+    return np.interp(x_new, x_old, audio).astype(np.float32)
+
+
+def _decode_wav_bytes(data: bytes) -> Optional["np.ndarray"]:
+    """Декодує PCM WAV стандартною бібліотекою без ffmpeg. None, якщо формат не PCM."""
+    try:
+        with wave.open(io.BytesIO(data), 'rb') as wf:
+            channels = wf.getnchannels()
+            width = wf.getsampwidth()
+            sr = wf.getframerate()
+            frames = wf.readframes(wf.getnframes())
+    except (wave.Error, EOFError):
+        return None
+
+    if width == 2:
+        audio = np.frombuffer(frames, dtype='<i2').astype(np.float32) / 32768.0
+    elif width == 4:
+        audio = np.frombuffer(frames, dtype='<i4').astype(np.float32) / 2147483648.0
+    elif width == 1:
+        audio = (np.frombuffer(frames, dtype=np.uint8).astype(np.float32) - 128.0) / 128.0
+    elif width == 3:
+        raw = np.frombuffer(frames, dtype=np.uint8).reshape(-1, 3)
+        ints = (raw[:, 0].astype(np.int32) | (raw[:, 1].astype(np.int32) << 8) | (raw[:, 2].astype(np.int32) << 16))
+        ints = np.where(ints >= 1 << 23, ints - (1 << 24), ints)
+        audio = ints.astype(np.float32) / 8388608.0
+    else:
+        return None
+
+    if channels > 1:
+        audio = audio[: (audio.size // channels) * channels].reshape(-1, channels).mean(axis=1)
+    return resample_audio(audio, sr)
+
+
+def decode_audio_bytes(data: bytes, extension: str = 'wav') -> Optional["np.ndarray"]:
+    """
+    Декодує аудіо з пам'яті у float32 numpy масив 16 кГц.
+
+    WAV розбирається напряму; інші контейнери (webm/ogg/mp3/...) декодуються
+    через PyAV з BytesIO. Повертає None, якщо декодувати в пам'яті не вдалося —
+    тоді виклик має перейти на тимчасовий файл.
+    """
+    if np is None or not data:
+        return None
+    ext = (extension or '').lower().lstrip('.')
+    if ext == 'wav':
+        audio = _decode_wav_bytes(data)
+        if audio is not None:
+            return audio
+    if _fw_decode_audio is None:
+        return None
+    try:
+        return _fw_decode_audio(io.BytesIO(data), sampling_rate=WHISPER_SAMPLE_RATE)
+    except Exception as e:
+        logger.debug(f"In-memory decode failed for .{ext}: {e}")
+        return None
+
+
+class TranscriptionCache:
+    """Невеликий LRU кеш результатів, ключ — хеш аудіо + параметри декодування."""
+
+    def __init__(self, maxsize: int = 128):
+        self.maxsize = maxsize
+        self._items: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_key(data: bytes, language: Optional[str], beam_size: int, temperature: float) -> str:
+        digest = hashlib.sha256(data).hexdigest()
+        return f"{digest}|{language}|{beam_size}|{temperature}"
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            item = self._items.get(key)
+            if item is not None:
+                self._items.move_to_end(key)
+            return item
+
+    def put(self, key: str, result: Dict[str, Any]):
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._items[key] = result
+            self._items.move_to_end(key)
+            while len(self._items) > self.maxsize:
+                self._items.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+
 class STTManager:
     """Manages speech-to-text functionality with Whisper and Web Speech API fallback."""
     
@@ -39,32 +167,87 @@ class STTManager:
         else:
             self.compute_type = 'float16' if self.device == 'cuda' else 'int8'
         self.temp_dir = os.getenv('WHISPER_TEMP_DIR', tempfile.gettempdir())
+        # Паралельні виклики transcribe() з різних потоків (пакетна обробка, стрімінг)
+        self.num_workers = max(1, int(os.getenv('WHISPER_NUM_WORKERS', 2)))
+        self.cpu_threads = max(0, int(os.getenv('WHISPER_CPU_THREADS', 0)))
+        self._batch_executor = None
+        # Препроцесинг: обрізка тиші VAD та кеш результатів за хешем аудіо
+        self.vad_trim = os.getenv('STT_VAD_TRIM', '1').lower() not in ('0', 'false', 'no')
+        self.result_cache = TranscriptionCache(int(os.getenv('STT_CACHE_SIZE', 128)))
+        self._stats_lock = threading.Lock()
+        self.preprocess_stats = {
+            'cache_hits': 0,
+            'cache_misses': 0,
+            'silent_skipped': 0,
+            'audio_seconds_in': 0.0,
+            'audio_seconds_trimmed': 0.0
+        }
 
         # Підтримувані формати
         self.allowed_extensions = {
             'wav', 'mp3', 'mp4', 'm4a', 'aac', 'ogg', 'flac', 'webm', 'opus'
         }
 
-        self._init_whisper()
-    
+        # Модель вантажиться у фоновому потоці, щоб імпорт модуля не блокував старт сервера.
+        # Стан: idle → loading → ready | failed; unavailable — faster-whisper не встановлено
+        self.load_state = 'idle'
+        self.load_error = None
+        self.load_seconds = None
+        self._load_lock = threading.Lock()
+        self._load_thread = None
+        self._ready = threading.Event()
+
+    def start_loading(self) -> str:
+        """Запускає фонове завантаження моделі (ідемпотентно); повертає поточний стан."""
+        with self._load_lock:
+            if self.load_state != 'idle':
+                return self.load_state
+            if not FASTER_WHISPER_AVAILABLE:
+                logger.warning("faster-whisper не доступний. STT працюватиме тільки через Web Speech API.")
+                self.load_state = 'unavailable'
+                self._ready.set()
+                return self.load_state
+            self.load_state = 'loading'
+            self._load_thread = threading.Thread(target=self._init_whisper, name='whisper-loader', daemon=True)
+            self._load_thread.start()
+            return self.load_state
+
     def _init_whisper(self) -> bool:
-        """Ініціалізує модель Whisper."""
-        if not FASTER_WHISPER_AVAILABLE:
-            logger.warning("faster-whisper не доступний. STT працюватиме тільки через Web Speech API.")
-            return False
-        
+        """Ініціалізує модель Whisper (виконується у фоновому потоці)."""
+        global WhisperModel, _fw_decode_audio
+        started = time.monotonic()
         try:
+            from faster_whisper import WhisperModel
+            try:
+                from faster_whisper.audio import decode_audio as _fw_decode_audio
+            except ImportError:
+                _fw_decode_audio = None
+
             logger.info(f"Завантажую Whisper модель: {self.model_size} на {self.device} (compute_type={self.compute_type})")
             self.whisper_model = WhisperModel(
                 self.model_size, 
                 device=self.device,
-                compute_type=self.compute_type
+                compute_type=self.compute_type,
+                cpu_threads=self.cpu_threads,
+                num_workers=self.num_workers
             )
-            logger.info("✅ Whisper модель успішно завантажена")
+            self.load_state = 'ready'
+            logger.info(f"✅ Whisper модель успішно завантажена за {time.monotonic() - started:.1f}s")
             return True
         except Exception as e:
+            self.load_error = str(e)
+            self.load_state = 'failed'
             logger.error(f"❌ Помилка завантаження Whisper: {e}")
             return False
+        finally:
+            self.load_seconds = round(time.monotonic() - started, 2)
+            self._ready.set()
+
+    def wait_ready(self, timeout: Optional[float] = None) -> bool:
+        """Чекає завантаження моделі не довше timeout секунд; True, якщо модель готова."""
+        self.start_loading()
+        self._ready.wait(WHISPER_READY_WAIT_SECONDS if timeout is None else timeout)
+        return self.is_whisper_available()
     
     def is_whisper_available(self) -> bool:
         """Перевіряє, чи доступна модель Whisper."""
@@ -92,15 +275,210 @@ class STTManager:
         Returns:
             Dict з результатом транскрибації
         """
+        logger.info(f"Транскрибую файл: {file_path}")
+        try:
+            with open(file_path, 'rb') as f:
+                data = f.read()
+        except OSError as e:
+            return {'success': False, 'error': str(e), 'source': 'whisper'}
+        ext = file_path.rsplit('.', 1)[1].lower() if '.' in file_path else 'wav'
+        return self._transcribe_source(data, ext, language, beam_size, temperature, file_path=file_path)
+
+    def transcribe_bytes(self,
+                         data: bytes,
+                         filename: str,
+                         language: Optional[str] = None,
+                         beam_size: int = 5,
+                         temperature: float = 0.0) -> Dict[str, Any]:
+        """
+        Транскрибує аудіо, завантажене в пам'ять, без запису на диск.
+
+        Байти декодуються у float32 масив 16 кГц і передаються моделі напряму.
+        Тимчасовий файл використовується лише для форматів, які не вдалося
+        декодувати в пам'яті (потрібен зовнішній ffmpeg).
+        """
+        ext = filename.rsplit('.', 1)[1].lower() if '.' in filename else 'wav'
+        logger.info(f"Транскрибую з пам'яті: {filename} ({len(data)} bytes)")
+        return self._transcribe_source(data, ext, language, beam_size, temperature)
+
+    def _transcribe_source(self,
+                           data: bytes,
+                           ext: str,
+                           language: Optional[str],
+                           beam_size: int,
+                           temperature: float,
+                           file_path: Optional[str] = None) -> Dict[str, Any]:
+        """Спільний шлях: кеш за хешем → декодування в пам'яті → обрізка тиші → модель."""
+        key = TranscriptionCache.make_key(data, language, beam_size, temperature)
+        cached = self.result_cache.get(key)
+        if cached is not None:
+            self._update_preprocess_stats(cache_hit=True)
+            logger.info("✅ Результат транскрибації взято з кешу")
+            return {**cached, 'cached': True}
+        self._update_preprocess_stats(cache_hit=False)
+
+        started = time.monotonic()
+        audio = decode_audio_bytes(data, ext)
+        decode_ms = round((time.monotonic() - started) * 1000, 1)
+
+        if audio is not None:
+            result = self._transcribe_trimmed(audio, language, beam_size, temperature)
+        elif file_path:
+            result = self._transcribe(file_path, language, beam_size, temperature)
+        else:
+            logger.info(f"Декодування в пам'яті недоступне для .{ext}, використовую тимчасовий файл")
+            temp_file = tempfile.NamedTemporaryFile(suffix=f".{ext}", dir=self.temp_dir, delete=False)
+            try:
+                with temp_file:
+                    temp_file.write(data)
+                result = self._transcribe(temp_file.name, language, beam_size, temperature)
+            finally:
+                try:
+                    os.unlink(temp_file.name)
+                except OSError:
+                    pass
+
+        result.setdefault('preprocess', {})['decode_ms'] = decode_ms
+        if result.get('success'):
+            self.result_cache.put(key, result)
+        return result
+
+    def _transcribe_trimmed(self,
+                            audio: "np.ndarray",
+                            language: Optional[str],
+                            beam_size: int,
+                            temperature: float) -> Dict[str, Any]:
+        """Обрізає тишу на краях (VAD) і пропускає повністю тихі кліпи без виклику моделі."""
+        duration = audio.size / WHISPER_SAMPLE_RATE
+        bounds = speech_bounds(audio, WHISPER_SAMPLE_RATE) if self.vad_trim else (0, audio.size)
+
+        if bounds is None:
+            self._update_preprocess_stats(audio_in=duration, trimmed=duration, silent=True)
+            logger.info(f"Тиша ({duration:.2f}s) — модель не викликається")
+            return {
+                'success': True,
+                'text': '',
+                'language': language,
+                'language_probability': 0.0,
+                'duration': duration,
+                'segments': [],
+                'source': 'whisper',
+                'preprocess': {'trimmed_seconds': round(duration, 3), 'silent': True}
+            }
+
+        start, end = bounds
+        trimmed_seconds = duration - (end - start) / WHISPER_SAMPLE_RATE
+        self._update_preprocess_stats(audio_in=duration, trimmed=trimmed_seconds)
+        result = self._transcribe(audio[start:end], language, beam_size, temperature,
+                                  offset=start / WHISPER_SAMPLE_RATE)
+        if result.get('success'):
+            result['duration'] = duration
+            result['preprocess'] = {'trimmed_seconds': round(trimmed_seconds, 3), 'silent': False}
+        return result
+
+    def _update_preprocess_stats(self,
+                                 cache_hit: Optional[bool] = None,
+                                 audio_in: float = 0.0,
+                                 trimmed: float = 0.0,
+                                 silent: bool = False):
+        with self._stats_lock:
+            stats = self.preprocess_stats
+            if cache_hit is True:
+                stats['cache_hits'] += 1
+            elif cache_hit is False:
+                stats['cache_misses'] += 1
+            if silent:
+                stats['silent_skipped'] += 1
+            stats['audio_seconds_in'] += audio_in
+            stats['audio_seconds_trimmed'] += trimmed
+
+    def transcribe_batch(self,
+                         items: List[Tuple[bytes, str]],
+                         language: Optional[str] = None,
+                         beam_size: int = 5,
+                         temperature: float = 0.0) -> Dict[str, Any]:
+        """
+        Транскрибує кілька аудіо за один виклик.
+
+        Елементи декодуються в пам'яті та розподіляються між num_workers
+        потоками; CTranslate2 виконує їх паралельно на окремих воркерах моделі.
+        Результати повертаються у вхідному порядку з часом кожного елемента.
+
+        Args:
+            items: Список пар (байти, ім'я файлу)
+        """
+        if not self.is_whisper_available():
+            raise ValueError("Whisper модель недоступна")
+        if self._batch_executor is None:
+            self._batch_executor = ThreadPoolExecutor(max_workers=self.num_workers,
+                                                      thread_name_prefix='stt-batch')
+
+        batch_started = time.monotonic()
+
+        def run_item(index: int, data: bytes, filename: str) -> Dict[str, Any]:
+            started = time.monotonic()
+            queue_ms = (started - batch_started) * 1000
+            if not self.allowed_file(filename):
+                return {'index': index, 'filename': filename, 'success': False,
+                        'error': 'Unsupported file format', 'timing': {'queue_ms': round(queue_ms, 1)}}
+            ext = filename.rsplit('.', 1)[1].lower()
+            result = dict(self._transcribe_source(data, ext, language, beam_size, temperature))
+            finished = time.monotonic()
+            decode_ms = result.get('preprocess', {}).get('decode_ms', 0.0)
+            total_ms = (finished - started) * 1000
+            result.update({
+                'index': index,
+                'filename': filename,
+                'timing': {
+                    'queue_ms': round(queue_ms, 1),
+                    'decode_ms': decode_ms,
+                    'transcribe_ms': round(max(0.0, total_ms - decode_ms), 1),
+                    'total_ms': round(total_ms, 1)
+                }
+            })
+            return result
+
+        futures = [self._batch_executor.submit(run_item, i, data, name)
+                   for i, (data, name) in enumerate(items)]
+        results = [f.result() for f in futures]
+
+        elapsed = time.monotonic() - batch_started
+        audio_seconds = sum(r.get('duration') or 0.0 for r in results if r.get('success'))
+        logger.info(f"✅ Пакетна транскрибація: {len(results)} файлів, {audio_seconds:.1f}s аудіо за {elapsed:.2f}s")
+        return {
+            'success': all(r.get('success') for r in results),
+            'results': results,
+            'count': len(results),
+            'elapsed_ms': round(elapsed * 1000, 1),
+            'audio_seconds': round(audio_seconds, 3),
+            'workers': self.num_workers
+        }
+
+    def transcribe_array(self,
+                         audio: "np.ndarray",
+                         language: Optional[str] = None,
+                         beam_size: int = 5,
+                         temperature: float = 0.0) -> Dict[str, Any]:
+        """Транскрибує вже декодований моно float32 сигнал 16 кГц (стрімінг, пакети)."""
+        return self._transcribe(audio, language, beam_size, temperature)
+
+    def _transcribe(self,
+                    audio: Union[str, "np.ndarray"],
+                    language: Optional[str],
+                    beam_size: int,
+                    temperature: float,
+                    offset: float = 0.0) -> Dict[str, Any]:
+        """Запускає модель на шляху до файлу або вже декодованому масиві.
+
+        offset (с) додається до часових міток сегментів, якщо аудіо було обрізане.
+        """
         if not self.is_whisper_available():
             raise ValueError("Whisper модель недоступна")
         
         try:
-            logger.info(f"Транскрибую файл: {file_path}")
-            
             # Виконуємо транскрибацію
             segments, info = self.whisper_model.transcribe(
-                file_path,
+                audio,
                 beam_size=beam_size,
                 temperature=temperature,
                 language=language
@@ -112,8 +490,8 @@ class STTManager:
             
             for segment in segments:
                 text_segments.append({
-                    'start': segment.start,
-                    'end': segment.end,
+                    'start': segment.start + offset,
+                    'end': segment.end + offset,
                     'text': segment.text
                 })
                 full_text += segment.text
@@ -143,13 +521,30 @@ class STTManager:
     def get_status(self) -> Dict[str, Any]:
         """Повертає статус STT системи."""
         return {
+            'state': self.load_state,
+            'load_error': self.load_error,
+            'load_seconds': self.load_seconds,
             'whisper_available': self.is_whisper_available(),
             'whisper_model': self.model_size if self.is_whisper_available() else None,
             'device': self.device,
             'compute_type': getattr(self, 'compute_type', None),
+            'num_workers': self.num_workers,
             'supported_formats': list(self.allowed_extensions),
             'fallback_available': True,  # Web Speech API завжди доступний у браузері
+            'preprocessing': self.get_preprocess_stats(),
         }
 
-# Глобальний instance STT менеджера
+    def get_preprocess_stats(self) -> Dict[str, Any]:
+        """Метрики препроцесингу: кеш, пропущена тиша, частка обрізаного аудіо."""
+        with self._stats_lock:
+            stats = dict(self.preprocess_stats)
+        audio_in = stats['audio_seconds_in']
+        stats['audio_seconds_in'] = round(audio_in, 3)
+        stats['audio_seconds_trimmed'] = round(stats['audio_seconds_trimmed'], 3)
+        stats['trimmed_ratio'] = round(stats['audio_seconds_trimmed'] / audio_in, 3) if audio_in else 0.0
+        stats['vad_trim'] = self.vad_trim
+        stats['cache_size'] = len(self.result_cache)
+        return stats
+
+# Глобальний instance STT менеджера (модель вантажиться ліниво — див. start_loading)
 stt_manager = STTManager()
@@ -0,0 +1,305 @@
+"""
+Streaming STT for ATLAS frontend
+WebSocket endpoint that accepts raw PCM frames, segments speech with VAD and
+returns incremental (partial) and final Whisper transcripts.
+
+Protocol (ws://<host>:STT_STREAM_PORT/):
+  client -> {"type": "start", "sample_rate": 16000, "language": "uk"}   (optional; sample_rate from STT_STREAM_SAMPLE_RATES)
+  client -> binary frames: PCM16 little-endian mono at sample_rate
+  client -> {"type": "stop"}   flush the current segment, wait for pending finals and close
+  server -> {"type": "ready"} | {"type": "speech_start", "segment": n}
+          | {"type": "partial", "segment": n, "text": ..., "interruption": bool}
+          | {"type": "interrupt", "segment": n, "text": ...}
+          | {"type": "final", "segment": n, "text": ..., "start": s, "end": s}
+          | {"type": "error", "error": ...}
+"""
+
+import asyncio
+import json
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Dict, Any
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+try:
+    import websockets
+except ImportError:
+    websockets = None
+
+from stt_manager import stt_manager, resample_audio, WHISPER_SAMPLE_RATE
+from vad import EnergyVAD
+
+logger = logging.getLogger('atlas.stt_stream')
+
+STT_STREAM_HOST = os.environ.get('STT_STREAM_HOST', '0.0.0.0')
+STT_STREAM_PORT = int(os.environ.get('STT_STREAM_PORT', 5003))
+# How often a growing segment is re-transcribed for partial results
+PARTIAL_INTERVAL_SEC = float(os.environ.get('STT_PARTIAL_INTERVAL', 0.6))
+# Segments are force-finalized after this much speech
+MAX_SEGMENT_SEC = float(os.environ.get('STT_MAX_SEGMENT_SEC', 15.0))
+PREROLL_SEC = 0.3
+# Input rates accepted in "start": integer multiples of 16 kHz are box-filtered down, the rest interpolated
+STT_STREAM_SAMPLE_RATES = (8000, 16000, 22050, 24000, 32000, 44100, 48000)
+
+INTERRUPT_KEYWORDS = (
+    'стоп', 'stop', 'чекай', 'wait', 'припини', 'pause',
+    'наказую', 'command', 'я наказую', 'слухайте'
+)
+
+_executor = ThreadPoolExecutor(max_workers=int(os.environ.get('STT_STREAM_WORKERS', 2)),
+                               thread_name_prefix='stt-stream')
+_server_thread: Optional[threading.Thread] = None
+
+
+def detect_interruption(transcript: str) -> bool:
+    """Return True if the (partial) transcript contains a barge-in keyword."""
+    text = (transcript or '').lower()
+    return any(keyword in text for keyword in INTERRUPT_KEYWORDS)
+
+
+class StreamingSession:
+    """Per-connection state: VAD, current segment buffer and in-flight transcriptions."""
+
+    def __init__(self, websocket, sample_rate: int = WHISPER_SAMPLE_RATE, language: Optional[str] = 'uk'):
+        self.ws = websocket
+        self.sample_rate = sample_rate
+        self.language = language
+        self.vad = EnergyVAD(sample_rate=WHISPER_SAMPLE_RATE)
+        self.pending = np.zeros(0, dtype=np.float32)  # samples not yet framed
+        self.preroll = np.zeros(0, dtype=np.float32)
+        self.segment_chunks = []
+        self.segment_samples = 0
+        self.segment_index = 0
+        self.finalized_index = 0
+        self.segment_started_at = 0.0  # stream time (s) of segment start
+        self.stream_samples = 0
+        self.samples_at_last_partial = 0
+        self.partial_task: Optional[asyncio.Task] = None
+        # Останній фінал у польоті: фінали декодуються поза циклом прийому, але надсилаються по черзі
+        self.final_task: Optional[asyncio.Task] = None
+        self.interrupt_sent = False
+
+    async def send(self, payload: Dict[str, Any]):
+        await self.ws.send(json.dumps(payload, ensure_ascii=False))
+
+    def configure(self, msg: Dict[str, Any]):
+        """Applies a "start" message; raises ValueError for an unsupported sample_rate."""
+        if msg.get('sample_rate') is not None:
+            try:
+                rate = int(msg['sample_rate'])
+            except (TypeError, ValueError):
+                rate = None
+            if rate not in STT_STREAM_SAMPLE_RATES:
+                raise ValueError(f"Unsupported sample_rate {msg['sample_rate']!r}; "
+                                 f"expected one of {list(STT_STREAM_SAMPLE_RATES)}")
+            self.sample_rate = rate
+        if 'language' in msg:
+            self.language = msg.get('language') or None
+
+    async def feed_pcm(self, data: bytes):
+        samples = np.frombuffer(data[: len(data) - (len(data) % 2)], dtype='<i2').astype(np.float32) / 32768.0
+        if self.sample_rate != WHISPER_SAMPLE_RATE:
+            samples = resample_audio(samples, self.sample_rate)
+        self.pending = np.concatenate([self.pending, samples])
+
+        frame_size = self.vad.frame_size
+        n_frames = self.pending.size // frame_size
+        for i in range(n_frames):
+            frame = self.pending[i * frame_size:(i + 1) * frame_size]
+            await self._on_frame(frame)
+        self.pending = self.pending[n_frames * frame_size:]
+
+    async def _on_frame(self, frame: "np.ndarray"):
+        event = self.vad.process(frame)
+        self.stream_samples += frame.size
+
+        if event == 'start':
+            self.segment_index += 1
+            self.segment_chunks = [self.preroll]
+            self.segment_samples = self.preroll.size
+            self.segment_started_at = max(0.0, (self.stream_samples - self.segment_samples - frame.size) / WHISPER_SAMPLE_RATE)
+            self.samples_at_last_partial = 0
+            self.interrupt_sent = False
+            await self.send({'type': 'speech_start', 'segment': self.segment_index})
+
+        if self.vad.in_speech or event == 'end':
+            self.segment_chunks.append(frame)
+            self.segment_samples += frame.size
+            if event == 'end' or self.segment_samples >= MAX_SEGMENT_SEC * WHISPER_SAMPLE_RATE:
+                await self.finalize_segment()
+            elif self.segment_samples - self.samples_at_last_partial >= PARTIAL_INTERVAL_SEC * WHISPER_SAMPLE_RATE:
+                self._schedule_partial()
+        else:
+            # Keep a short pre-roll so the first phoneme is not clipped by VAD onset delay
+            keep = int(PREROLL_SEC * WHISPER_SAMPLE_RATE)
+            self.preroll = np.concatenate([self.preroll, frame])[-keep:]
+
+    def _segment_audio(self) -> "np.ndarray":
+        return np.concatenate(self.segment_chunks) if self.segment_chunks else np.zeros(0, dtype=np.float32)
+
+    def _schedule_partial(self):
+        # Only one partial in flight per session; skip while the previous one is running
+        if self.partial_task and not self.partial_task.done():
+            return
+        self.samples_at_last_partial = self.segment_samples
+        self.partial_task = asyncio.ensure_future(self._run_partial(self.segment_index, self._segment_audio()))
+
+    async def _run_partial(self, segment: int, audio: "np.ndarray"):
+        started = time.monotonic()
+        # Greedy decoding keeps partial latency low; finals use beam search
+        result = await _transcribe(audio, self.language, beam_size=1)
+        if segment != self.segment_index or segment <= self.finalized_index or not result.get('success'):
+            return
+        text = result.get('text', '')
+        interruption = detect_interruption(text)
+        await self.send({
+            'type': 'partial',
+            'segment': segment,
+            'text': text,
+            'interruption': interruption,
+            'latency_ms': int((time.monotonic() - started) * 1000)
+        })
+        if interruption and not self.interrupt_sent:
+            self.interrupt_sent = True
+            await self.send({'type': 'interrupt', 'segment': segment, 'text': text})
+
+    async def finalize_segment(self):
+        """Closes the current segment; its final transcript is decoded in the background.
+
+        The receive loop keeps reading frames and control messages while Whisper runs.
+        """
+        if not self.segment_chunks or self.segment_samples == 0:
+            return
+        segment = self.segment_index
+        self.finalized_index = segment
+        audio = self._segment_audio()
+        start = self.segment_started_at
+        self.segment_chunks = []
+        self.segment_samples = 0
+        self.preroll = np.zeros(0, dtype=np.float32)
+        self.vad.in_speech = False
+        self.final_task = asyncio.ensure_future(self._run_final(segment, audio, start, self.final_task))
+
+    async def _run_final(self, segment: int, audio: "np.ndarray", start: float, previous: Optional[asyncio.Task]):
+        started = time.monotonic()
+        result = await _transcribe(audio, self.language, beam_size=5)
+        if previous is not None:
+            # Фінали йдуть клієнту в порядку сегментів, навіть якщо цей декодувався швидше
+            await asyncio.gather(previous, return_exceptions=True)
+        if not result.get('success'):
+            await self.send({'type': 'error', 'segment': segment, 'error': result.get('error', 'transcription failed')})
+            return
+        text = result.get('text', '')
+        await self.send({
+            'type': 'final',
+            'segment': segment,
+            'text': text,
+            'language': result.get('language'),
+            'interruption': detect_interruption(text),
+            'start': round(start, 3),
+            'end': round(start + audio.size / WHISPER_SAMPLE_RATE, 3),
+            'latency_ms': int((time.monotonic() - started) * 1000)
+        })
+
+    async def drain(self):
+        """Waits until every final transcript has been sent."""
+        if self.final_task is not None:
+            await asyncio.gather(self.final_task, return_exceptions=True)
+
+    def cancel(self):
+        for task in (self.partial_task, self.final_task):
+            if task and not task.done():
+                task.cancel()
+
+
+async def _transcribe(audio: "np.ndarray", language: Optional[str], beam_size: int) -> Dict[str, Any]:
+    loop = asyncio.get_running_loop()
+    try:
+        return await loop.run_in_executor(
+            _executor, lambda: stt_manager.transcribe_array(audio, language=language, beam_size=beam_size))
+    except Exception as e:
+        logger.error(f"Streaming transcription failed: {e}")
+        return {'success': False, 'error': str(e)}
+
+
+async def _handle_connection(websocket, path=None):
+    # Bounded wait for the background model load (see STTManager.start_loading)
+    ready = await asyncio.get_running_loop().run_in_executor(None, stt_manager.wait_ready)
+    if not ready:
+        await websocket.send(json.dumps({'type': 'error', 'state': stt_manager.load_state,
+                                         'error': stt_manager.load_error or 'Whisper not available'}))
+        await websocket.close()
+        return
+
+    session = StreamingSession(websocket)
+    await session.send({'type': 'ready', 'sample_rate': WHISPER_SAMPLE_RATE, 'frame_ms': session.vad.frame_ms})
+    try:
+        async for message in websocket:
+            if isinstance(message, (bytes, bytearray)):
+                await session.feed_pcm(bytes(message))
+                continue
+            try:
+                msg = json.loads(message)
+            except ValueError:
+                continue
+            msg_type = msg.get('type')
+            if msg_type == 'start':
+                try:
+                    session.configure(msg)
+                except ValueError as e:
+                    await session.send({'type': 'error', 'error': str(e)})
+            elif msg_type == 'stop':
+                await session.finalize_segment()
+                await session.drain()
+                break
+    except Exception as e:
+        if not websockets or not isinstance(e, websockets.exceptions.ConnectionClosed):
+            logger.warning(f"STT stream session error: {e}")
+    finally:
+        session.cancel()
+
+
+def start_stt_stream_server(host: str = STT_STREAM_HOST, port: int = STT_STREAM_PORT) -> bool:
+    """Start the WebSocket STT server on a background event loop thread."""
+    global _server_thread
+    if websockets is None or np is None:
+        logger.warning("websockets/numpy not available - streaming STT disabled")
+        return False
+    if _server_thread and _server_thread.is_alive():
+        return True
+
+    def _run():
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+
+        async def _serve():
+            return await websockets.serve(_handle_connection, host, port, max_size=2 ** 20)
+
+        try:
+            loop.run_until_complete(_serve())
+            logger.info(f"Streaming STT WebSocket listening on ws://{host}:{port}")
+            loop.run_forever()
+        except Exception as e:
+            logger.error(f"Streaming STT server failed: {e}")
+
+    _server_thread = threading.Thread(target=_run, name='stt-stream-server', daemon=True)
+    _server_thread.start()
+    return True
+
+
+def get_stream_info() -> Dict[str, Any]:
+    return {
+        'available': bool(_server_thread and _server_thread.is_alive()),
+        'port': STT_STREAM_PORT,
+        'sample_rate': WHISPER_SAMPLE_RATE,
+        'sample_rates': list(STT_STREAM_SAMPLE_RATES),
+        'encoding': 'pcm_s16le',
+        'partial_interval_sec': PARTIAL_INTERVAL_SEC
+    }
@@ -0,0 +1,199 @@
+#!/usr/bin/env python3
+"""
+Навчання локальної моделі намірів (intent_model) на парах (text, intent), розмічених LLM
+
+Дані — JSONL, який intent_router дописує при кожній відповіді LLM (якщо задано INTENT_LABEL_LOG;
+ротована копія .1 теж підходить), або будь-які файли з полями text/intent. У лог потрапляють лише
+повідомлення, що дійшли до LLM: впевнені прогнози моделі не логуються, тож при перенавчанні
+варто зберігати попередні дані або додавати розмічені вибірки. Скрипт:
+  * відкладає --holdout частку як тест і навчає softmax-регресію на хешованих n-грамах;
+  * звітує точність проти міток LLM (загалом, по класах, та на впевнених прогнозах
+    при --threshold — саме ці відповіді не підуть до LLM), поруч — евристика intent_router;
+  * міряє латентність predict (p50/p99, мс);
+  * перенавчає на всіх даних і зберігає .npz артефакт (звіт кладеться в meta).
+
+Приклади:
+  python train_intent_model.py
+  python train_intent_model.py --data ../logs/intent_labels.jsonl extra.jsonl --threshold 0.9 --report report.json
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import argparse
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from intent_model import (IntentModel, features, normalize, INTENT_LABEL_LOG, INTENT_MODEL_PATH,
+                          INTENT_MODEL_THRESHOLD, DEFAULT_DIM, DEFAULT_NGRAMS)
+from intent_router import _heuristic_intent
+
+
+def load_pairs(paths):
+    """Унікальні (text, intent); для повторів тексту перемагає остання мітка"""
+    by_text = {}
+    for path in paths:
+        with open(path, encoding='utf-8') as f:
+            for line in f:
+                try:
+                    row = json.loads(line)
+                except ValueError:
+                    continue
+                text, intent = row.get('text'), row.get('intent')
+                if text and intent and row.get('source', 'llm') == 'llm':
+                    by_text[normalize(text)] = (text, str(intent))
+    return list(by_text.values())
+
+
+def train(pairs, dim, ngrams, epochs, lr, l2, seed):
+    labels = sorted({intent for _, intent in pairs})
+    index = {label: k for k, label in enumerate(labels)}
+    xs = [np.array(features(text, dim, ngrams), dtype=np.int64) for text, _ in pairs]
+    ys = [index[intent] for _, intent in pairs]
+    weights = np.zeros((len(labels), dim), dtype=np.float32)
+    bias = np.zeros(len(labels), dtype=np.float32)
+
+    rng = random.Random(seed)
+    order = list(range(len(pairs)))
+    for epoch in range(epochs):
+        rng.shuffle(order)
+        step = lr / (1.0 + epoch * 0.5)
+        for i in order:
+            idx = xs[i]
+            if idx.size == 0:
+                continue
+            scale = 1.0 / np.sqrt(idx.size)
+            z = weights[:, idx].sum(axis=1) * scale + bias
+            z -= z.max()
+            p = np.exp(z)
+            p /= p.sum()
+            p[ys[i]] -= 1.0  # градієнт крос-ентропії по логітах
+            # Weight decay лише на задіяних ознаках (розріджене оновлення)
+            weights[:, idx] -= step * (p[:, None] * scale + l2 * weights[:, idx])
+            bias -= step * p
+    return IntentModel(weights, bias, labels, dim, ngrams)
+
+
+def evaluate(model, pairs, threshold):
+    correct = covered = covered_correct = heuristic_correct = 0
+    per_class = {label: {'tp': 0, 'fp': 0, 'fn': 0} for label in model.labels}
+    for text, intent in pairs:
+        label, confidence = model.predict(text)
+        correct += label == intent
+        heuristic_correct += _heuristic_intent(text) == intent
+        if confidence >= threshold:
+            covered += 1
+            covered_correct += label == intent
+        if label == intent:
+            per_class[label]['tp'] += 1
+        else:
+            if label in per_class:
+                per_class[label]['fp'] += 1
+            if intent in per_class:
+                per_class[intent]['fn'] += 1
+    n = max(1, len(pairs))
+    classes = {}
+    for label, c in per_class.items():
+        precision = c['tp'] / max(1, c['tp'] + c['fp'])
+        recall = c['tp'] / max(1, c['tp'] + c['fn'])
+        classes[label] = {'precision': round(precision, 4), 'recall': round(recall, 4)}
+    return {
+        'samples': len(pairs),
+        'accuracy': round(correct / n, 4),
+        'heuristic_accuracy': round(heuristic_correct / n, 4),
+        'threshold': threshold,
+        # Частка повідомлень, які обробить локальна модель без LLM, і її точність на них
+        'coverage': round(covered / n, 4),
+        'covered_accuracy': round(covered_correct / max(1, covered), 4),
+        'classes': classes
+    }
+
+
+def measure_latency(model, texts, rounds=5):
+    timings = []
+    for _ in range(rounds):
+        for text in texts:
+            started = time.perf_counter()
+            model.predict(text)
+            timings.append((time.perf_counter() - started) * 1000.0)
+    timings.sort()
+    n = len(timings)
+    return {
+        'calls': n,
+        'p50_ms': round(timings[n // 2], 4) if n else None,
+        'p99_ms': round(timings[min(n - 1, int(n * 0.99))], 4) if n else None,
+        'max_ms': round(timings[-1], 4) if n else None
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Train the local char n-gram intent model")
+    default_data = INTENT_LABEL_LOG or os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'logs',
+                                                    'intent_labels.jsonl')
+    parser.add_argument("--data", nargs="+", default=[default_data], help="JSONL files with text/intent")
+    parser.add_argument("--out", default=INTENT_MODEL_PATH, help="Output .npz artifact")
+    parser.add_argument("--dim", type=int, default=DEFAULT_DIM, help="Hashed feature space size")
+    parser.add_argument("--ngram-min", type=int, default=DEFAULT_NGRAMS[0])
+    parser.add_argument("--ngram-max", type=int, default=DEFAULT_NGRAMS[1])
+    parser.add_argument("--epochs", type=int, default=15)
+    parser.add_argument("--lr", type=float, default=0.5)
+    parser.add_argument("--l2", type=float, default=1e-4)
+    parser.add_argument("--holdout", type=float, default=0.2, help="Test share for the report")
+    parser.add_argument("--threshold", type=float, default=INTENT_MODEL_THRESHOLD,
+                        help="Confidence above which the LLM is skipped")
+    parser.add_argument("--seed", type=int, default=13)
+    parser.add_argument("--report", default=None, help="Write the report to JSON file")
+    parser.add_argument("--dry-run", action="store_true", help="Report only, do not save the model")
+    args = parser.parse_args()
+
+    pairs = load_pairs(args.data)
+    if len(pairs) < 10 or len({intent for _, intent in pairs}) < 2:
+        print(f"not enough labelled data: {len(pairs)} pairs (need >= 10 and 2 classes)")
+        return 1
+    ngrams = (args.ngram_min, args.ngram_max)
+
+    random.Random(args.seed).shuffle(pairs)
+    n_test = max(1, int(len(pairs) * args.holdout))
+    test, train_pairs = pairs[:n_test], pairs[n_test:]
+
+    started = time.time()
+    model = train(train_pairs, args.dim, ngrams, args.epochs, args.lr, args.l2, args.seed)
+    train_seconds = time.time() - started
+    report = {
+        'train_samples': len(train_pairs),
+        'train_seconds': round(train_seconds, 2),
+        'holdout': evaluate(model, test, args.threshold),
+        'latency': measure_latency(model, [text for text, _ in test]),
+        'labels': model.labels,
+        'dim': args.dim,
+        'ngrams': list(ngrams)
+    }
+
+    h = report['holdout']
+    print(f"pairs: {len(pairs)}  train: {len(train_pairs)}  holdout: {len(test)}  ({train_seconds:.1f}s)")
+    print(f"accuracy vs LLM: {h['accuracy']:.3f}   heuristic: {h['heuristic_accuracy']:.3f}")
+    print(f"threshold {args.threshold:.2f}: coverage {h['coverage']:.1%}  accuracy on covered {h['covered_accuracy']:.3f}")
+    for label, c in h['classes'].items():
+        print(f"  {label:<8} precision {c['precision']:.3f}  recall {c['recall']:.3f}")
+    lat = report['latency']
+    print(f"predict latency: p50 {lat['p50_ms']:.3f} ms  p99 {lat['p99_ms']:.3f} ms  max {lat['max_ms']:.3f} ms")
+
+    if args.report:
+        with open(args.report, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+    if not args.dry_run:
+        # Фінальна модель — на всіх даних; звіт з holdout зберігається в meta артефакту
+        final = train(pairs, args.dim, ngrams, args.epochs, args.lr, args.l2, args.seed)
+        final.meta = dict(report, trained_at=time.strftime('%Y-%m-%dT%H:%M:%S'), samples=len(pairs))
+        final.save(args.out)
+        size_kb = os.path.getsize(args.out) / 1024
+        print(f"saved {args.out} ({size_kb:.0f} KB)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
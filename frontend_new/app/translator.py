@@ -0,0 +1,268 @@
+"""
+Translator for ATLAS frontend
+Direct OpenAI-compatible translation with an LRU + sqlite cache and batched requests.
+
+Environment variables (optional):
+- TRANSLATE_LLM_BASE / TRANSLATE_LLM_MODEL / TRANSLATE_LLM_API_KEY: endpoint for translations;
+  default to the INTENT_LLM_* settings of intent_router
+- TRANSLATE_TIMEOUT: seconds per LLM call. Default: 15
+- TRANSLATE_BATCH_SIZE: strings per LLM call for batch requests. Default: 16
+- TRANSLATE_CACHE_SIZE: in-memory LRU entries. Default: 2048
+- TRANSLATE_CACHE_DB: sqlite file for the persistent cache ('' disables). Default: ../cache/translations.sqlite3
+"""
+from __future__ import annotations
+
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from intent_router import LLMClient
+
+logger = logging.getLogger(__name__)
+
+CURRENT_DIR = Path(__file__).parent
+TRANSLATE_TIMEOUT = float(os.environ.get('TRANSLATE_TIMEOUT', 15))
+TRANSLATE_BATCH_SIZE = int(os.environ.get('TRANSLATE_BATCH_SIZE', 16))
+TRANSLATE_CACHE_SIZE = int(os.environ.get('TRANSLATE_CACHE_SIZE', 2048))
+TRANSLATE_CACHE_DB = os.environ.get('TRANSLATE_CACHE_DB', str(CURRENT_DIR.parent / 'cache' / 'translations.sqlite3'))
+
+LANG_NAMES = {'uk': 'Ukrainian', 'en': 'English', 'ru': 'Russian', 'pl': 'Polish', 'de': 'German'}
+
+TRANSLATE_SYSTEM_PROMPT = (
+    "You are a translation engine. Translate the user's text {source}to {target}. "
+    "Keep meaning, tone and formatting; keep names, code, paths and numbers as is. "
+    "Output only the translation."
+)
+
+TRANSLATE_BATCH_PROMPT = (
+    "You are a translation engine. The user sends a JSON array of strings. Translate each "
+    "string {source}to {target}, keeping meaning, tone, names, code, paths and numbers. "
+    "Return ONLY a JSON array of the translated strings, same length and order."
+)
+
+_UK_LETTERS = set('іїєґІЇЄҐ')
+# Літери, яких немає в українській абетці: їх наявність означає іншу кириличну мову
+_NON_UK_LETTERS = set('ыэъёЫЭЪЁ')
+
+
+def looks_ukrainian(text: str) -> bool:
+    """Текст уже українською — перекладати не треба.
+
+    Будь-яка з і/ї/є/ґ — українська; інакше текст, де кирилиця становить більшість літер
+    і немає ы/э/ъ/ё, теж вважаємо українським (короткі фрази на кшталт «Добрий ранок»).
+    """
+    letters = cyrillic = 0
+    for ch in text:
+        if ch in _UK_LETTERS:
+            return True
+        if ch in _NON_UK_LETTERS:
+            return False
+        if ch.isalpha():
+            letters += 1
+            if '\u0400' <= ch <= '\u04ff':
+                cyrillic += 1
+    return letters > 0 and cyrillic * 2 > letters
+
+
+class _TranslationCache:
+    """LRU у пам'яті поверх sqlite: переклади переживають перезапуск сервера"""
+
+    def __init__(self, maxsize: int = TRANSLATE_CACHE_SIZE, db_path: Optional[str] = TRANSLATE_CACHE_DB):
+        self.maxsize = maxsize
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+        self._db = None
+        self.stats = {'hits': 0, 'db_hits': 0, 'misses': 0}
+        if db_path:
+            try:
+                Path(db_path).parent.mkdir(parents=True, exist_ok=True)
+                self._db = sqlite3.connect(db_path, check_same_thread=False)
+                self._db.execute(
+                    "CREATE TABLE IF NOT EXISTS translations ("
+                    "key TEXT PRIMARY KEY, source TEXT, target TEXT, text TEXT, translated TEXT, created REAL)"
+                )
+                self._db.commit()
+            except Exception as e:
+                logger.warning(f"Translation cache DB unavailable ({db_path}): {e}")
+                self._db = None
+
+    @staticmethod
+    def key(text: str, source: str, target: str) -> str:
+        return hashlib.sha1(f"{source}\x1f{target}\x1f{text}".encode('utf-8')).hexdigest()
+
+    def _remember(self, key: str, value: str):
+        self._items[key] = value
+        self._items.move_to_end(key)
+        while len(self._items) > self.maxsize:
+            self._items.popitem(last=False)
+
+    def get(self, text: str, source: str, target: str) -> Optional[str]:
+        key = self.key(text, source, target)
+        with self._lock:
+            if key in self._items:
+                self._items.move_to_end(key)
+                self.stats['hits'] += 1
+                return self._items[key]
+            if self._db is not None:
+                row = self._db.execute("SELECT translated FROM translations WHERE key = ?", (key,)).fetchone()
+                if row:
+                    self._remember(key, row[0])
+                    self.stats['db_hits'] += 1
+                    return row[0]
+            self.stats['misses'] += 1
+            return None
+
+    def put_many(self, items: List[tuple], source: str, target: str):
+        """items: [(text, translated)]; одна транзакція sqlite на пачку"""
+        now = time.time()
+        with self._lock:
+            rows = []
+            for text, translated in items:
+                key = self.key(text, source, target)
+                self._remember(key, translated)
+                rows.append((key, source, target, text, translated, now))
+            if self._db is not None and rows:
+                try:
+                    self._db.executemany("INSERT OR REPLACE INTO translations VALUES (?, ?, ?, ?, ?, ?)", rows)
+                    self._db.commit()
+                except Exception as e:
+                    logger.warning(f"Translation cache write failed: {e}")
+
+    def info(self) -> Dict[str, Any]:
+        return dict(self.stats, size=len(self._items), persistent=self._db is not None)
+
+
+class Translator:
+    """Переклад без агентної сесії Goose: один мінімальний запит до LLM, кеш і батчі"""
+
+    def __init__(self, client: Optional[LLMClient] = None, batch_size: int = TRANSLATE_BATCH_SIZE,
+                 cache: Optional[_TranslationCache] = None):
+        self.client = client or LLMClient(
+            base_url=os.environ.get('TRANSLATE_LLM_BASE') or None,
+            model=os.environ.get('TRANSLATE_LLM_MODEL') or None,
+            api_key=os.environ.get('TRANSLATE_LLM_API_KEY') or None,
+            timeout=TRANSLATE_TIMEOUT
+        )
+        self.batch_size = max(1, batch_size)
+        self.cache = cache or _TranslationCache()
+        self.stats = {'llm_calls': 0, 'batch_calls': 0, 'batch_fallbacks': 0}
+
+    def is_available(self) -> bool:
+        return self.client.is_configured()
+
+    @staticmethod
+    def _lang(code: str, with_from: bool = False) -> str:
+        if not code or code == 'auto':
+            return ''
+        name = LANG_NAMES.get(code[:2], code)
+        return f"from {name} " if with_from else name
+
+    def translate(self, text: str, source: str = 'auto', target: str = 'uk') -> Dict[str, Any]:
+        return self.translate_batch([text], source, target)[0]
+
+    def translate_batch(self, texts: List[str], source: str = 'auto', target: str = 'uk') -> List[Dict[str, Any]]:
+        """[{text, translated, cached}] у порядку texts; непереведене повертається як є (note='noop')"""
+        results: List[Optional[Dict[str, Any]]] = [None] * len(texts)
+        pending = {}
+        for i, text in enumerate(texts):
+            text = text or ''
+            if not text.strip() or (target.startswith('uk') and (source == 'uk' or looks_ukrainian(text))):
+                results[i] = {'text': text, 'detected': 'uk' if text.strip() else source, 'note': 'noop'}
+                continue
+            cached = self.cache.get(text, source, target)
+            if cached is not None:
+                results[i] = {'text': cached, 'detected': source, 'cached': True}
+            else:
+                # Однакові рядки в одному запиті перекладаються один раз
+                pending.setdefault(text, []).append(i)
+
+        unique = list(pending)
+        translated = {}
+        if unique and self.is_available():
+            for start in range(0, len(unique), self.batch_size):
+                chunk = unique[start:start + self.batch_size]
+                translated.update(self._translate_chunk(chunk, source, target))
+            self.cache.put_many(list(translated.items()), source, target)
+
+        for text, indices in pending.items():
+            out = translated.get(text)
+            result = {'text': out, 'detected': source, 'cached': False} if out else \
+                {'text': text, 'detected': source, 'note': 'noop'}
+            for i in indices:
+                results[i] = result
+        return results
+
+    def _translate_chunk(self, chunk: List[str], source: str, target: str) -> Dict[str, str]:
+        result = {}
+        if len(chunk) > 1:
+            out = self._call_batch(chunk, source, target)
+            if out is None:
+                # Модель не дотрималась формату — по одному
+                self.stats['batch_fallbacks'] += 1
+            else:
+                result.update(out)
+        # Рядки без придатного перекладу в масиві (null, об'єкт, порожньо) — окремим запитом
+        for text in chunk:
+            if text in result:
+                continue
+            out = self._call_one(text, source, target)
+            if out:
+                result[text] = out
+        return result
+
+    def _call_one(self, text: str, source: str, target: str) -> Optional[str]:
+        self.stats['llm_calls'] += 1
+        system = TRANSLATE_SYSTEM_PROMPT.format(source=self._lang(source, True), target=self._lang(target))
+        out = self.client.chat([
+            {"role": "system", "content": system},
+            {"role": "user", "content": text}
+        ])
+        return out.strip() if out else None
+
+    def _call_batch(self, chunk: List[str], source: str, target: str) -> Optional[Dict[str, str]]:
+        self.stats['llm_calls'] += 1
+        self.stats['batch_calls'] += 1
+        system = TRANSLATE_BATCH_PROMPT.format(source=self._lang(source, True), target=self._lang(target))
+        raw = self.client.chat([
+            {"role": "system", "content": system},
+            {"role": "user", "content": json.dumps(chunk, ensure_ascii=False)}
+        ])
+        if not raw:
+            return None
+        s = raw.strip()
+        if s.startswith('```'):
+            s = s.strip('`')
+            if s.lower().startswith('json'):
+                s = s[4:]
+        try:
+            items = json.loads(s)
+        except ValueError:
+            return None
+        if not isinstance(items, list) or len(items) != len(chunk):
+            return None
+        # null, числа чи вкладені об'єкти — не переклад: такі рядки підуть поодинці, а не в кеш
+        return {text: out.strip() for text, out in zip(chunk, items) if isinstance(out, str) and out.strip()}
+
+    def info(self) -> Dict[str, Any]:
+        return {'available': self.is_available(), 'batch_size': self.batch_size,
+                'cache': self.cache.info(), **self.stats}
+
+
+_translator = None
+_translator_lock = threading.Lock()
+
+
+def get_translator() -> Translator:
+    global _translator
+    if _translator is None:
+        with _translator_lock:
+            if _translator is None:
+                _translator = Translator()
+    return _translator
@@ -0,0 +1,323 @@
+"""
+TTS dispatcher for ATLAS frontend
+Per-backend concurrency slots and least-loaded routing across TTS servers
+"""
+
+import os
+import time
+import logging
+import threading
+from collections import deque
+from contextlib import contextmanager
+from typing import Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Скільки одночасних синтезів дозволено на кожен бекенд (число або список через кому по порядку URL)
+TTS_BACKEND_SLOTS = os.getenv('TTS_BACKEND_SLOTS', '2')
+# Скільки запит чекає вільного слота, коли всі зайняті
+TTS_QUEUE_TIMEOUT = float(os.getenv('TTS_QUEUE_TIMEOUT', 30))
+# Як часто перепитувати /health бекенда про прогрів
+TTS_WARM_TTL = float(os.getenv('TTS_WARM_TTL', 15))
+# Скільки бекенд, що відповів 503 {'retry': true} (пул зайнятий), іде в кінець черги вибору
+TTS_BUSY_BACKOFF = float(os.getenv('TTS_BUSY_BACKOFF', 0.5))
+
+
+class TTSQueueTimeout(Exception):
+    """All backend slots stayed busy for the whole queue timeout"""
+
+
+class TTSBackend:
+    """State of one TTS server: slots, in-flight count, latency EWMA, cooldown and warm flag"""
+
+    def __init__(self, url: str, slots: int):
+        self.url = url
+        self.slots = max(1, int(slots))
+        self.inflight = 0
+        self.ewma_ms = None
+        self.cooldown_until = 0.0
+        self.busy_until = 0.0
+        self.warm = False
+        self.warm_checked = 0.0
+        self.warm_probing = False
+        self.completed = 0
+        self.failed = 0
+        self.busy = 0
+        self.last_error = None
+
+    def expected_ms(self, default_ms: float) -> float:
+        # Очікуваний час завершення нового запиту: черга в слотах × типова латентність
+        return (self.inflight + 1) * (self.ewma_ms or default_ms) / self.slots
+
+    def snapshot(self, now: float) -> Dict:
+        return {
+            'url': self.url,
+            'slots': self.slots,
+            'inflight': self.inflight,
+            'ewma_ms': round(self.ewma_ms, 1) if self.ewma_ms else None,
+            'cooling_down': now < self.cooldown_until,
+            'saturated': now < self.busy_until,
+            'warm': self.warm,
+            'completed': self.completed,
+            'failed': self.failed,
+            'busy': self.busy,
+            'last_error': self.last_error
+        }
+
+
+class TTSDispatcher:
+    """Routes TTS requests to the least-loaded healthy backend.
+
+    Each backend has its own number of slots. A request takes a slot on the backend with the
+    lowest expected completion time (in-flight × latency EWMA); warm backends win over cold
+    ones and backends on failure cooldown are used only when nothing else has a free slot.
+    When every slot is busy, callers wait in FIFO order on a condition variable.
+    """
+
+    def __init__(self, urls: List[str], slots=TTS_BACKEND_SLOTS, session=None,
+                 queue_timeout: float = TTS_QUEUE_TIMEOUT, ewma_alpha: float = 0.3,
+                 default_latency_ms: float = 2000.0, warm_ttl: float = TTS_WARM_TTL,
+                 warm_probe: Optional[Callable[[str], bool]] = None):
+        slot_list = [s.strip() for s in str(slots).split(',') if s.strip()] or ['2']
+        self.backends = [
+            TTSBackend(url, int(slot_list[min(i, len(slot_list) - 1)]))
+            for i, url in enumerate(urls)
+        ]
+        self.session = session
+        self.queue_timeout = queue_timeout
+        self.ewma_alpha = ewma_alpha
+        self.default_latency_ms = default_latency_ms
+        self.warm_ttl = warm_ttl
+        self._warm_probe = warm_probe or self._default_warm_probe
+
+        self._cond = threading.Condition()
+        self._waiters = deque()
+        self._rr = 0
+        self.metrics = {
+            'requests': 0,
+            'queued': 0,
+            'queue_timeouts': 0,
+            'max_waiting': 0,
+            'busy_retries': 0
+        }
+        self._queue_wait_ms = deque(maxlen=512)
+
+    @property
+    def urls(self) -> List[str]:
+        return [b.url for b in self.backends]
+
+    def _backend(self, url: str) -> Optional[TTSBackend]:
+        for backend in self.backends:
+            if backend.url == url:
+                return backend
+        return None
+
+    # ---- warm state ----
+
+    def _default_warm_probe(self, url: str) -> bool:
+        if self.session is None:
+            return True
+        r = self.session.get(f"{url}/health", timeout=2)
+        data = r.json() if r.status_code == 200 else {}
+        # Старі TTS-сервери без поля warm: вважаємо теплими, якщо модель готова
+        return bool(data.get('warm', data.get('tts_ready', False)))
+
+    def _probe_warm(self, backend: TTSBackend):
+        try:
+            warm = self._warm_probe(backend.url)
+        except Exception:
+            warm = False
+        with self._cond:
+            backend.warm = warm
+            backend.warm_checked = time.monotonic()
+            backend.warm_probing = False
+            self._cond.notify_all()
+
+    def _refresh_warm(self, now: float):
+        """Stale warm flags are refreshed in background threads so routing never blocks"""
+        if len(self.backends) < 2:
+            return
+        for backend in self.backends:
+            if not backend.warm_probing and now - backend.warm_checked > self.warm_ttl:
+                backend.warm_probing = True
+                threading.Thread(target=self._probe_warm, args=(backend,), daemon=True,
+                                 name='tts-warm-probe').start()
+
+    # ---- routing ----
+
+    def _choose(self, now: float, need_slot: bool = True) -> Optional[TTSBackend]:
+        candidates = [b for b in self.backends if not need_slot or b.inflight < b.slots]
+        if not candidates:
+            return None
+        healthy = [b for b in candidates if now >= b.cooldown_until]
+        if healthy:
+            candidates = healthy
+            # Щойно відповів «зайнятий» — лише якщо інших немає
+            idle = [b for b in candidates if now >= b.busy_until]
+            candidates = idle or candidates
+            warm = [b for b in candidates if b.warm]
+            candidates = warm or candidates
+        else:
+            # Усі з вільними слотами на cooldown — беремо той, що охолоне найраніше
+            return min(candidates, key=lambda b: b.cooldown_until)
+        # Рівні оцінки розводимо round-robin, щоб холодний старт не бив в один бекенд
+        self._rr += 1
+        n = len(self.backends)
+        return min(candidates, key=lambda b: (b.expected_ms(self.default_latency_ms),
+                                              (self.backends.index(b) - self._rr) % n))
+
+    def pick(self) -> str:
+        """Least-loaded backend URL without taking a slot (for cheap GETs like /voices)"""
+        with self._cond:
+            now = time.monotonic()
+            self._refresh_warm(now)
+            return self._choose(now, need_slot=False).url
+
+    def acquire(self, timeout: Optional[float] = None) -> TTSBackend:
+        """Take a slot; waits FIFO while all slots are busy. Raises TTSQueueTimeout."""
+        timeout = self.queue_timeout if timeout is None else timeout
+        started = time.monotonic()
+        deadline = started + timeout
+        token = object()
+        with self._cond:
+            self.metrics['requests'] += 1
+            self._refresh_warm(started)
+            self._waiters.append(token)
+            queued = False
+            try:
+                while True:
+                    if self._waiters[0] is token:
+                        backend = self._choose(time.monotonic())
+                        if backend is not None:
+                            break
+                    if not queued:
+                        queued = True
+                        self.metrics['queued'] += 1
+                        self.metrics['max_waiting'] = max(self.metrics['max_waiting'], len(self._waiters))
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self.metrics['queue_timeouts'] += 1
+                        raise TTSQueueTimeout(f"All {self.total_slots()} TTS slots busy for {timeout:.1f}s")
+                    self._cond.wait(remaining)
+            finally:
+                self._waiters.remove(token)
+                self._cond.notify_all()
+            backend.inflight += 1
+            self._queue_wait_ms.append((time.monotonic() - started) * 1000.0)
+            return backend
+
+    def release(self, backend: TTSBackend, latency: Optional[float] = None, ok: bool = True,
+                error: Optional[str] = None, backoff: float = 5.0, busy: bool = False):
+        with self._cond:
+            backend.inflight = max(0, backend.inflight - 1)
+            if busy:
+                # Насичений, але живий: без cooldown і без впливу на EWMA латентності
+                backend.busy += 1
+                backend.busy_until = time.monotonic() + TTS_BUSY_BACKOFF
+            elif ok:
+                backend.completed += 1
+                if latency is not None:
+                    ms = latency * 1000.0
+                    backend.ewma_ms = ms if backend.ewma_ms is None else (
+                        self.ewma_alpha * ms + (1 - self.ewma_alpha) * backend.ewma_ms)
+            else:
+                backend.failed += 1
+                backend.last_error = error
+                backend.cooldown_until = time.monotonic() + backoff
+            self._cond.notify_all()
+
+    @contextmanager
+    def slot(self, timeout: Optional[float] = None):
+        backend = self.acquire(timeout)
+        started = time.monotonic()
+        state = {'ok': True, 'error': None, 'busy': False}
+        try:
+            yield backend, state
+        except Exception as e:
+            state['ok'], state['error'] = False, str(e)
+            raise
+        finally:
+            self.release(backend, time.monotonic() - started, state['ok'], state['error'], busy=state['busy'])
+
+    def mark_failure(self, url: str, backoff: float = 5.0):
+        backend = self._backend(url)
+        if backend is not None:
+            with self._cond:
+                backend.cooldown_until = time.monotonic() + backoff
+                self._cond.notify_all()
+
+    def total_slots(self) -> int:
+        return sum(b.slots for b in self.backends)
+
+    # ---- HTTP ----
+
+    @staticmethod
+    def _is_busy(r) -> bool:
+        """503 {'retry': true}: the backend's worker pool is saturated (PoolBusy), not broken"""
+        if r.status_code != 503:
+            return False
+        try:
+            data = r.json()
+        except Exception:
+            return False
+        return isinstance(data, dict) and bool(data.get('retry'))
+
+    def post(self, path: str, json_payload: dict, timeout: float, queue_timeout: Optional[float] = None):
+        """POST through a backend slot; returns (response, base_url).
+
+        Errors and 5xx put the backend on cooldown, except a 503 with retry=true: a saturated
+        backend is only moved to the back of the routing order and the request is retried
+        (on another backend when there is one) until the queue timeout runs out.
+        """
+        queue_timeout = self.queue_timeout if queue_timeout is None else queue_timeout
+        deadline = time.monotonic() + queue_timeout
+        while True:
+            with self.slot(max(0.0, deadline - time.monotonic())) as (backend, state):
+                try:
+                    r = self.session.post(f"{backend.url}{path}", json=json_payload, timeout=timeout)
+                except Exception as e:
+                    logger.warning(f"TTS POST failed for {backend.url}{path}: {e}")
+                    raise
+                if self._is_busy(r):
+                    state['busy'] = True
+                elif r.status_code >= 500:
+                    state['ok'], state['error'] = False, f"HTTP {r.status_code}"
+            if not state['busy'] or time.monotonic() >= deadline:
+                # Після вичерпання черги 503 віддається викликачу як є
+                return r, backend.url
+            with self._cond:
+                self.metrics['busy_retries'] += 1
+                all_busy = all(time.monotonic() < b.busy_until for b in self.backends)
+            if all_busy:
+                time.sleep(min(TTS_BUSY_BACKOFF, max(0.0, deadline - time.monotonic())))
+
+    # ---- metrics ----
+
+    @staticmethod
+    def _percentiles(values):
+        if not values:
+            return {'avg': 0.0, 'p50': 0.0, 'p95': 0.0}
+        ordered = sorted(values)
+        n = len(ordered)
+        return {
+            'avg': round(sum(ordered) / n, 1),
+            'p50': round(ordered[n // 2], 1),
+            'p95': round(ordered[min(n - 1, int(n * 0.95))], 1)
+        }
+
+    def stats(self) -> Dict:
+        with self._cond:
+            now = time.monotonic()
+            backends = [b.snapshot(now) for b in self.backends]
+            waits = list(self._queue_wait_ms)
+            metrics = dict(self.metrics)
+            waiting = len(self._waiters)
+        return {
+            'backends': backends,
+            'total_slots': sum(b['slots'] for b in backends),
+            'inflight': sum(b['inflight'] for b in backends),
+            'waiting': waiting,
+            'queue_timeout_s': self.queue_timeout,
+            'queue_wait_ms': self._percentiles(waits),
+            **metrics
+        }
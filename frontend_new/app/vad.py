@@ -0,0 +1,151 @@
+"""
+Voice activity detection for ATLAS STT
+Lightweight energy-based VAD with an adaptive noise floor for streaming, plus
+whole-clip speech bounds (Silero VAD from faster-whisper when available)
+
+speech_bounds is mirrored in intelligent_atlas/core/audio_utils.py (that app does not
+import from frontend_new); keep the two in sync.
+"""
+
+import math
+from typing import Optional, Tuple
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+_silero = None
+
+
+def _get_silero():
+    """Silero VAD bundled with faster-whisper (onnxruntime), imported on first use.
+
+    Importing faster_whisper pulls in ctranslate2/av, so it is deferred until
+    the first clip is trimmed instead of slowing down server start-up.
+    """
+    global _silero
+    if _silero is None:
+        try:
+            from faster_whisper.vad import VadOptions, get_speech_timestamps
+            _silero = (VadOptions, get_speech_timestamps)
+        except ImportError:
+            _silero = False
+    return _silero or None
+
+
+class EnergyVAD:
+    """Frame-level speech/silence detector.
+
+    Frames are classified by RMS level (dBFS) against an adaptive noise floor.
+    Speech starts after `start_ms` of consecutive voiced frames and ends after
+    `hangover_ms` of consecutive unvoiced frames, which keeps short pauses
+    between words inside one segment.
+    """
+
+    def __init__(self,
+                 sample_rate: int = 16000,
+                 frame_ms: int = 30,
+                 margin_db: float = 10.0,
+                 min_speech_db: float = -50.0,
+                 start_ms: int = 90,
+                 hangover_ms: int = 500):
+        self.sample_rate = sample_rate
+        self.frame_ms = frame_ms
+        self.frame_size = int(sample_rate * frame_ms / 1000)
+        self.margin_db = margin_db
+        self.min_speech_db = min_speech_db
+        self.start_frames = max(1, start_ms // frame_ms)
+        self.hangover_frames = max(1, hangover_ms // frame_ms)
+        self.reset()
+
+    def reset(self):
+        self.noise_floor_db = -60.0
+        self.in_speech = False
+        self._voiced_run = 0
+        self._unvoiced_run = 0
+
+    @staticmethod
+    def frame_db(frame: "np.ndarray") -> float:
+        """RMS level of a float32 frame in dBFS."""
+        if frame.size == 0:
+            return -120.0
+        rms = float(np.sqrt(np.mean(np.square(frame, dtype=np.float64))))
+        return 20.0 * math.log10(max(rms, 1e-6))
+
+    def is_voiced(self, frame: "np.ndarray") -> bool:
+        level = self.frame_db(frame)
+        voiced = level > self.min_speech_db and level > self.noise_floor_db + self.margin_db
+        if not voiced:
+            # Track the floor quickly downwards and slowly upwards
+            alpha = 0.3 if level < self.noise_floor_db else 0.02
+            self.noise_floor_db += alpha * (level - self.noise_floor_db)
+        return voiced
+
+    def process(self, frame: "np.ndarray") -> Optional[str]:
+        """Feed one frame; returns 'start', 'end' or None on state transitions."""
+        voiced = self.is_voiced(frame)
+        if voiced:
+            self._voiced_run += 1
+            self._unvoiced_run = 0
+        else:
+            self._unvoiced_run += 1
+            self._voiced_run = 0
+
+        if not self.in_speech and self._voiced_run >= self.start_frames:
+            self.in_speech = True
+            return 'start'
+        if self.in_speech and self._unvoiced_run >= self.hangover_frames:
+            self.in_speech = False
+            return 'end'
+        return None
+
+
+def speech_bounds(audio: "np.ndarray",
+                  sample_rate: int = 16000,
+                  pad_ms: int = 200) -> Optional[Tuple[int, int]]:
+    """Return (start, end) sample indices spanning all detected speech, or None if silent.
+
+    Uses Silero VAD from faster-whisper when available and falls back to
+    a percentile energy detector. Leading/trailing silence outside the span (plus `pad_ms`) can
+    be dropped before decoding.
+    """
+    if audio.size == 0:
+        return None
+    pad = int(sample_rate * pad_ms / 1000)
+
+    silero = _get_silero() if sample_rate == 16000 else None
+    if silero is not None:
+        vad_options, get_speech_timestamps = silero
+        try:
+            stamps = get_speech_timestamps(audio, vad_options(min_silence_duration_ms=300))
+            if not stamps:
+                return None
+            return max(0, stamps[0]['start'] - pad), min(audio.size, stamps[-1]['end'] + pad)
+        except Exception:
+            pass
+
+    return _energy_bounds(audio, sample_rate, pad)
+
+
+def _energy_bounds(audio: "np.ndarray", sample_rate: int, pad: int,
+                   margin_db: float = 10.0, min_speech_db: float = -50.0,
+                   loud_db: float = -35.0) -> Optional[Tuple[int, int]]:
+    """Energy fallback for a whole clip: 30 ms frames against the clip's 10th-percentile level.
+
+    The whole clip is known, so the noise floor is taken from its quietest frames instead of
+    being tracked as in EnergyVAD (which never adapts while steady noise stays above its
+    starting floor). Frames louder than loud_db always count as speech so continuous speech
+    without pauses is not trimmed.
+    """
+    size = int(sample_rate * 0.03)
+    n = audio.size // size if size else 0
+    if n == 0:
+        return None
+    frames = audio[: n * size].reshape(n, size).astype(np.float64)
+    levels = 20.0 * np.log10(np.maximum(np.sqrt(np.mean(frames ** 2, axis=1)), 1e-6))
+    floor = float(np.percentile(levels, 10))
+    voiced = np.nonzero((levels > min_speech_db) & ((levels > floor + margin_db) | (levels > loud_db)))[0]
+    if voiced.size == 0:
+        return None
+    return max(0, int(voiced[0]) * size - pad), min(audio.size, (int(voiced[-1]) + 1) * size + pad)
@@ -40,6 +40,8 @@ const app = express();
 const PORT = process.env.ORCH_PORT || 5101;
 const GRISHA_CONFIDENCE_THRESHOLD = Math.max(0, Math.min(1, parseFloat(process.env.GRISHA_CONFIDENCE_THRESHOLD || '0.8')));
 const GRISHA_MAX_VERIFY_ITER = Math.max(1, parseInt(process.env.GRISHA_MAX_VERIFY_ITER || '3', 10));
+// NDJSON mode of /chat/stream: keep-alive blank line interval while an LLM phase is running
+const CHAT_STREAM_HEARTBEAT_MS = Math.max(250, parseInt(process.env.CHAT_STREAM_HEARTBEAT_MS || '2000', 10));
 
 // Intent router integration (feature flag)
 const INTENT_ROUTER_ENABLED = String(process.env.INTENT_ROUTER || '0') === '1';
@@ -540,6 +542,43 @@ app.post('/chat/stream', async (req, res) => {
     };
     sessions.set(sessionId, session);
 
+    // NDJSON mode (Accept: application/x-ndjson): one line per agent phase as soon as it is ready,
+    // blank keep-alive lines in between, and a final {type:'done'} line with the usual payload.
+    // Writing while the cycle runs is what lets the proxy pass phases through and notice a
+    // disconnected browser; plain JSON callers keep the single res.json reply.
+    const streaming = String(req.get('accept') || '').includes('application/x-ndjson');
+    // Cancel flag belongs to this request: the next message of the same session must not reset it
+    const cancel = { cancelled: false };
+    let heartbeat = null;
+    res.on('close', () => {
+        if (heartbeat) clearInterval(heartbeat);
+        if (!res.writableEnded) {
+            cancel.cancelled = true;
+            logMessage('info', `Client disconnected from /chat/stream (session=${sessionId || 'n/a'}), cancelling`);
+        }
+    });
+    const writeLine = (obj) => {
+        if (!res.writableEnded && !cancel.cancelled) res.write(JSON.stringify(obj) + '\n');
+    };
+    const reply = (payload, status = 200) => {
+        if (heartbeat) clearInterval(heartbeat);
+        if (!streaming) return res.status(status).json(payload);
+        writeLine({ type: status === 200 ? 'done' : 'error', ...payload });
+        return res.end();
+    };
+    if (streaming) {
+        res.status(200);
+        res.set({
+            'Content-Type': 'application/x-ndjson; charset=utf-8',
+            'Cache-Control': 'no-cache',
+            'X-Accel-Buffering': 'no'
+        });
+        res.flushHeaders();
+        heartbeat = setInterval(() => {
+            if (!res.writableEnded && !cancel.cancelled) res.write('\n');
+        }, CHAT_STREAM_HEARTBEAT_MS);
+    }
+
     // Check for user commands
     const messageText = message.toLowerCase().trim();
     
@@ -553,7 +592,7 @@ app.post('/chat/stream', async (req, res) => {
             type: 'command'
         });
         
-        return res.json({
+        return reply({
             success: true,
             message: 'User authority established',
             shouldContinue: true,
@@ -572,7 +611,7 @@ app.post('/chat/stream', async (req, res) => {
             type: 'interruption'
         });
 
-        return res.json({
+        return reply({
             success: true,
             message: 'Processing interrupted by user',
             shouldPause: true,
@@ -582,7 +621,14 @@ app.post('/chat/stream', async (req, res) => {
 
     // Process regular message through agent system
     try {
-        const response = await processAgentCycle(message, session);
+        const response = await processAgentCycle(message, session, {
+            cancel,
+            onPhase: streaming ? (r) => writeLine({ type: 'phase', response: r }) : null
+        });
+        if (cancel.cancelled) {
+            logMessage('info', `Cancelled /chat/stream cycle after ${response.length} phase(s) (session=${sessionId || 'n/a'})`);
+            return;
+        }
         try {
             // Summarize agents and providers for observability
             const meta = (response || []).map(r => `${r.agent}:${r.provider || 'simulation'}${r.model ? '('+r.model+')' : ''}`).join(', ');
@@ -592,7 +638,7 @@ app.post('/chat/stream', async (req, res) => {
     // Автозакриття тільки якщо немає пайплайну/наступної дії і це НЕ smalltalk
     const ended = !session.pipeline && !session.nextAction && session.intent !== 'smalltalk';
 
-        res.json({
+        reply({
             success: true,
             response: response,
             session: {
@@ -606,10 +652,10 @@ app.post('/chat/stream', async (req, res) => {
 
     } catch (error) {
         logMessage('error', `Chat processing failed: ${error.message}`);
-        res.status(500).json({
+        reply({
             error: 'Processing failed',
             details: error.message
-        });
+        }, 500);
     }
 });
 
@@ -663,8 +709,16 @@ app.post('/chat', async (req, res) => {
 });
 
 // Agent processing cycle
-async function processAgentCycle(userMessage, session) {
+async function processAgentCycle(userMessage, session, options = {}) {
     const responses = [];
+    // options.cancel: per-request {cancelled} flag; options.onPhase: called with each phase as it is ready
+    const cancel = options.cancel || { cancelled: false };
+    const emit = (r) => {
+        responses.push(r);
+        if (options.onPhase) {
+            try { options.onPhase(r); } catch {}
+        }
+    };
     PIPELINE_METRICS.messagesTotal++;
     
     // Add user message to history
@@ -678,8 +732,9 @@ async function processAgentCycle(userMessage, session) {
     const preIntent = classifyIntentHeuristic(userMessage, '');
     const atlasResponseRaw = await generateAgentResponse('atlas', userMessage, session, { intentHint: preIntent });
     const atlasResponse = tagResponse(atlasResponseRaw, PHASE.ATLAS_PLAN);
-    responses.push(atlasResponse);
+    emit(atlasResponse);
     session.history.push(atlasResponse);
+    if (cancel.cancelled) return responses;
 
     // Classify user intent to route the flow efficiently (LLM-first with fallback)
     const intent = await classifyIntentSmart(userMessage, atlasResponse.content || '');
@@ -699,8 +754,9 @@ async function processAgentCycle(userMessage, session) {
         ].join('\n');
         const grishaPreRaw = await generateAgentResponse('grisha', precheckPrompt, session);
         const grishaPre = tagResponse(grishaPreRaw, PHASE.GRISHA_PRECHECK);
-        responses.push(grishaPre);
+        emit(grishaPre);
         session.history.push(grishaPre);
+        if (cancel.cancelled) return responses;
 
         startActionablePipeline(session, userMessage, atlasResponse.content, grishaPre.content);
 
@@ -711,8 +767,9 @@ async function processAgentCycle(userMessage, session) {
             const tetyanaExecRaw = await generateAgentResponse('tetyana', execPrompt, session, { enableTools: true });
             const tetyanaExec = tagResponse(tetyanaExecRaw, PHASE.EXECUTION);
             try { tetyanaExec.evidence = extractEvidence(tetyanaExec.content); } catch {}
-            responses.push(tetyanaExec);
+            emit(tetyanaExec);
             session.history.push(tetyanaExec);
+            if (cancel.cancelled) return responses;
             const verify = await grishaVerifyWithGoose(userMessage, atlasResponse.content, tetyanaExec.content, session.id);
             const confirmed = verify.confidence >= GRISHA_CONFIDENCE_THRESHOLD;
             const verdictMsg = confirmed
@@ -725,7 +782,7 @@ async function processAgentCycle(userMessage, session) {
             PIPELINE_METRICS.verdicts++;
             PIPELINE_METRICS.verificationIterations += verify.iterations || 1;
             PIPELINE_METRICS.verificationConfidenceSum += verify.confidence || 0;
-            responses.push(grishaVerdict);
+            emit(grishaVerdict);
             session.history.push(grishaVerdict);
             if (!confirmed) {
                 const missing = (verify.result?.criteria || []).filter(c => c && c.result === false).map(c => c.name);
@@ -733,7 +790,7 @@ async function processAgentCycle(userMessage, session) {
                 const grishaFollowRaw = await generateAgentResponse('grisha', ask, session);
                 const grishaFollow = tagResponse(grishaFollowRaw, PHASE.GRISHA_FOLLOWUP);
                 PIPELINE_METRICS.followups++;
-                responses.push(grishaFollow);
+                emit(grishaFollow);
                 session.history.push(grishaFollow);
                 markNeedsMore(session, missing, tetyanaExec.content);
             } else {
@@ -753,7 +810,7 @@ async function processAgentCycle(userMessage, session) {
     if (intent === 'planning' && shouldTriggerDiscussion(atlasResponse.content)) {
     const grishaRespRaw = await generateAgentResponse('grisha', atlasResponse.content, session);
     const grishaResponse = tagResponse(grishaRespRaw, PHASE.GRISHA_PRECHECK);
-    responses.push(grishaResponse);
+    emit(grishaResponse);
     session.history.push(grishaResponse);
 
     try {
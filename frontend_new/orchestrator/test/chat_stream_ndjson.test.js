@@ -0,0 +1,64 @@
+import test from 'node:test';
+import assert from 'node:assert/strict';
+import http from 'http';
+
+// POST with Accept: application/x-ndjson; resolves with parsed non-empty lines and the raw body
+function postNdjson(path, data) {
+  return new Promise((resolve, reject) => {
+    const body = JSON.stringify(data);
+    const req = http.request({
+      host: '127.0.0.1',
+      port: process.env.ORCH_PORT || 5101,
+      path,
+      method: 'POST',
+      headers: {
+        'Content-Type': 'application/json',
+        'Accept': 'application/x-ndjson',
+        'Content-Length': Buffer.byteLength(body)
+      }
+    }, res => {
+      let d = '';
+      res.on('data', c => d += c);
+      res.on('end', () => {
+        try {
+          const lines = d.split('\n').filter(l => l.trim()).map(l => JSON.parse(l));
+          resolve({ status: res.statusCode, contentType: res.headers['content-type'] || '', lines, raw: d });
+        } catch (e) { reject(e); }
+      });
+    });
+    req.on('error', reject);
+    req.write(body);
+    req.end();
+  });
+}
+
+// Assumes orchestrator already running (same as the other endpoint tests)
+
+test('/chat/stream with Accept: application/x-ndjson emits phases then a final done line', async () => {
+  const { status, contentType, lines } = await postNdjson('/chat/stream', { message: 'Привіт, як справи?', sessionId: 'ndjson-test-1' });
+  assert.equal(status, 200);
+  assert.ok(contentType.includes('application/x-ndjson'), 'NDJSON content type');
+  assert.ok(lines.length >= 2, 'at least one phase and the final line');
+  const last = lines[lines.length - 1];
+  assert.equal(last.type, 'done');
+  assert.ok(last.success, 'success flag');
+  const phases = lines.filter(l => l.type === 'phase');
+  assert.equal(phases.length, last.response.length, 'every phase was streamed before done');
+  assert.deepEqual(phases.map(p => p.response.phase), last.response.map(r => r.phase));
+});
+
+test('/chat/stream without NDJSON accept keeps the single JSON reply', async () => {
+  const { status, raw } = await new Promise((resolve, reject) => {
+    const body = JSON.stringify({ message: 'Привіт', sessionId: 'ndjson-test-2' });
+    const req = http.request({
+      host: '127.0.0.1', port: process.env.ORCH_PORT || 5101, path: '/chat/stream', method: 'POST',
+      headers: { 'Content-Type': 'application/json', 'Content-Length': Buffer.byteLength(body) }
+    }, res => { let d = ''; res.on('data', c => d += c); res.on('end', () => resolve({ status: res.statusCode, raw: d })); });
+    req.on('error', reject);
+    req.write(body);
+    req.end();
+  });
+  assert.equal(status, 200);
+  const json = JSON.parse(raw);
+  assert.ok(json.success && Array.isArray(json.response));
+});
@@ -0,0 +1,66 @@
+import os
+import sys
+import time
+import asyncio
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+APP_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'app'))
+if APP_DIR not in sys.path:
+    sys.path.insert(0, APP_DIR)
+from goose_client import GooseClient  # type: ignore
+
+
+class GoosedStub(BaseHTTPRequestHandler):
+    """goosed /reply: two tokens and a bare `event: done`; the web UI probe is slow"""
+
+    def do_GET(self):
+        time.sleep(0.5)
+        self.send_response(404)
+        self.end_headers()
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/event-stream')
+        self.end_headers()
+        self.wfile.write(b'data: {"text": "Hi"}\n\ndata: {"text": " there"}\n\nevent: done\n\n')
+        self.wfile.flush()
+
+    def log_message(self, *args):
+        pass
+
+
+def test_astream_reply_does_not_block_the_loop_and_reuses_session():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), GoosedStub)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    client = GooseClient(base_url=f'http://127.0.0.1:{server.server_port}')
+
+    async def main():
+        ticks = 0
+
+        async def ticker():
+            nonlocal ticks
+            while True:
+                await asyncio.sleep(0.05)
+                ticks += 1
+
+        task = asyncio.create_task(ticker())
+        tokens = [e['text'] async for e in client.astream_reply('s', 'hello') if e['type'] == 'token']
+        first = await client._get_aio_session()
+        # Друге повідомлення: транспорт з кешу, сесія та сама
+        async for _ in client.astream_reply('s', 'again'):
+            pass
+        same = await client._get_aio_session() is first
+        task.cancel()
+        await first.close()
+        return tokens, ticks, same
+
+    try:
+        tokens, ticks, same = asyncio.run(main())
+    finally:
+        server.shutdown()
+        client.session.close()
+    assert tokens == ['Hi', ' there']
+    assert ticks >= 5  # loop жив під час 0.5 с проби транспорту
+    assert same
@@ -0,0 +1,48 @@
+import os
+import sys
+
+APP_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'app'))
+if APP_DIR not in sys.path:
+    sys.path.insert(0, APP_DIR)
+import intent_router  # type: ignore
+from intent_router import _ReplyCache  # type: ignore
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_reply_cache_normalizes_key_and_evicts_lru():
+    cache = _ReplyCache(maxsize=2, ttl=60, max_chars=40)
+    cache.put('Привіт!', 'Вітаю')
+    assert cache.get('  привіт ') == 'Вітаю'
+    cache.put('дякую', 'Нема за що')
+    cache.get('привіт')  # привіт стає найсвіжішим
+    cache.put('бувай', 'До зустрічі')
+    assert cache.get('дякую') is None
+    assert cache.get('привіт') == 'Вітаю'
+    assert cache.stats() == {'size': 2, 'hits': 3, 'misses': 1}
+
+
+def test_reply_cache_ttl(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(intent_router.time, 'monotonic', clock)
+    cache = _ReplyCache(maxsize=4, ttl=10, max_chars=40)
+    cache.put('привіт', 'Вітаю')
+    clock.now += 9
+    assert cache.get('привіт') == 'Вітаю'
+    clock.now += 2
+    assert cache.get('привіт') is None
+
+
+def test_reply_cache_skips_long_and_empty():
+    cache = _ReplyCache(maxsize=4, ttl=60, max_chars=10)
+    cache.put('це повідомлення задовге для кешу', 'відповідь')
+    cache.put('привіт', '')
+    cache.put('...', 'x')
+    assert cache.stats()['size'] == 0
+    assert _ReplyCache(maxsize=0, ttl=60, max_chars=10).get('привіт') is None
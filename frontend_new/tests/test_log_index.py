@@ -0,0 +1,102 @@
+import os
+import sys
+
+APP_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'app'))
+if APP_DIR not in sys.path:
+    sys.path.insert(0, APP_DIR)
+from log_index import LogTail  # type: ignore
+
+
+class Seq:
+    def __init__(self):
+        self.n = 0
+
+    def __call__(self):
+        self.n += 1
+        return self.n
+
+
+def messages(tail):
+    return [e['message'] for e in tail.entries]
+
+
+def test_reads_only_appended_lines_and_groups_continuations(tmp_path):
+    path = tmp_path / 'app.log'
+    path.write_text('2025-09-05 10:00:00,000 INFO start\n')
+    tail, seq = LogTail(path, 'app'), Seq()
+    assert tail.poll(seq) == 1
+    with open(path, 'a') as f:
+        f.write('2025-09-05 10:00:01,000 ERROR boom\nTraceback line\n')
+    assert tail.poll(seq) == 1
+    assert messages(tail) == ['2025-09-05 10:00:00,000 INFO start',
+                              '2025-09-05 10:00:01,000 ERROR boom\nTraceback line']
+    assert tail.poll(seq) == 0
+
+
+def test_partial_line_waits_for_newline(tmp_path):
+    path = tmp_path / 'app.log'
+    path.write_bytes(b'')
+    tail, seq = LogTail(path, 'app'), Seq()
+    tail.poll(seq)
+    with open(path, 'ab') as f:
+        f.write('2025-09-05 10:00:00,000 INFO прив'.encode('utf-8')[:-1])  # обрізана літера
+    assert tail.poll(seq) == 0
+    with open(path, 'ab') as f:
+        f.write('2025-09-05 10:00:00,000 INFO прив'.encode('utf-8')[-1:] + b'\r\n')
+    assert tail.poll(seq) == 1
+    assert messages(tail) == ['2025-09-05 10:00:00,000 INFO прив']
+
+
+def test_rotation_rereads_new_file_from_start(tmp_path):
+    path = tmp_path / 'app.log'
+    path.write_text('2025-09-05 10:00:00,000 INFO old\n')
+    tail, seq = LogTail(path, 'app'), Seq()
+    tail.poll(seq)
+    os.replace(path, tmp_path / 'app.log.1')
+    path.write_text('2025-09-05 10:00:05,000 INFO new one\n')
+    assert tail.poll(seq) == 1
+    assert tail.rotations == 1
+    assert messages(tail)[-1] == '2025-09-05 10:00:05,000 INFO new one'
+
+
+def test_truncate_is_treated_as_rotation(tmp_path):
+    path = tmp_path / 'app.log'
+    path.write_text('2025-09-05 10:00:00,000 INFO a fairly long first line\n')
+    tail, seq = LogTail(path, 'app'), Seq()
+    tail.poll(seq)
+    with open(path, 'w') as f:
+        f.write('2025-09-05 10:00:09,000 INFO b\n')
+    assert tail.poll(seq) == 1
+    assert tail.rotations == 1
+    assert messages(tail)[-1] == '2025-09-05 10:00:09,000 INFO b'
+
+
+def test_bootstrap_skips_cut_first_line(tmp_path):
+    path = tmp_path / 'app.log'
+    path.write_text(''.join(f'2025-09-05 10:00:{i:02d},000 INFO line {i}\n' for i in range(10)))
+    tail = LogTail(path, 'app', bootstrap_bytes=50)
+    tail.poll(Seq())
+    assert messages(tail) == ['2025-09-05 10:00:09,000 INFO line 9']
+
+
+def test_ring_buffer_tracks_evicted_seq(tmp_path):
+    path = tmp_path / 'app.log'
+    path.write_text(''.join(f'2025-09-05 10:00:{i:02d},000 INFO line {i}\n' for i in range(5)))
+    tail = LogTail(path, 'app', max_entries=3)
+    tail.poll(Seq())
+    assert [e['seq'] for e in tail.entries] == [3, 4, 5]
+    assert tail.evicted_seq == 2
+
+
+def test_gap_only_counts_subscribed_sources(tmp_path):
+    from log_index import LogIndex  # type: ignore
+    busy, quiet = tmp_path / 'busy.log', tmp_path / 'quiet.log'
+    quiet.write_text('2025-09-05 10:00:00,000 INFO quiet\n')
+    busy.write_text(''.join(f'2025-09-05 10:00:{i:02d},000 INFO busy {i}\n' for i in range(10)))
+    index = LogIndex({'quiet': quiet, 'busy': busy}, max_entries=3)
+    index.poll()
+    entries, cursor, gap = index.entries_since(0, sources=['quiet'])
+    assert [e['message'] for e in entries] == ['2025-09-05 10:00:00,000 INFO quiet']
+    assert gap is None
+    _, _, gap = index.entries_since(0, sources=['busy'])
+    assert gap == (1, 8)
@@ -0,0 +1,61 @@
+import os
+import sys
+
+APP_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'app'))
+if APP_DIR not in sys.path:
+    sys.path.insert(0, APP_DIR)
+from goose_client import SSEParser, _sse_tokens  # type: ignore
+
+
+def feed_all(chunks):
+    parser = SSEParser()
+    events = []
+    for chunk in chunks:
+        events.extend(parser.feed(chunk))
+    return events
+
+
+def test_lf_crlf_and_cr_line_endings():
+    for sep in (b'\n', b'\r\n', b'\r'):
+        events = feed_all([b'data: a' + sep + sep + b'data: b' + sep + sep])
+        assert [e['data'] for e in events] == ['a', 'b']
+
+
+def test_crlf_split_across_chunks_is_one_line_break():
+    # CR в кінці одного шматка, LF на початку наступного — не порожній рядок між ними
+    events = feed_all([b'data: a\r', b'\ndata: b\r\n\r\n'])
+    assert [e['data'] for e in events] == ['a\nb']
+
+
+def test_cr_at_chunk_end_terminates_line():
+    events = feed_all([b'data: a\r', b'\r'])
+    assert [e['data'] for e in events] == ['a']
+
+
+def test_leading_bom_is_stripped():
+    events = feed_all([b'\xef\xbb\xbfdata: x\n\n'])
+    assert events[0]['data'] == 'x'
+
+
+def test_multiline_data_and_comments():
+    events = feed_all([b': keep-alive\nevent: msg\ndata: one\ndata:two\nid: 7\n\n'])
+    assert events == [{'event': 'msg', 'data': 'one\ntwo', 'id': '7', 'retry': None}]
+
+
+def test_utf8_character_split_across_chunks():
+    raw = 'data: привіт\n\n'.encode('utf-8')
+    cut = raw.index('и'.encode('utf-8')) + 1  # посередині двобайтової літери
+    events = feed_all([raw[:cut], raw[cut:]])
+    assert events[0]['data'] == 'привіт'
+
+
+def test_empty_data_line_dispatches_but_bare_fields_do_not():
+    assert feed_all([b'data:\n\n', b'id: 1\n\n']) == [{'event': 'message', 'data': '', 'id': '', 'retry': None}]
+    assert feed_all([b'id: 1\n\n']) == []
+
+
+def test_done_without_data_ends_stream():
+    events = feed_all([b'data: {"text": "Hi"}\n\n', b'event: done\n\n'])
+    assert [e['event'] for e in events] == ['message', 'done']
+    assert _sse_tokens(events[0]) == (['Hi'], False)
+    assert _sse_tokens(events[1]) == ([], True)
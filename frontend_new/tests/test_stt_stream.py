@@ -0,0 +1,62 @@
+import os
+import sys
+import json
+import asyncio
+
+import numpy as np
+import pytest
+
+APP_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'app'))
+if APP_DIR not in sys.path:
+    sys.path.insert(0, APP_DIR)
+import stt_stream  # type: ignore
+from stt_stream import StreamingSession  # type: ignore
+
+
+class FakeWebSocket:
+    def __init__(self):
+        self.sent = []
+
+    async def send(self, data):
+        self.sent.append(json.loads(data))
+
+
+def test_configure_rejects_unsupported_sample_rates():
+    session = StreamingSession(FakeWebSocket())
+    session.configure({'sample_rate': 48000, 'language': 'en'})
+    assert (session.sample_rate, session.language) == (48000, 'en')
+    for bad in (12345, 0, -16000, 'abc', [16000]):
+        with pytest.raises(ValueError):
+            session.configure({'sample_rate': bad})
+    assert session.sample_rate == 48000
+    session.configure({'language': None})
+    assert session.sample_rate == 48000
+
+
+def test_finals_decode_in_background_and_arrive_in_order(monkeypatch):
+    delays = {1: 0.3, 2: 0.05}
+
+    async def fake_transcribe(audio, language, beam_size):
+        segment = int(audio[0])
+        await asyncio.sleep(delays[segment])
+        return {'success': True, 'text': f'segment {segment}', 'language': language}
+
+    monkeypatch.setattr(stt_stream, '_transcribe', fake_transcribe)
+
+    async def main():
+        ws = FakeWebSocket()
+        session = StreamingSession(ws)
+        loop = asyncio.get_running_loop()
+        for segment in (1, 2):
+            session.segment_index = segment
+            session.segment_chunks = [np.full(160, segment, dtype=np.float32)]
+            session.segment_samples = 160
+            started = loop.time()
+            await session.finalize_segment()
+            # Цикл прийому не чекає на Whisper
+            assert loop.time() - started < 0.05
+        await session.drain()
+        return [m for m in ws.sent if m['type'] == 'final']
+
+    finals = asyncio.run(main())
+    assert [m['text'] for m in finals] == ['segment 1', 'segment 2']
@@ -0,0 +1,68 @@
+import os
+import sys
+import json
+
+APP_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'app'))
+if APP_DIR not in sys.path:
+    sys.path.insert(0, APP_DIR)
+from translator import Translator, _TranslationCache, looks_ukrainian  # type: ignore
+
+
+class FakeClient:
+    """LLMClient stub: a JSON array reply for batches, 'uk:<text>' for single strings"""
+
+    def __init__(self, batch_reply):
+        self.batch_reply = batch_reply
+        self.calls = []
+
+    def is_configured(self):
+        return True
+
+    def chat(self, messages):
+        content = messages[-1]['content']
+        self.calls.append(content)
+        if content.startswith('['):
+            return json.dumps(self.batch_reply)
+        return f'uk:{content}'
+
+
+def test_translation_cache_lru_without_db():
+    cache = _TranslationCache(maxsize=2, db_path='')
+    cache.put_many([('a', 'а'), ('b', 'б'), ('c', 'в')], 'en', 'uk')
+    assert cache.get('a', 'en', 'uk') is None
+    assert cache.get('c', 'en', 'uk') == 'в'
+    assert cache.get('c', 'en', 'pl') is None  # ключ враховує мови
+    assert cache.info() == {'hits': 1, 'db_hits': 0, 'misses': 2, 'size': 2, 'persistent': False}
+
+
+def test_translation_cache_persists_in_sqlite(tmp_path):
+    db = str(tmp_path / 'cache' / 'translations.sqlite3')
+    first = _TranslationCache(maxsize=1, db_path=db)
+    first.put_many([('hello', 'привіт'), ('bye', 'бувай')], 'en', 'uk')
+    # Витіснене з LRU все одно є в sqlite
+    assert first.get('hello', 'en', 'uk') == 'привіт'
+    assert first.stats['db_hits'] == 1
+
+    second = _TranslationCache(maxsize=4, db_path=db)
+    assert second.get('bye', 'en', 'uk') == 'бувай'
+    assert second.get('bye', 'en', 'uk') == 'бувай'
+    assert second.info()['persistent'] is True
+    assert (second.stats['db_hits'], second.stats['hits']) == (1, 1)
+
+
+def test_batch_null_and_object_items_fall_back_to_single_calls():
+    client = FakeClient(['один', None, {'text': 'x'}])
+    cache = _TranslationCache(maxsize=8, db_path='')
+    translator = Translator(client=client, batch_size=8, cache=cache)
+    results = translator.translate_batch(['one', 'two', 'three'], 'en', 'uk')
+    assert [r['text'] for r in results] == ['один', 'uk:two', 'uk:three']
+    assert client.calls[1:] == ['two', 'three']
+    assert cache.get('two', 'en', 'uk') == 'uk:two'  # у кеші не 'None'
+
+
+def test_looks_ukrainian():
+    assert looks_ukrainian('Привіт')
+    assert looks_ukrainian('Добрий ранок')
+    assert not looks_ukrainian('Это текст')
+    assert not looks_ukrainian('Open the файл please')
+    assert not looks_ukrainian('123')
@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+"""
+ATLAS Audio Utils
+Декодування аудіо в пам'яті, обрізка тиші (VAD) та кеш результатів для STT
+
+Дзеркало frontend_new/app/stt_manager.py (resample_audio, _decode_wav_bytes, decode_audio_bytes,
+TranscriptionCache → ResultCache) та frontend_new/app/vad.py (speech_bounds). intelligent_atlas —
+окремий застосунок і не імпортує з frontend_new, тому код скопійовано; зміни робити в обох місцях.
+"""
+
+import hashlib
+import io
+import logging
+import threading
+import wave
+from collections import OrderedDict
+from typing import Optional, Tuple, Dict, Any
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+try:
+    # PyAV-декодер з faster-whisper приймає file-like об'єкти
+    from faster_whisper.audio import decode_audio as _fw_decode_audio
+except ImportError:
+    _fw_decode_audio = None
+
+try:
+    # Silero VAD з faster-whisper
+    from faster_whisper.vad import VadOptions, get_speech_timestamps
+except ImportError:
+    VadOptions = None
+    get_speech_timestamps = None
+
+logger = logging.getLogger('atlas.audio_utils')
+
+# Whisper очікує моно float32 на 16 кГц
+WHISPER_SAMPLE_RATE = 16000
+
+
+def resample_audio(audio, orig_sr: int, target_sr: int = WHISPER_SAMPLE_RATE):
+    """Передискретизує моно float32 сигнал"""
+    if orig_sr == target_sr or audio.size == 0:
+        return audio.astype(np.float32, copy=False)
+    if orig_sr % target_sr == 0:
+        # Цілий коефіцієнт: усереднення працює як простий anti-alias фільтр
+        factor = orig_sr // target_sr
+        usable = (audio.size // factor) * factor
+        return audio[:usable].reshape(-1, factor).mean(axis=1).astype(np.float32)
+    duration = audio.size / float(orig_sr)
+    n_out = max(1, int(round(duration * target_sr)))
+    x_old = np.linspace(0.0, duration, num=audio.size, endpoint=False)
+    x_new = np.linspace(0.0, duration, num=n_out, endpoint=False)
+    return np.interp(x_new, x_old, audio).astype(np.float32)
+
+
+def _decode_wav_bytes(data: bytes):
+    """Декодує PCM WAV стандартною бібліотекою"""
+    try:
+        with wave.open(io.BytesIO(data), 'rb') as wf:
+            channels = wf.getnchannels()
+            width = wf.getsampwidth()
+            sr = wf.getframerate()
+            frames = wf.readframes(wf.getnframes())
+    except (wave.Error, EOFError):
+        return None
+
+    if width == 2:
+        audio = np.frombuffer(frames, dtype='<i2').astype(np.float32) / 32768.0
+    elif width == 4:
+        audio = np.frombuffer(frames, dtype='<i4').astype(np.float32) / 2147483648.0
+    elif width == 1:
+        audio = (np.frombuffer(frames, dtype=np.uint8).astype(np.float32) - 128.0) / 128.0
+    elif width == 3:
+        raw = np.frombuffer(frames, dtype=np.uint8).reshape(-1, 3)
+        ints = (raw[:, 0].astype(np.int32) | (raw[:, 1].astype(np.int32) << 8) | (raw[:, 2].astype(np.int32) << 16))
+        ints = np.where(ints >= 1 << 23, ints - (1 << 24), ints)
+        audio = ints.astype(np.float32) / 8388608.0
+    else:
+        return None
+
+    if channels > 1:
+        audio = audio[: (audio.size // channels) * channels].reshape(-1, channels).mean(axis=1)
+    return resample_audio(audio, sr)
+
+
+def decode_audio_bytes(data: bytes, audio_format: str = 'wav') -> Optional["np.ndarray"]:
+    """Декодує байти у float32 масив 16 кГц; None — якщо потрібен тимчасовий файл"""
+    if np is None or not data:
+        return None
+    fmt = (audio_format or '').lower().lstrip('.')
+    if fmt == 'wav':
+        audio = _decode_wav_bytes(data)
+        if audio is not None:
+            return audio
+    if _fw_decode_audio is None:
+        return None
+    try:
+        return _fw_decode_audio(io.BytesIO(data), sampling_rate=WHISPER_SAMPLE_RATE)
+    except Exception as e:
+        logger.debug(f"In-memory decode failed for .{fmt}: {e}")
+        return None
+
+
+def speech_bounds(audio, pad_ms: int = 200) -> Optional[Tuple[int, int]]:
+    """Повертає (start, end) у відліках, що охоплюють усе мовлення, або None для тиші"""
+    if audio.size == 0:
+        return None
+    pad = int(WHISPER_SAMPLE_RATE * pad_ms / 1000)
+
+    if get_speech_timestamps is not None:
+        try:
+            stamps = get_speech_timestamps(audio, VadOptions(min_silence_duration_ms=300))
+            if not stamps:
+                return None
+            return max(0, stamps[0]['start'] - pad), min(audio.size, stamps[-1]['end'] + pad)
+        except Exception as e:
+            logger.debug(f"Silero VAD failed, using energy VAD: {e}")
+
+    # Енергетичний VAD: кадри 30 мс, поріг відносно найтихіших кадрів
+    # (гучні кадри понад -35 dBFS завжди вважаються мовленням, щоб не обрізати суцільну мову)
+    size = int(WHISPER_SAMPLE_RATE * 0.03)
+    n = audio.size // size
+    if n == 0:
+        return None
+    frames = audio[: n * size].reshape(n, size).astype(np.float64)
+    levels = 20.0 * np.log10(np.maximum(np.sqrt(np.mean(frames ** 2, axis=1)), 1e-6))
+    floor = float(np.percentile(levels, 10))
+    voiced = np.nonzero((levels > -50.0) & ((levels > floor + 10.0) | (levels > -35.0)))[0]
+    if voiced.size == 0:
+        return None
+    return max(0, int(voiced[0]) * size - pad), min(audio.size, (int(voiced[-1]) + 1) * size + pad)
+
+
+class ResultCache:
+    """LRU кеш результатів STT; ключ — хеш байтів аудіо + параметри декодування"""
+
+    def __init__(self, maxsize: int = 128):
+        self.maxsize = maxsize
+        self._items: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_key(data: bytes, language: Optional[str], beam_size: int, temperature: float) -> str:
+        return f"{hashlib.sha256(data).hexdigest()}|{language}|{beam_size}|{temperature}"
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            item = self._items.get(key)
+            if item is not None:
+                self._items.move_to_end(key)
+            return item
+
+    def put(self, key: str, result: Dict[str, Any]):
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._items[key] = result
+            self._items.move_to_end(key)
+            while len(self._items) > self.maxsize:
+                self._items.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self._items)
@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+"""
+ATLAS Log Stream
+Інкрементальне читання головного лог-файлу та живий потік записів (Server-Sent Events)
+
+Дзеркало frontend_new/app/log_index.py (LogTail + LogIndex.entries_since/stream), спрощене до одного
+файлу без групування багаторядкових записів. Окремою копією лишається навмисно: intelligent_atlas
+запускається як самостійний застосунок (власні requirements.txt і PYTHONPATH) і не імпортує нічого
+з frontend_new. Зміни в tailing (offset/inode, ротація, курсор, gap) робити в обох модулях.
+"""
+
+import os
+import re
+import json
+import time
+import logging
+import threading
+from collections import deque
+from pathlib import Path
+from typing import Dict, Any, List, Optional
+
+logger = logging.getLogger('atlas.log_stream')
+
+# Скільки рядків тримати в пам'яті та скільки читати з хвоста файлу при старті
+LOG_STREAM_MAX_LINES = int(os.getenv('LOG_STREAM_MAX_LINES', 2000))
+LOG_STREAM_BOOTSTRAP_BYTES = int(os.getenv('LOG_STREAM_BOOTSTRAP_BYTES', 256 * 1024))
+# Інтервал опитування файлу, heartbeat та максимум записів за одну відправку клієнту
+LOG_STREAM_INTERVAL = float(os.getenv('LOG_STREAM_INTERVAL', 0.5))
+LOG_STREAM_HEARTBEAT = float(os.getenv('LOG_STREAM_HEARTBEAT', 15))
+LOG_STREAM_MAX_BATCH = int(os.getenv('LOG_STREAM_MAX_BATCH', 200))
+
+LEVEL_PAT = re.compile(r'\b(DEBUG|INFO|WARNING|WARN|ERROR|CRITICAL)\b')
+
+
+def detect_level(line: str) -> str:
+    m = LEVEL_PAT.search(line)
+    if not m:
+        return 'info'
+    level = m.group(1).lower()
+    return 'warn' if level == 'warning' else level
+
+
+class LogStream:
+    """Tails one log file by byte offset into a ring buffer of numbered lines.
+
+    Each line gets a monotonically increasing seq, used as the SSE event id so EventSource
+    reconnects (Last-Event-ID) resume right after the last line the client saw.
+    """
+
+    def __init__(self, path: Path, max_lines: int = LOG_STREAM_MAX_LINES,
+                 bootstrap_bytes: int = LOG_STREAM_BOOTSTRAP_BYTES):
+        self.path = Path(path)
+        self.bootstrap_bytes = bootstrap_bytes
+        self.lines = deque(maxlen=max_lines)
+        self.seq = 0
+        self.evicted_seq = 0
+        self._offset = None
+        self._inode = None
+        self._partial = b''     # неповний останній рядок (байти: UTF-8 символ може бути розірваний)
+        self._skip_first = False
+        self._lock = threading.Lock()
+        self._changed = threading.Condition(self._lock)
+        self._watcher = None
+        self.stats = {'polls': 0, 'lines_read': 0, 'rotations': 0, 'clients': 0}
+
+    def poll(self) -> int:
+        """Reads only bytes appended since the previous poll; handles rotation and truncation"""
+        with self._lock:
+            self.stats['polls'] += 1
+            try:
+                st = os.stat(self.path)
+            except FileNotFoundError:
+                return 0
+            if self._inode is not None and (st.st_ino != self._inode or st.st_size < self._offset):
+                self.stats['rotations'] += 1
+                self._offset, self._partial, self._skip_first = 0, b'', False
+            self._inode = st.st_ino
+            if self._offset is None:
+                self._offset = max(0, st.st_size - self.bootstrap_bytes)
+                # Старт із середини файлу — перший рядок обрізаний
+                self._skip_first = self._offset > 0
+            if st.st_size == self._offset:
+                return 0
+            with open(self.path, 'rb') as f:
+                f.seek(self._offset)
+                data = f.read(st.st_size - self._offset)
+            self._offset += len(data)
+            # Ділимо байти, а не текст: декодуємо лише повні рядки, як LogTail у log_index
+            raw_lines = (self._partial + data).split(b'\n')
+            self._partial = raw_lines.pop()
+            if self._skip_first and raw_lines:
+                self._skip_first = False
+                raw_lines = raw_lines[1:]
+            lines = [raw.decode('utf-8', errors='replace').rstrip('\r') for raw in raw_lines]
+            added = 0
+            for line in lines:
+                if not line.strip():
+                    continue
+                self.seq += 1
+                if len(self.lines) == self.lines.maxlen:
+                    self.evicted_seq = self.lines[0]['seq']
+                self.lines.append({'seq': self.seq, 'level': detect_level(line), 'line': line + '\n'})
+                added += 1
+            self.stats['lines_read'] += added
+            if added:
+                self._changed.notify_all()
+            return added
+
+    def start_watcher(self, interval: float = LOG_STREAM_INTERVAL):
+        with self._lock:
+            if self._watcher is not None:
+                return
+            self._watcher = threading.Thread(target=self._watch, args=(interval,), daemon=True,
+                                             name='atlas-log-watcher')
+            self._watcher.start()
+
+    def _watch(self, interval: float):
+        while True:
+            try:
+                self.poll()
+            except Exception as e:
+                logger.warning(f"Log poll failed for {self.path}: {e}")
+            time.sleep(interval)
+
+    def tail(self, limit: int, since: Optional[int] = None) -> Dict[str, Any]:
+        """Останні limit рядків (або лише новіші за since) для /logs"""
+        self.poll()
+        with self._lock:
+            entries = [e for e in self.lines if since is None or e['seq'] > since]
+            cursor = self.seq
+        entries = entries[-limit:]
+        return {'logs': [e['line'] for e in entries], 'count': len(entries), 'cursor': cursor}
+
+    def entries_since(self, cursor: int, levels: Optional[List[str]] = None,
+                      max_items: int = LOG_STREAM_MAX_BATCH):
+        """(entries, new_cursor, gap); gap — пропущений діапазон seq (витіснений або відкинутий)"""
+        with self._lock:
+            new_cursor = self.seq
+            entries = []
+            for entry in reversed(self.lines):
+                if entry['seq'] <= cursor:
+                    break
+                if not levels or entry['level'] in levels:
+                    entries.append(entry)
+            evicted = self.evicted_seq
+        entries.reverse()
+        gap = (cursor + 1, evicted) if evicted > cursor else None
+        if len(entries) > max_items:
+            gap = (cursor + 1, max(entries[-max_items - 1]['seq'], gap[1] if gap else 0))
+            entries = entries[-max_items:]
+        return entries, new_cursor, gap
+
+    def sse(self, cursor: Optional[int] = None, levels: Optional[List[str]] = None,
+            heartbeat: float = LOG_STREAM_HEARTBEAT):
+        """SSE generator: backlog after cursor, then live lines; повільний клієнт отримує event: gap"""
+        self.start_watcher()
+        if cursor is None:
+            self.poll()
+            cursor = self.seq
+        yield f"retry: 3000\nid: {cursor}\n\n"
+        last_sent = time.monotonic()
+        while True:
+            entries, new_cursor, gap = self.entries_since(cursor, levels)
+            if gap:
+                yield f"event: gap\ndata: {json.dumps({'from': gap[0], 'to': gap[1]})}\n\n"
+            for entry in entries:
+                yield f"id: {entry['seq']}\ndata: {json.dumps(entry, ensure_ascii=False)}\n\n"
+            if entries or gap or new_cursor != cursor:
+                if not entries or entries[-1]['seq'] != new_cursor:
+                    yield f"id: {new_cursor}\n\n"
+                cursor = new_cursor
+                last_sent = time.monotonic()
+            elif time.monotonic() - last_sent >= heartbeat:
+                yield ": ping\n\n"
+                last_sent = time.monotonic()
+            with self._changed:
+                if self.seq <= cursor:
+                    self._changed.wait(heartbeat)
@@ -14,6 +14,8 @@ from typing import Dict, Any, Optional, List
 from dataclasses import dataclass
 import aiohttp
 
+from audio_utils import decode_audio_bytes, speech_bounds, ResultCache, WHISPER_SAMPLE_RATE
+
 logger = logging.getLogger('atlas.voice_system')
 
 @dataclass
@@ -26,10 +28,12 @@ class VoiceRequest:
 
 @dataclass 
 class STTRequest:
-    """Запит на розпізнавання мови"""
-    audio_file: str
+    """Запит на розпізнавання мови (шлях до файлу або байти з пам'яті)"""
+    audio_file: Optional[str] = None
     language: str = 'uk'
     model: str = 'large-v3'
+    audio_bytes: Optional[bytes] = None
+    audio_format: str = 'wav'
 
 class VoiceSystem:
     """Система голосового інтерфейсу з TTS та STT"""
@@ -80,9 +84,17 @@ class VoiceSystem:
             'stt_successful': 0,
             'stt_failed': 0,
             'average_tts_time': 0,
-            'average_stt_time': 0
+            'average_stt_time': 0,
+            'stt_cache_hits': 0,
+            'stt_silent_skipped': 0,
+            'stt_audio_seconds_in': 0.0,
+            'stt_audio_seconds_trimmed': 0.0
         }
         
+        # Препроцесинг STT: обрізка тиші VAD та кеш результатів за хешем аудіо
+        self.stt_vad_trim = config.get('stt_vad_trim', True)
+        self.stt_cache = ResultCache(config.get('stt_cache_size', 128))
+        
         # Статус системи
         self.tts_available = False
         self.stt_available = False
@@ -269,13 +281,78 @@ class VoiceSystem:
                     compute_type=compute_type
                 )
             
-            # Розпізнаємо аудіо
-            segments, info = self._whisper_model.transcribe(
-                request.audio_file,
-                beam_size=5,
-                language=request.language,
-                temperature=0.0
-            )
+            # Кеш: повторні запити з тим самим аудіо не викликають модель
+            audio_bytes = request.audio_bytes
+            audio_format = request.audio_format
+            if audio_bytes is None and request.audio_file:
+                with open(request.audio_file, 'rb') as f:
+                    audio_bytes = f.read()
+                audio_format = request.audio_file.rsplit('.', 1)[-1].lower()
+            if audio_bytes is None:
+                raise ValueError("No audio provided")
+            
+            cache_key = ResultCache.make_key(audio_bytes, request.language, 5, 0.0)
+            cached = self.stt_cache.get(cache_key)
+            if cached is not None:
+                execution_time = time.time() - start_time
+                self.stats['stt_cache_hits'] += 1
+                self._update_stt_stats(execution_time, True)
+                return {**cached, 'cached': True, 'execution_time': execution_time}
+            
+            # Розпізнаємо аудіо: масив з пам'яті, або файл як fallback
+            temp_path = None
+            offset = 0.0
+            audio_input = decode_audio_bytes(audio_bytes, audio_format)
+            if audio_input is not None:
+                duration = audio_input.size / WHISPER_SAMPLE_RATE
+                bounds = speech_bounds(audio_input) if self.stt_vad_trim else (0, audio_input.size)
+                self.stats['stt_audio_seconds_in'] += duration
+                if bounds is None:
+                    # Суцільна тиша — модель не викликаємо
+                    self.stats['stt_silent_skipped'] += 1
+                    self.stats['stt_audio_seconds_trimmed'] += duration
+                    execution_time = time.time() - start_time
+                    self._update_stt_stats(execution_time, True)
+                    result = {
+                        'success': True,
+                        'text': '',
+                        'language': request.language,
+                        'language_probability': 0.0,
+                        'duration': duration,
+                        'segments': [],
+                        'skipped': 'silence'
+                    }
+                    self.stt_cache.put(cache_key, result)
+                    return {**result, 'execution_time': execution_time}
+                start, end = bounds
+                self.stats['stt_audio_seconds_trimmed'] += duration - (end - start) / WHISPER_SAMPLE_RATE
+                offset = start / WHISPER_SAMPLE_RATE
+                audio_input = audio_input[start:end]
+            elif request.audio_file:
+                audio_input = request.audio_file
+                duration = None
+            else:
+                # Формат потребує ffmpeg — лише тоді пишемо на диск
+                with tempfile.NamedTemporaryFile(delete=False, suffix=f".{audio_format}") as temp_file:
+                    temp_file.write(audio_bytes)
+                    temp_path = temp_file.name
+                audio_input = temp_path
+                duration = None
+            
+            try:
+                segments, info = self._whisper_model.transcribe(
+                    audio_input,
+                    beam_size=5,
+                    language=request.language,
+                    temperature=0.0
+                )
+                segments = list(segments)
+            finally:
+                if temp_path:
+                    try:
+                        os.unlink(temp_path)
+                    except OSError:
+                        pass
             
             # Збираємо результат
             full_text = ""
@@ -283,8 +360,8 @@ class VoiceSystem:
             
             for segment in segments:
                 segment_data = {
-                    'start': segment.start,
-                    'end': segment.end,
+                    'start': segment.start + offset,
+                    'end': segment.end + offset,
                     'text': segment.text
                 }
                 segments_list.append(segment_data)
@@ -298,10 +375,11 @@ class VoiceSystem:
                 'text': full_text.strip(),
                 'language': info.language,
                 'language_probability': info.language_probability,
-                'duration': info.duration,
+                'duration': duration if duration is not None else info.duration,
                 'segments': segments_list,
                 'execution_time': execution_time
             }
+            self.stt_cache.put(cache_key, result)
             
             logger.info(f"✅ STT transcription successful: '{full_text[:100]}...' in {execution_time:.2f}s")
             return result
@@ -7,17 +7,16 @@ ATLAS Web Interface
 import asyncio
 import json
 import logging
+import threading
 import time
-import tempfile
-import os
 from typing import Dict, Any, Optional
 from pathlib import Path
-from flask import Flask, render_template, jsonify, request, send_file, make_response
+from flask import Flask, render_template, jsonify, request, make_response, Response, stream_with_context
 from dataclasses import asdict
-import threading
 
 # Імпортуємо компоненти системи
 from intelligent_engine import intelligent_engine, IntelligentRequest
+from log_stream import LogStream
 
 logger = logging.getLogger('atlas.web_interface')
 
@@ -42,6 +41,11 @@ class WebInterface:
             template_folder=str(self.templates_dir)
         )
         
+        # Головний лог: читається інкрементально, спільний для /logs та /logs/stream
+        self.log_stream = LogStream(Path('..') / 'logs' / 'atlas_intelligent.log')
+        self.max_log_clients = config.get('max_log_stream_clients', 16)
+        self._log_clients_lock = threading.Lock()
+
         # Налаштовуємо CORS
         self._setup_cors()
         
@@ -101,25 +105,54 @@ class WebInterface:
 
         @self.app.route('/logs')
         def get_logs():
-            """Повертає останні N рядків з головного лог-файлу (спрощено)"""
+            """Повертає останні N рядків з головного лог-файлу (since — лише новіші за курсор)"""
             limit = 100
+            since = None
             try:
                 limit_arg = request.args.get('limit')
                 if limit_arg:
                     limit = max(10, min(1000, int(limit_arg)))
+                if request.args.get('since'):
+                    since = int(request.args.get('since'))
             except Exception:
                 pass
 
-            log_path = Path('..') / 'logs' / 'atlas_intelligent.log'
-            if not log_path.exists():
+            if not self.log_stream.path.exists():
                 return jsonify({'logs': [], 'error': 'log file not found'}), 404
             try:
-                # Читаємо безпечним способом
-                with open(log_path, 'r', encoding='utf-8', errors='replace') as f:
-                    lines = f.readlines()[-limit:]
-                return jsonify({'logs': lines, 'count': len(lines)})
+                # Читаємо лише дописане з останнього запиту
+                return jsonify(self.log_stream.tail(limit, since))
             except Exception as e:
                 return jsonify({'logs': [], 'error': str(e)}), 500
+
+        @self.app.route('/logs/stream')
+        def stream_logs():
+            """Живий потік логів (SSE); level фільтрується на сервері, Last-Event-ID — продовження"""
+            levels = [x.lower() for x in request.args.get('level', '').split(',') if x] or None
+            since = request.headers.get('Last-Event-ID') or request.args.get('since')
+            try:
+                since = int(since) if since else None
+            except ValueError:
+                return jsonify({'error': 'invalid cursor'}), 400
+
+            stats = self.log_stream.stats
+            # Перевірка ліміту й інкремент — атомарно, інакше паралельні підключення перевищать ліміт
+            with self._log_clients_lock:
+                if stats['clients'] >= self.max_log_clients:
+                    return jsonify({'error': 'too many log stream clients', 'fallback': '/logs'}), 503
+                stats['clients'] += 1
+
+            def generate():
+                try:
+                    yield from self.log_stream.sse(cursor=since, levels=levels)
+                finally:
+                    with self._log_clients_lock:
+                        stats['clients'] -= 1
+
+            return Response(stream_with_context(generate()), mimetype='text/event-stream', headers={
+                'Cache-Control': 'no-cache',
+                'X-Accel-Buffering': 'no'
+            })
         
         @self.app.route('/api/chat', methods=['POST'])
         def chat():
@@ -219,19 +252,10 @@ class WebInterface:
                 )
                 
                 if audio_data:
-                    # Створюємо тимчасовий файл для аудіо
-                    with tempfile.NamedTemporaryFile(delete=False, suffix='.wav') as temp_file:
-                        temp_file.write(audio_data)
-                        temp_path = temp_file.name
-                    
-                    response = make_response(
-                        send_file(temp_path, mimetype='audio/wav', as_attachment=False)
-                    )
+                    # Віддаємо байти WAV напряму, без тимчасового файлу
+                    response = make_response(audio_data)
+                    response.headers['Content-Type'] = 'audio/wav'
                     response.headers['Cache-Control'] = 'no-store'
-                    
-                    # Очищаємо тимчасовий файл через деякий час
-                    threading.Timer(60.0, lambda: self._cleanup_temp_file(temp_path)).start()
-                    
                     return response
                 else:
                     # Повертаємо мовчанку якщо TTS не вдався
@@ -255,29 +279,21 @@ class WebInterface:
                 if file.filename == '':
                     return jsonify({'success': False, 'error': 'No file selected'}), 400
                 
-                # Зберігаємо тимчасово
-                with tempfile.NamedTemporaryFile(delete=False, suffix='.wav') as temp_file:
-                    file.save(temp_file.name)
-                    temp_path = temp_file.name
+                # Передаємо байти напряму, без тимчасового файлу
+                from voice_system import STTRequest
+                audio_format = file.filename.rsplit('.', 1)[1].lower() if '.' in file.filename else 'wav'
+                stt_request = STTRequest(
+                    audio_bytes=file.read(),
+                    audio_format=audio_format,
+                    language=request.form.get('language', 'uk'),
+                    model=request.form.get('model', 'large-v3')
+                )
                 
-                try:
-                    # Розпізнаємо через voice system
-                    from voice_system import STTRequest
-                    stt_request = STTRequest(
-                        audio_file=temp_path,
-                        language=request.form.get('language', 'uk'),
-                        model=request.form.get('model', 'large-v3')
-                    )
-                    
-                    result = asyncio.run(
-                        intelligent_engine.voice_system.transcribe_audio(stt_request)
-                    )
-                    
-                    return jsonify(result or {'success': False, 'error': 'STT not available'})
-                    
-                finally:
-                    # Очищаємо тимчасовий файл
-                    self._cleanup_temp_file(temp_path)
+                result = asyncio.run(
+                    intelligent_engine.voice_system.transcribe_audio(stt_request)
+                )
+                
+                return jsonify(result or {'success': False, 'error': 'STT not available'})
                     
             except Exception as e:
                 logger.error(f"STT transcription failed: {e}")
@@ -353,14 +369,6 @@ class WebInterface:
             logger.error(f"Failed to generate silence: {e}")
             return jsonify({'error': 'TTS synthesis failed'}), 500
     
-    def _cleanup_temp_file(self, file_path: str):
-        """Очищає тимчасовий файл"""
-        try:
-            if os.path.exists(file_path):
-                os.unlink(file_path)
-        except Exception as e:
-            logger.warning(f"Failed to cleanup temp file {file_path}: {e}")
-    
     async def _get_voice_agents_info(self) -> Dict[str, Any]:
         """Повертає інформацію про голосових агентів"""
         try:
@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+Ukrainian TTS Audio Codec
+Кодування відповіді TTS у WAV (PCM16), OGG/Vorbis або OGG/Opus через soundfile.
+
+Кодування відбувається один раз на TTS-сервері; проксі (atlas_server) віддають
+байти як є разом із Content-Type, тож стиснення працює на всьому шляху до браузера.
+"""
+
+import io
+import os
+import time
+import logging
+from functools import lru_cache
+from math import gcd
+
+import numpy as np
+import soundfile as sf
+from scipy.signal import resample_poly
+
+logger = logging.getLogger('ukrainian-tts-codec')
+
+# format -> (контейнер soundfile, subtype, mimetype, розширення)
+FORMATS = {
+    'wav': ('WAV', 'PCM_16', 'audio/wav', 'wav'),
+    'ogg': ('OGG', 'VORBIS', 'audio/ogg', 'ogg'),
+    'opus': ('OGG', 'OPUS', 'audio/ogg; codecs=opus', 'opus'),
+}
+DEFAULT_FORMAT = os.environ.get('TTS_AUDIO_FORMAT', 'wav')
+
+# libsndfile приймає Opus лише на цих частотах
+OPUS_RATES = (8000, 12000, 16000, 24000, 48000)
+MIN_SAMPLE_RATE = 8000
+# Допустимі значення параметра запиту sample_rate (вище рідної частоти моделі не піднімаємо)
+SAMPLE_RATES = (8000, 11025, 12000, 16000, 22050, 24000, 32000, 44100, 48000)
+
+# 0.0 — найвища якість / бітрейт, 1.0 — найменший розмір (None — значення libsndfile)
+_level = os.environ.get('TTS_COMPRESSION_LEVEL')
+COMPRESSION_LEVEL = float(_level) if _level else None
+
+
+def resolve_format(name=None):
+    """Нормалізує назву формату; невідомі або не підтримані libsndfile значення → None (помилка запиту)"""
+    name = str(name or DEFAULT_FORMAT).lower()
+    if name in ('oga', 'vorbis'):
+        name = 'ogg'
+    return name if name in supported_formats() else None
+
+
+@lru_cache(maxsize=1)
+def _available_formats():
+    available = []
+    for name, (container, subtype, _, _) in FORMATS.items():
+        try:
+            if subtype in sf.available_subtypes(container):
+                available.append(name)
+        except Exception:
+            pass
+    return tuple(available)
+
+
+def supported_formats():
+    """Формати, які підтримує встановлений libsndfile"""
+    return list(_available_formats())
+
+
+def resolve_sample_rate(value=None):
+    """Запитана вихідна частота: None — не задано; нечислове чи непідтримуване значення → ValueError"""
+    if value is None or value == '':
+        return None
+    if isinstance(value, bool):
+        raise ValueError(f"Invalid sample_rate: {value!r}")
+    try:
+        rate = float(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"Invalid sample_rate: {value!r}")
+    if not rate.is_integer() or int(rate) not in SAMPLE_RATES:
+        raise ValueError(f"Unsupported sample_rate: {value!r}")
+    return int(rate)
+
+
+def target_rate(fmt, sr, sample_rate=None):
+    """Частота вихідного файлу: запитана (не вище рідної), для Opus — найближча допустима зверху"""
+    rate = int(sr)
+    if sample_rate:
+        rate = max(MIN_SAMPLE_RATE, min(int(sample_rate), rate))
+    if fmt == 'opus' and rate not in OPUS_RATES:
+        rate = next((r for r in OPUS_RATES if r >= rate), OPUS_RATES[-1])
+    return rate
+
+
+def resample(audio, sr, target_sr):
+    if int(target_sr) == int(sr) or audio.size == 0:
+        return audio
+    g = gcd(int(sr), int(target_sr))
+    return resample_poly(audio, int(target_sr) // g, int(sr) // g).astype(np.float32)
+
+
+def encode(audio, sr, fmt='wav', sample_rate=None):
+    """Кодує аудіо; повертає dict(data, mimetype, extension, sample_rate, encode_time)"""
+    started = time.time()
+    container, subtype, mimetype, extension = FORMATS[fmt]
+    rate = target_rate(fmt, sr, sample_rate)
+    audio = resample(np.asarray(audio, dtype=np.float32), sr, rate)
+
+    kwargs = {}
+    if COMPRESSION_LEVEL is not None and fmt != 'wav':
+        kwargs['compression_level'] = COMPRESSION_LEVEL
+    buf = io.BytesIO()
+    sf.write(buf, np.clip(audio, -1.0, 1.0), rate, format=container, subtype=subtype, **kwargs)
+    return {
+        'data': buf.getvalue(),
+        'mimetype': mimetype,
+        'extension': extension,
+        'sample_rate': rate,
+        'encode_time': time.time() - started
+    }
@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""
+DSP benchmark: fast (WSOLA + resample) vs librosa (phase vocoder)
+
+Для кожної операції (time-stretch / pitch-shift) і бекенда вимірює:
+  * RTF      — час обробки / тривалість аудіо (медіана з --repeat запусків)
+  * dur_err  — відхилення довжини результату від очікуваної, %
+  * f0_cents — похибка середнього тону від очікуваного, центи
+  * ltas_db  — відстань довгострокового спектра до librosa-результату, дБ
+
+Приклад:
+  python benchmarks/dsp_bench.py --input test.wav --repeat 5 --json dsp_bench.json
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+
+import numpy as np
+import soundfile as sf
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import dsp  # noqa: E402
+
+STRETCH_RATES = [0.8, 0.9, 1.1, 1.25]
+PITCH_STEPS = [-6, -4, -3, 3]
+
+
+def load_audio(path):
+    if path and os.path.isfile(path):
+        audio, sr = sf.read(path, dtype='float32')
+        if audio.ndim > 1:
+            audio = audio.mean(axis=1)
+        return audio, sr
+    # Синтетичний «голос»: гармоніки 140 Гц з повільною модуляцією тону та амплітуди
+    sr = 22050
+    t = np.arange(sr * 4) / sr
+    f0 = 140 * (1 + 0.05 * np.sin(2 * np.pi * 0.7 * t))
+    phase = 2 * np.pi * np.cumsum(f0) / sr
+    audio = sum(np.sin(h * phase) / h for h in range(1, 12))
+    audio *= 0.5 + 0.5 * np.abs(np.sin(2 * np.pi * 2.5 * t))
+    return (0.2 * audio).astype(np.float32), sr
+
+
+def median_f0(audio, sr, fmin=60.0, fmax=400.0):
+    """Медіанний f0 за автокореляцією по гучних кадрах"""
+    frame = int(sr * 0.04)
+    hop = frame // 2
+    lo, hi = int(sr / fmax), int(sr / fmin)
+    values = []
+    rms_floor = 0.1 * float(np.sqrt(np.mean(audio ** 2)) or 1.0)
+    for start in range(0, audio.size - frame, hop):
+        x = audio[start:start + frame]
+        if np.sqrt(np.mean(x ** 2)) < rms_floor:
+            continue
+        x = x - x.mean()
+        ac = np.correlate(x, x, mode='full')[frame - 1:]
+        if ac[0] <= 0:
+            continue
+        lag = lo + int(np.argmax(ac[lo:hi]))
+        if ac[lag] / ac[0] > 0.3:
+            values.append(sr / lag)
+    return float(np.median(values)) if values else 0.0
+
+
+def ltas_db(audio, n_fft=1024):
+    frames = np.lib.stride_tricks.sliding_window_view(audio, n_fft)[::n_fft // 2] * np.hanning(n_fft)
+    spec = np.mean(np.abs(np.fft.rfft(frames, axis=1)) ** 2, axis=0)
+    return 10 * np.log10(spec + 1e-12)
+
+
+def ltas_distance(a, b):
+    da, db = ltas_db(a), ltas_db(b)
+    return float(np.sqrt(np.mean(((da - da.mean()) - (db - db.mean())) ** 2)))
+
+
+def timed(fn, repeat):
+    fn()  # прогрів (імпорт librosa, кеші numba)
+    times = []
+    out = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        out = fn()
+        times.append(time.perf_counter() - started)
+    return out, float(np.median(times))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark TTS DSP backends")
+    parser.add_argument("--input", default=None, help="WAV file (default: synthetic harmonic signal)")
+    parser.add_argument("--repeat", type=int, default=3, help="Timed runs per case")
+    parser.add_argument("--json", default=None, help="Write results to JSON file")
+    args = parser.parse_args()
+
+    audio, sr = load_audio(args.input)
+    duration = audio.size / sr
+    base_f0 = median_f0(audio, sr)
+
+    backends = ['fast']
+    try:
+        import librosa  # noqa: F401
+        backends.append('librosa')
+    except ImportError:
+        print("librosa not installed — benchmarking fast backend only")
+
+    cases = [('stretch', r) for r in STRETCH_RATES] + [('pitch', s) for s in PITCH_STEPS]
+    results = []
+    print(f"input: {args.input or 'synthetic'}  sr={sr}  duration={duration:.2f}s  f0={base_f0:.1f} Hz")
+    print(f"{'op':8} {'param':>6} {'backend':8} {'RTF':>7} {'dur_err%':>9} {'f0_cents':>9} {'ltas_db':>8}")
+
+    for op, param in cases:
+        outputs = {}
+        for backend in backends:
+            if op == 'stretch':
+                fn = lambda: dsp.time_stretch(audio, sr, param, backend=backend)  # noqa: E731
+                expected_len = audio.size / param
+                expected_f0 = base_f0
+            else:
+                fn = lambda: dsp.pitch_shift(audio, sr, param, backend=backend)  # noqa: E731
+                expected_len = audio.size
+                expected_f0 = base_f0 * 2 ** (param / 12.0)
+            out, elapsed = timed(fn, args.repeat)
+            outputs[backend] = out
+            f0 = median_f0(out, sr)
+            results.append({
+                'op': op,
+                'param': param,
+                'backend': backend,
+                'rtf': elapsed / duration,
+                'ms': elapsed * 1000,
+                'dur_err_pct': 100 * abs(out.size - expected_len) / expected_len,
+                'f0_cents': 1200 * np.log2(f0 / expected_f0) if f0 and expected_f0 else None
+            })
+        ref = outputs.get('librosa')
+        for row in results[-len(backends):]:
+            row['ltas_db'] = ltas_distance(outputs[row['backend']], ref) if ref is not None else None
+            cents = f"{row['f0_cents']:+9.1f}" if row['f0_cents'] is not None else f"{'-':>9}"
+            ltas = f"{row['ltas_db']:8.2f}" if row['ltas_db'] is not None else f"{'-':>8}"
+            print(f"{op:8} {param:>6} {row['backend']:8} {row['rtf']:7.4f} {row['dur_err_pct']:9.2f} {cents} {ltas}")
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump({'input': args.input, 'sr': sr, 'duration': duration, 'results': results}, f, indent=2)
+        print(f"Results written to {args.json}")
+
+
+if __name__ == '__main__':
+    main()
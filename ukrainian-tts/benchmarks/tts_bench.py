@@ -0,0 +1,338 @@
+#!/usr/bin/env python3
+"""
+TTS benchmark: UkrainianTTSServer у процесі (Flask test_client) або по HTTP
+
+Для кожного випадку (голос × довжина тексту × швидкість × FX-пресет) вимірює:
+  * RTF          — час запиту / тривалість отриманого аудіо (медіана)
+  * p50/p95 ms   — латентність запиту /tts
+Далі — прогін конкурентності 1..N (запити/с, секунди аудіо за секунду, p50/p95)
+та пікова RSS (процес + воркери пулу).
+
+Результати пишуться в JSON; --compare порівнює з попереднім прогоном і
+повертає код 1, якщо метрика погіршилась більше ніж на --tolerance.
+
+Приклади:
+  python benchmarks/tts_bench.py --workers 2 --json bench_base.json
+  python benchmarks/tts_bench.py --url http://127.0.0.1:3001 --concurrency 8 --compare bench_base.json
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import platform
+import resource
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+TEXTS = {
+    'short': 'Привіт! Я готовий до роботи.',
+    'medium': ('Сьогодні ми перевіряємо швидкість синтезу мовлення. '
+               'Система має відповідати швидко, чітко і без затримок, навіть коли запитів багато.'),
+    'long': ' '.join([
+        'Атлас отримав завдання і розбив його на кілька кроків.',
+        'Спочатку Тетяна перевірить файли проєкту, потім запустить тести та збере результати.',
+        'Гриша стежить за безпекою: жодна команда не виконується без перевірки, а всі зміни записуються в журнал.',
+        'Коли всі кроки завершено, ми коротко підсумуємо, що вдалося, що ні, і які дії потрібні далі.',
+    ] * 3),
+}
+
+# Метрики для --compare (менше — краще; для прогону конкурентності throughput — навпаки)
+COMPARE_METRICS = ('rtf', 'p50_ms', 'p95_ms')
+SWEEP_METRICS = ('throughput_rps', 'audio_sec_per_sec', 'p50_ms', 'p95_ms')
+
+
+def percentile(values, q):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return float(ordered[min(len(ordered) - 1, int(len(ordered) * q))])
+
+
+class InProcessClient:
+    """UkrainianTTSServer у цьому процесі, запити через Flask test_client"""
+
+    name = 'in-process'
+
+    def __init__(self, workers, warmup):
+        from tts_server import UkrainianTTSServer
+        self.server = UkrainianTTSServer(workers=workers, warmup=warmup)
+        if warmup:
+            # Воркери, а потім FX-пресети (окремий потік сервера)
+            deadline = time.time() + self.server.pool.start_timeout
+            self.server.pool.wait_warm(self.server.pool.start_timeout)
+            while not self.server.warm and time.time() < deadline:
+                time.sleep(0.05)
+        self._local = threading.local()
+
+    def _client(self):
+        # test_client не потокобезпечний — по одному на потік
+        if not hasattr(self._local, 'client'):
+            self._local.client = self.server.app.test_client()
+        return self._local.client
+
+    def get_json(self, path):
+        return self._client().get(path).get_json()
+
+    def post_tts(self, payload):
+        r = self._client().post('/tts', json=payload)
+        return r.status_code, r.headers, r.data
+
+    def close(self):
+        self.server.pool.shutdown()
+
+
+class HTTPClient:
+    name = 'http'
+
+    def __init__(self, url, timeout=120):
+        import requests
+        self.url = url.rstrip('/')
+        self.timeout = timeout
+        self._requests = requests
+        self._local = threading.local()
+
+    def _session(self):
+        if not hasattr(self._local, 'session'):
+            self._local.session = self._requests.Session()
+        return self._local.session
+
+    def get_json(self, path):
+        return self._session().get(f"{self.url}{path}", timeout=10).json()
+
+    def post_tts(self, payload):
+        r = self._session().post(f"{self.url}/tts", json=payload, timeout=self.timeout)
+        return r.status_code, r.headers, r.content
+
+    def close(self):
+        pass
+
+
+class RSSSampler:
+    """Пікова RSS процесу та його дочірніх процесів (psutil, якщо встановлено; інакше getrusage)"""
+
+    def __init__(self, pid=None, interval=0.2):
+        self.pid = pid or os.getpid()
+        self.interval = interval
+        self.peak_mb = 0.0
+        self._stop = threading.Event()
+        self._thread = None
+        try:
+            import psutil
+            self._proc = psutil.Process(self.pid)
+        except Exception:
+            self._proc = None
+
+    def _sample(self):
+        procs = [self._proc] + self._proc.children(recursive=True)
+        total = 0
+        for proc in procs:
+            try:
+                total += proc.memory_info().rss
+            except Exception:
+                pass
+        self.peak_mb = max(self.peak_mb, total / 1024 / 1024)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self._sample()
+            except Exception:
+                break
+
+    def start(self):
+        if self._proc is not None:
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=1)
+        if self._proc is None and self.pid == os.getpid():
+            # ru_maxrss: КіБ на Linux, байти на macOS; дочірні враховуються після завершення
+            scale = 1024 * 1024 if sys.platform == 'darwin' else 1024
+            own = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / scale
+            children = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / scale
+            self.peak_mb = own + children
+        return round(self.peak_mb, 1) if self.peak_mb else None
+
+
+def run_request(client, payload):
+    started = time.perf_counter()
+    status, headers, body = client.post_tts(payload)
+    elapsed = time.perf_counter() - started
+    duration = float(headers.get('X-Audio-Duration') or 0.0)
+    return status, elapsed, duration, len(body)
+
+
+def bench_cases(client, voices, lengths, speeds, fx_presets, repeat, audio_format):
+    rows = []
+    print(f"{'voice':10} {'text':7} {'speed':>5} {'fx':24} {'RTF':>7} {'p50_ms':>8} {'p95_ms':>8} {'bytes':>9}")
+    for voice in voices:
+        for length in lengths:
+            for speed in speeds:
+                for fx in fx_presets:
+                    payload = {'text': TEXTS[length], 'voice': voice, 'speed': speed, 'fx': fx,
+                               'return_audio': True, 'format': audio_format}
+                    latencies, rtfs, errors, size = [], [], 0, 0
+                    for _ in range(repeat):
+                        status, elapsed, duration, size = run_request(client, payload)
+                        if status != 200 or not duration:
+                            errors += 1
+                            continue
+                        latencies.append(elapsed * 1000)
+                        rtfs.append(elapsed / duration)
+                    row = {
+                        'key': f"{voice}/{length}/{speed}/{fx}",
+                        'voice': voice, 'text': length, 'speed': speed, 'fx': fx,
+                        'rtf': round(percentile(rtfs, 0.5), 4),
+                        'p50_ms': round(percentile(latencies, 0.5), 1),
+                        'p95_ms': round(percentile(latencies, 0.95), 1),
+                        'bytes': size,
+                        'errors': errors
+                    }
+                    rows.append(row)
+                    print(f"{voice:10} {length:7} {speed:5.2f} {fx:24} {row['rtf']:7.3f} "
+                          f"{row['p50_ms']:8.1f} {row['p95_ms']:8.1f} {size:9d}" + (f"  errors={errors}" if errors else ''))
+    return rows
+
+
+def bench_concurrency(client, levels, requests_per_level, voice, length, audio_format):
+    rows = []
+    payload = {'text': TEXTS[length], 'voice': voice, 'return_audio': True, 'format': audio_format}
+    print(f"\n{'conc':>4} {'req/s':>7} {'audio_s/s':>9} {'p50_ms':>8} {'p95_ms':>8} {'errors':>6}")
+    for level in levels:
+        total = max(level, requests_per_level)
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=level) as executor:
+            results = list(executor.map(lambda _: run_request(client, payload), range(total)))
+        wall = time.perf_counter() - started
+        ok = [r for r in results if r[0] == 200]
+        latencies = [r[1] * 1000 for r in ok]
+        row = {
+            'concurrency': level,
+            'requests': total,
+            'throughput_rps': round(len(ok) / wall, 3),
+            'audio_sec_per_sec': round(sum(r[2] for r in ok) / wall, 3),
+            'p50_ms': round(percentile(latencies, 0.5), 1),
+            'p95_ms': round(percentile(latencies, 0.95), 1),
+            'errors': total - len(ok)
+        }
+        rows.append(row)
+        print(f"{level:4d} {row['throughput_rps']:7.2f} {row['audio_sec_per_sec']:9.2f} "
+              f"{row['p50_ms']:8.1f} {row['p95_ms']:8.1f} {row['errors']:6d}")
+    return rows
+
+
+def compare(current, baseline, tolerance):
+    """Друкує зміни відносно baseline; повертає список регресій"""
+    regressions = []
+
+    def check(label, metric, new, old, higher_is_better=False):
+        if not old or new is None:
+            return
+        change = (new - old) / old
+        worse = -change if higher_is_better else change
+        flag = 'REGRESSION' if worse > tolerance else ''
+        print(f"  {label:44} {metric:18} {old:10.3f} -> {new:10.3f} ({change:+.1%}) {flag}")
+        if flag:
+            regressions.append({'case': label, 'metric': metric, 'baseline': old, 'current': new})
+
+    print(f"\nCompare with baseline (tolerance {tolerance:.0%}):")
+    base_cases = {row['key']: row for row in baseline.get('cases', [])}
+    for row in current['cases']:
+        old = base_cases.get(row['key'])
+        if old:
+            for metric in COMPARE_METRICS:
+                check(row['key'], metric, row[metric], old.get(metric))
+    base_sweep = {row['concurrency']: row for row in baseline.get('concurrency', [])}
+    for row in current['concurrency']:
+        old = base_sweep.get(row['concurrency'])
+        if old:
+            for metric in SWEEP_METRICS:
+                check(f"concurrency={row['concurrency']}", metric, row[metric], old.get(metric),
+                      higher_is_better=metric in ('throughput_rps', 'audio_sec_per_sec'))
+    if current.get('peak_rss_mb') and baseline.get('peak_rss_mb'):
+        check('process', 'peak_rss_mb', current['peak_rss_mb'], baseline['peak_rss_mb'])
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark Ukrainian TTS server")
+    parser.add_argument("--url", default=None, help="TTS server URL (default: run UkrainianTTSServer in-process)")
+    parser.add_argument("--pid", type=int, default=None, help="Server PID for RSS sampling in --url mode (needs psutil)")
+    parser.add_argument("--workers", type=int, default=2, help="Pool workers for in-process mode")
+    parser.add_argument("--no-warmup", action="store_true", help="Benchmark a cold in-process server")
+    parser.add_argument("--voices", default=None, help="Comma-separated voices (default: all from /voices)")
+    parser.add_argument("--lengths", default="short,medium,long", help=f"Text lengths: {','.join(TEXTS)}")
+    parser.add_argument("--speeds", default="1.0,1.2", help="Comma-separated speeds")
+    parser.add_argument("--fx", default="none,robot", help="Comma-separated FX presets, or 'all'")
+    parser.add_argument("--format", default="wav", help="Audio format: wav | ogg | opus")
+    parser.add_argument("--repeat", type=int, default=3, help="Requests per case")
+    parser.add_argument("--concurrency", type=int, default=4, help="Sweep concurrency 1..N")
+    parser.add_argument("--requests", type=int, default=8, help="Requests per concurrency level")
+    parser.add_argument("--json", default=None, help="Write results to JSON file")
+    parser.add_argument("--compare", default=None, help="Baseline JSON from a previous run")
+    parser.add_argument("--tolerance", type=float, default=0.10, help="Allowed relative regression (0.10 = 10%%)")
+    args = parser.parse_args()
+
+    rss = RSSSampler(pid=args.pid if args.url else None).start()
+    client = HTTPClient(args.url) if args.url else InProcessClient(args.workers, not args.no_warmup)
+    try:
+        health = client.get_json('/health')
+        voices = args.voices.split(',') if args.voices else client.get_json('/voices').get('voices', ['dmytro'])
+        fx_presets = args.fx.split(',')
+        if args.fx == 'all':
+            fx_presets = ['none'] + [p['id'] for p in client.get_json('/fx').get('presets', [])]
+        lengths = [length for length in args.lengths.split(',') if length in TEXTS]
+        speeds = [float(s) for s in args.speeds.split(',')]
+
+        print(f"mode: {client.name}  workers: {health.get('pool', {}).get('workers')}  "
+              f"device: {health.get('device')}  warm: {health.get('warm')}")
+        cases = bench_cases(client, voices, lengths, speeds, fx_presets, args.repeat, args.format)
+        sweep = bench_concurrency(client, list(range(1, args.concurrency + 1)), args.requests,
+                                  voices[0], 'medium', args.format)
+        stats = client.get_json('/stats')
+    finally:
+        client.close()
+    peak_rss = rss.stop()
+    print(f"\npeak RSS: {peak_rss if peak_rss is not None else 'n/a'} MB")
+
+    results = {
+        'timestamp': time.time(),
+        'mode': client.name,
+        'url': args.url,
+        'host': platform.node(),
+        'python': platform.python_version(),
+        'workers': health.get('pool', {}).get('workers'),
+        'device': health.get('device'),
+        'format': args.format,
+        'cases': cases,
+        'concurrency': sweep,
+        'peak_rss_mb': peak_rss,
+        'server_stats': stats
+    }
+
+    regressions = []
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        results['regressions'] = regressions
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2, ensure_ascii=False)
+        print(f"Results written to {args.json}")
+
+    if regressions:
+        print(f"{len(regressions)} regression(s) beyond {args.tolerance:.0%}")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,210 @@
+#!/usr/bin/env python3
+"""
+Ukrainian TTS DSP
+Зміна темпу та висоти тону для постобробки TTS з двома бекендами:
+  * fast    — WSOLA time-stretch + pitch через time-stretch і ресемплінг (numpy/scipy)
+  * librosa — фазовий вокодер STFT (librosa імпортується лише при першому виклику)
+"""
+
+import os
+import logging
+from fractions import Fraction
+
+import numpy as np
+from scipy.signal import resample_poly
+
+logger = logging.getLogger('ukrainian-tts-dsp')
+
+BACKENDS = ('fast', 'librosa')
+# За замовчуванням — librosa, як було до появи fast: звук існуючих клієнтів не змінюється, доки
+# якість fast не порівняна на реальних голосах (benchmarks/dsp_bench.py). fast — через
+# TTS_DSP_BACKEND=fast або "dsp": "fast" у запиті.
+DEFAULT_BACKEND = os.environ.get('TTS_DSP_BACKEND', 'librosa').lower()
+if DEFAULT_BACKEND not in BACKENDS:
+    DEFAULT_BACKEND = 'librosa'
+
+# Параметри WSOLA: вікно 30 мс з перекриттям 50%, пошук зсуву ±10 мс
+WSOLA_FRAME_MS = 30.0
+WSOLA_TOLERANCE_MS = 10.0
+
+
+def resolve_backend(name=None):
+    """Нормалізує назву бекенда; невідомі значення → бекенд за замовчуванням"""
+    name = (name or DEFAULT_BACKEND).lower()
+    return name if name in BACKENDS else DEFAULT_BACKEND
+
+
+# ---- fast ----
+
+def wsola_time_stretch(audio, sr, rate):
+    """WSOLA: rate > 1 — швидше (коротше), rate < 1 — повільніше"""
+    audio = np.asarray(audio, dtype=np.float32)
+    win = max(64, int(sr * WSOLA_FRAME_MS / 1000.0)) // 2 * 2
+    hop_out = win // 2
+    hop_in = hop_out * rate
+    delta = int(sr * WSOLA_TOLERANCE_MS / 1000.0)
+    window = np.hanning(win).astype(np.float32)
+
+    n_out = int(round(audio.size / rate))
+    n_frames = max(1, int(np.ceil(n_out / hop_out)))
+    # Запас з обох боків, щоб пошук зсуву не виходив за межі буфера
+    pad = delta + win
+    x = np.concatenate([np.zeros(pad, np.float32), audio, np.zeros(pad + int(hop_in * n_frames) + win, np.float32)])
+
+    out = np.zeros(n_frames * hop_out + win, dtype=np.float32)
+    norm = np.zeros_like(out)
+    prev = pad  # початок попереднього вибраного сегмента в x
+    for k in range(n_frames):
+        nominal = pad + int(round(k * hop_in))
+        if k == 0:
+            pos = nominal
+        else:
+            # Шаблон — природне продовження попереднього сегмента; шукаємо найсхожіший сегмент поруч з nominal
+            template = x[prev + hop_out: prev + hop_out + win]
+            lo = nominal - delta
+            region = x[lo: lo + win + 2 * delta]
+            scores = np.lib.stride_tricks.sliding_window_view(region, win) @ template
+            pos = lo + int(np.argmax(scores))
+        out[k * hop_out: k * hop_out + win] += window * x[pos: pos + win]
+        norm[k * hop_out: k * hop_out + win] += window
+        prev = pos
+
+    out = out[hop_out: hop_out + n_out]
+    norm = norm[hop_out: hop_out + n_out]
+    return (out / np.maximum(norm, 1e-3)).astype(np.float32)
+
+
+def _resample_to_length(audio, length):
+    """Поліфазний ресемплінг до заданої довжини (раціональне наближення коефіцієнта)"""
+    if audio.size == length or audio.size == 0:
+        return audio
+    ratio = Fraction(length, audio.size).limit_denominator(128)
+    y = resample_poly(audio, ratio.numerator, ratio.denominator).astype(np.float32)
+    if y.size >= length:
+        return y[:length]
+    return np.pad(y, (0, length - y.size))
+
+
+def fast_pitch_shift(audio, sr, n_steps):
+    """Зсув висоти: розтягнення в часі на 2^(n/12), потім ресемплінг до вихідної довжини"""
+    audio = np.asarray(audio, dtype=np.float32)
+    factor = 2.0 ** (float(n_steps) / 12.0)
+    stretched = wsola_time_stretch(audio, sr, 1.0 / factor)
+    return _resample_to_length(stretched, audio.size)
+
+
+# ---- склейка шматків довгого тексту ----
+
+def active_rms(audio, sr, frame_ms=20.0, floor_db=-40.0):
+    """RMS лише по кадрах мовлення (тиша й паузи не занижують гучність)"""
+    audio = np.asarray(audio, dtype=np.float32)
+    frame = max(1, int(sr * frame_ms / 1000.0))
+    n = audio.size // frame
+    if n == 0:
+        return float(np.sqrt(np.mean(audio ** 2))) if audio.size else 0.0
+    rms = np.sqrt(np.mean(audio[: n * frame].reshape(n, frame) ** 2, axis=1))
+    peak = float(rms.max())
+    if peak <= 0:
+        return 0.0
+    active = rms[rms >= peak * 10 ** (floor_db / 20.0)]
+    return float(np.sqrt(np.mean(active ** 2)))
+
+
+def trim_silence(audio, sr, threshold_db=-45.0, keep_ms=30.0, frame_ms=10.0):
+    """Обрізає тишу на краях, залишаючи keep_ms запасу"""
+    audio = np.asarray(audio, dtype=np.float32)
+    frame = max(1, int(sr * frame_ms / 1000.0))
+    n = audio.size // frame
+    if n == 0:
+        return audio
+    rms = np.sqrt(np.mean(audio[: n * frame].reshape(n, frame) ** 2, axis=1))
+    peak = float(rms.max())
+    if peak <= 0:
+        return audio[:0]
+    voiced = np.nonzero(rms >= peak * 10 ** (threshold_db / 20.0))[0]
+    keep = int(sr * keep_ms / 1000.0)
+    start = max(0, voiced[0] * frame - keep)
+    end = min(audio.size, (voiced[-1] + 1) * frame + keep)
+    return audio[start:end]
+
+
+def match_loudness(parts, sr, max_gain_db=6.0):
+    """Вирівнює активну гучність шматків до медіанної (підсилення обмежене ±max_gain_db)"""
+    levels = [active_rms(p, sr) for p in parts]
+    voiced = [lvl for lvl in levels if lvl > 0]
+    if not voiced:
+        return list(parts)
+    target = float(np.median(voiced))
+    limit = 10 ** (max_gain_db / 20.0)
+    out = []
+    for part, level in zip(parts, levels):
+        gain = np.clip(target / level, 1.0 / limit, limit) if level > 0 else 1.0
+        out.append((part * np.float32(gain)).astype(np.float32))
+    return out
+
+
+def crossfade_concat(parts, sr, gaps_ms=None, fade_ms=15.0):
+    """Склеює шматки з рівнопотужним кросфейдом fade_ms.
+
+    gaps_ms[i] — пауза тиші після шматка i (кросфейд тоді йде через тишу, без клацань).
+    Порожні шматки пропускаються; пауза між їхніми сусідами — найбільша з пропущених.
+    """
+    raw_gaps = list(gaps_ms or [])
+    kept, gaps_ms, pause = [], [], 0.0
+    for i, p in enumerate(parts):
+        gap = raw_gaps[i] if i < len(raw_gaps) else 0.0
+        if p is not None and len(p):
+            if kept:
+                gaps_ms.append(pause)
+            kept.append(np.asarray(p, dtype=np.float32))
+            pause = gap
+        elif kept:
+            pause = max(pause, gap)
+    parts = kept
+    if not parts:
+        return np.zeros(0, dtype=np.float32)
+    fade = max(1, int(sr * fade_ms / 1000.0))
+
+    pieces = [parts[0]]
+    for i, part in enumerate(parts[1:]):
+        gap = int(sr * (gaps_ms[i] if i < len(gaps_ms) else 0.0) / 1000.0)
+        if gap > 0:
+            pieces.append(np.zeros(gap, dtype=np.float32))
+        prev = pieces[-1]
+        n = min(fade, prev.size, part.size)
+        t = np.linspace(0.0, np.pi / 2, n, dtype=np.float32)
+        head = part.copy()
+        head[:n] = prev[-n:] * np.cos(t) + head[:n] * np.sin(t)
+        pieces[-1] = prev[: prev.size - n]
+        pieces.append(head)
+    return np.concatenate(pieces)
+
+
+# ---- публічний API ----
+
+def time_stretch(audio, sr, rate, backend=None):
+    if not rate or abs(rate - 1.0) <= 1e-3:
+        return audio
+    backend = resolve_backend(backend)
+    try:
+        if backend == 'librosa':
+            import librosa
+            return librosa.effects.time_stretch(audio, rate=rate).astype(np.float32)
+        return wsola_time_stretch(audio, sr, rate)
+    except Exception as e:
+        logger.warning(f"Time stretch ({backend}) failed: {e}")
+        return audio
+
+
+def pitch_shift(audio, sr, n_steps, backend=None):
+    if abs(float(n_steps)) <= 1e-3:
+        return audio
+    backend = resolve_backend(backend)
+    try:
+        if backend == 'librosa':
+            import librosa
+            return librosa.effects.pitch_shift(audio, sr=sr, n_steps=float(n_steps)).astype(np.float32)
+        return fast_pitch_shift(audio, sr, n_steps)
+    except Exception as e:
+        logger.warning(f"Pitch shift ({backend}) failed: {e}")
+        return audio
@@ -0,0 +1,272 @@
+#!/usr/bin/env python3
+"""
+Ukrainian TTS FX Engine
+Пресети звукових ефектів з fx_presets/*.json, скомпільовані у ланцюг обробки.
+
+Підтримуються дві схеми пресетів:
+  * плоска (anonymous.json, atlavs_*.json): pitch_steps, hpf, lpf, presence_*,
+    delay_ms_*, mix_*, comp_*, clip_drive
+  * ланцюгова: {"name": ..., "chain": [{"type": "highpass", "cutoff": 40}, ...]}
+
+Послідовні лінійні фільтри (highpass/lowpass/bandpass/lowshelf/highshelf/peak)
+зливаються в одну SOS-матрицю, яка рахується один раз на (пресет, sample rate)
+і застосовується одним викликом sosfilt.
+"""
+
+import json
+import logging
+import threading
+from pathlib import Path
+
+import numpy as np
+from scipy.signal import butter, sosfilt
+
+import dsp
+
+logger = logging.getLogger('ukrainian-tts-fx')
+
+PRESETS_DIR = Path(__file__).parent / 'fx_presets'
+
+FILTER_TYPES = {'highpass', 'lowpass', 'bandpass', 'lowshelf', 'highshelf', 'peak'}
+
+# Вбудовані пресети (сумісність зі старим fx == "robot")
+BUILTIN_PRESETS = {
+    'robot': {'name': 'Robot', 'chain': [{'type': 'pitch', 'steps': -4}]}
+}
+
+
+# ---- проєктування фільтрів (SOS-рядки) ----
+
+def _rbj_section(kind, sr, f0, gain_db, q=None, s=0.707):
+    """Біквад RBJ Audio EQ Cookbook як один SOS-рядок [b0, b1, b2, 1, a1, a2]"""
+    A = 10 ** (gain_db / 40)
+    w0 = 2 * np.pi * f0 / sr
+    cosw0 = np.cos(w0)
+    if kind == 'peak':
+        alpha = np.sin(w0) / (2 * (q or 1.0))
+        b = [1 + alpha * A, -2 * cosw0, 1 - alpha * A]
+        a = [1 + alpha / A, -2 * cosw0, 1 - alpha / A]
+    else:
+        alpha = np.sin(w0) / (2 * s)
+        sq = 2 * np.sqrt(A) * alpha
+        if kind == 'lowshelf':
+            b = [A * ((A + 1) - (A - 1) * cosw0 + sq),
+                 2 * A * ((A - 1) - (A + 1) * cosw0),
+                 A * ((A + 1) - (A - 1) * cosw0 - sq)]
+            a = [(A + 1) + (A - 1) * cosw0 + sq,
+                 -2 * ((A - 1) + (A + 1) * cosw0),
+                 (A + 1) + (A - 1) * cosw0 - sq]
+        else:  # highshelf
+            b = [A * ((A + 1) + (A - 1) * cosw0 + sq),
+                 -2 * A * ((A - 1) + (A + 1) * cosw0),
+                 A * ((A + 1) + (A - 1) * cosw0 - sq)]
+            a = [(A + 1) - (A - 1) * cosw0 + sq,
+                 2 * ((A - 1) - (A + 1) * cosw0),
+                 (A + 1) - (A - 1) * cosw0 - sq]
+    a0 = a[0]
+    return np.array([[b[0] / a0, b[1] / a0, b[2] / a0, 1.0, a[1] / a0, a[2] / a0]], dtype=np.float64)
+
+
+def _filter_sos(stage, sr):
+    nyq = sr / 2.0
+    kind = stage['type']
+
+    def norm(f):
+        # Частоти понад Найквіста (напр. lpf 9500 Гц при 16 кГц) обрізаємо
+        return min(float(f), nyq * 0.99) / nyq
+
+    if kind in ('highpass', 'lowpass'):
+        order = int(stage.get('order', 2 if kind == 'highpass' else 4))
+        return butter(order, norm(stage['cutoff']), btype='high' if kind == 'highpass' else 'low', output='sos')
+    if kind == 'bandpass':
+        return butter(int(stage.get('order', 2)), [norm(stage['low']), norm(stage['high'])], btype='band', output='sos')
+    if kind == 'peak':
+        return _rbj_section('peak', sr, float(stage['f0']), float(stage['gain_db']), q=float(stage.get('q', 1.0)))
+    return _rbj_section(kind, sr, float(stage['f0']), float(stage['gain_db']), s=float(stage.get('s', 0.707)))
+
+
+# ---- нелінійні та часові стадії ----
+
+def _saturate(audio, drive):
+    return (np.tanh(drive * audio) / np.tanh(drive)).astype(np.float32)
+
+
+def _compand(audio, thresh, ratio):
+    mag = np.abs(audio)
+    return np.where(mag > thresh, np.sign(audio) * (thresh + (mag - thresh) / ratio), audio).astype(np.float32)
+
+
+def _sample_hold(audio, n):
+    if n <= 1:
+        return audio
+    return np.repeat(audio[::n], n)[: audio.size].astype(np.float32)
+
+
+def _quantize(audio, bits):
+    levels = float(2 ** bits - 1)
+    return (np.round((audio + 1.0) * 0.5 * levels) / levels * 2.0 - 1.0).astype(np.float32)
+
+
+def _delay_taps(audio, sr, taps, dry):
+    """Сума сухого сигналу та статичних коротких затримок: [[ms, gain], ...]"""
+    out = audio * np.float32(dry)
+    for ms, gain in taps:
+        d = max(1, int(sr * float(ms) / 1000.0))
+        if d < audio.size:
+            out[d:] += np.float32(gain) * audio[:-d]
+    return out.astype(np.float32)
+
+
+class CompiledChain:
+    """Ланцюг, скомпільований для конкретної частоти дискретизації"""
+
+    def __init__(self, preset_id, chain, sr):
+        self.preset_id = preset_id
+        self.sr = sr
+        self.steps = self._compile(chain, sr)
+
+    def _compile(self, chain, sr):
+        steps = []
+        pending = []  # SOS-рядки послідовних лінійних фільтрів
+
+        def flush():
+            if pending:
+                sos = np.vstack(pending)
+                steps.append(('sos', sos))
+                pending.clear()
+
+        for stage in chain:
+            kind = stage.get('type')
+            if kind in FILTER_TYPES:
+                pending.append(_filter_sos(stage, sr))
+                continue
+            flush()
+            if kind == 'mix':
+                branches = [(float(b.get('gain', 0.0)), self._compile(b.get('chain', []), sr))
+                            for b in stage.get('branches', [])]
+                steps.append(('mix', (float(stage.get('dry', 1.0)), branches)))
+            elif kind == 'pitch':
+                if abs(float(stage.get('steps', 0))) > 1e-3:
+                    steps.append(('pitch', float(stage['steps'])))
+            elif kind == 'ringmod':
+                steps.append(('ringmod', float(stage.get('freq', 80.0))))
+            elif kind == 'saturate':
+                steps.append(('saturate', float(stage.get('drive', 2.0))))
+            elif kind == 'compand':
+                steps.append(('compand', (float(stage.get('thresh', 0.6)), float(stage.get('ratio', 1.6)))))
+            elif kind == 'sample_hold':
+                steps.append(('sample_hold', int(stage.get('n', 2))))
+            elif kind == 'quantize':
+                steps.append(('quantize', int(stage.get('bits', 12))))
+            elif kind == 'delay':
+                steps.append(('delay', (stage.get('taps', []), float(stage.get('dry', 1.0)))))
+            else:
+                raise ValueError(f"Unknown FX stage type: {kind}")
+        flush()
+        return steps
+
+    def _run(self, steps, audio, dsp_backend):
+        sr = self.sr
+        for kind, arg in steps:
+            if kind == 'sos':
+                audio = sosfilt(arg, audio).astype(np.float32)
+            elif kind == 'mix':
+                dry, branches = arg
+                out = audio * np.float32(dry)
+                for gain, branch_steps in branches:
+                    out += np.float32(gain) * self._run(branch_steps, audio, dsp_backend)
+                audio = out
+            elif kind == 'pitch':
+                audio = dsp.pitch_shift(audio, sr, arg, backend=dsp_backend)
+            elif kind == 'ringmod':
+                t = np.arange(audio.size, dtype=np.float32) / np.float32(sr)
+                audio = audio * np.sin(np.float32(2 * np.pi * arg) * t)
+            elif kind == 'saturate':
+                audio = _saturate(audio, arg)
+            elif kind == 'compand':
+                audio = _compand(audio, *arg)
+            elif kind == 'sample_hold':
+                audio = _sample_hold(audio, arg)
+            elif kind == 'quantize':
+                audio = _quantize(audio, arg)
+            elif kind == 'delay':
+                audio = _delay_taps(audio, sr, *arg)
+        return audio
+
+    def apply(self, audio, dsp_backend=None):
+        return self._run(self.steps, np.asarray(audio, dtype=np.float32), dsp_backend)
+
+
+def flat_to_chain(cfg):
+    """Плоска схема (як у quick_tts_demo --fx anonymous) → ланцюг стадій"""
+    g = cfg.get
+    return [
+        {'type': 'pitch', 'steps': float(g('pitch_steps', -5))},
+        {'type': 'highpass', 'cutoff': float(g('hpf', 200.0)), 'order': 2},
+        {'type': 'lowpass', 'cutoff': float(g('lpf', 3400.0)), 'order': 4},
+        {'type': 'peak', 'f0': float(g('presence_f0', 1200.0)),
+         'gain_db': float(g('presence_gain_db', 2.5)), 'q': float(g('presence_Q', 1.1))},
+        {'type': 'delay', 'dry': float(g('mix_dry', 0.85)),
+         'taps': [[float(g('delay_ms_1', 6.0)), float(g('mix_d1', 0.10))],
+                  [float(g('delay_ms_2', 12.0)), float(g('mix_d2', 0.05))]]},
+        {'type': 'compand', 'thresh': float(g('comp_thresh', 0.45)), 'ratio': float(g('comp_ratio', 2.8))},
+        {'type': 'saturate', 'drive': float(g('clip_drive', 1.8))}
+    ]
+
+
+class FXEngine:
+    """Реєстр пресетів і кеш скомпільованих ланцюгів за (пресет, sample rate)"""
+
+    def __init__(self, presets_dir=PRESETS_DIR):
+        self.presets_dir = Path(presets_dir)
+        self.presets = {}
+        self._compiled = {}
+        self._lock = threading.Lock()
+        self.reload()
+
+    def reload(self):
+        presets = {key: dict(value) for key, value in BUILTIN_PRESETS.items()}
+        if self.presets_dir.is_dir():
+            for path in sorted(self.presets_dir.glob('*.json')):
+                try:
+                    presets[path.stem] = self.load_preset(path)
+                except Exception as e:
+                    logger.warning(f"Skipping FX preset {path.name}: {e}")
+        with self._lock:
+            self.presets = presets
+            self._compiled.clear()
+        logger.info(f"Loaded {len(presets)} FX presets")
+
+    @staticmethod
+    def load_preset(path):
+        with open(path, 'r', encoding='utf-8') as f:
+            cfg = json.load(f)
+        chain = cfg['chain'] if 'chain' in cfg else flat_to_chain(cfg)
+        return {'name': cfg.get('name', Path(path).stem), 'chain': chain}
+
+    def has(self, preset_id):
+        return preset_id in self.presets
+
+    def compile(self, preset_id, sr):
+        key = (preset_id, int(sr))
+        with self._lock:
+            compiled = self._compiled.get(key)
+            if compiled is None:
+                compiled = CompiledChain(preset_id, self.presets[preset_id]['chain'], int(sr))
+                self._compiled[key] = compiled
+        return compiled
+
+    def apply(self, preset_id, audio, sr, dsp_backend=None):
+        """Застосовує пресет; 'none' або невідомий id повертає аудіо без змін"""
+        if not preset_id or preset_id == 'none':
+            return audio
+        if preset_id not in self.presets:
+            logger.warning(f"Unknown FX preset: {preset_id}")
+            return audio
+        return self.compile(preset_id, sr).apply(audio, dsp_backend)
+
+    def list_presets(self):
+        return [
+            {'id': key, 'name': value['name'], 'stages': [s.get('type') for s in value['chain']]}
+            for key, value in sorted(self.presets.items())
+        ]
@@ -0,0 +1,85 @@
+import os
+import sys
+import types
+
+TTS_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if TTS_DIR not in sys.path:
+    sys.path.insert(0, TTS_DIR)
+import text_frontend  # type: ignore
+from text_frontend import LRUCache, split_chunks, split_sentences  # type: ignore
+
+
+def test_split_sentences_keeps_punctuation():
+    assert split_sentences('Привіт. Як справи? Все добре!') == ['Привіт.', 'Як справи?', 'Все добре!']
+    assert split_sentences('   ') == []
+
+
+def test_split_sentences_needs_capital_or_digit_after_boundary():
+    assert split_sentences('Ціна 5 грн. і все') == ['Ціна 5 грн. і все']
+    assert split_sentences('Крок 1. 2 рази…  «Так»') == ['Крок 1.', '2 рази…', '«Так»']
+
+
+def test_lru_cache_evicts_oldest_and_counts():
+    cache = LRUCache(maxsize=2)
+    cache.put('a', 1)
+    cache.put('b', 2)
+    assert cache.get('a') == 1  # a стає найсвіжішим
+    cache.put('c', 3)
+    assert cache.get('b') is None
+    assert cache.stats() == {'size': 2, 'maxsize': 2, 'hits': 1, 'misses': 1, 'hit_rate': 0.5}
+    disabled = LRUCache(maxsize=0)
+    disabled.put('a', 1)
+    assert len(disabled) == 0
+
+
+def test_install_memoizes_frontend_functions(monkeypatch):
+    calls = []
+    module = types.SimpleNamespace(
+        preprocess_text=lambda text: calls.append(text) or text.lower(),
+        sentence_to_stress=lambda text, stress=None: calls.append(text) or f'+{text}',
+    )
+    package = types.ModuleType('ukrainian_tts')
+    package.tts = module
+    monkeypatch.setitem(sys.modules, 'ukrainian_tts', package)
+    monkeypatch.setitem(sys.modules, 'ukrainian_tts.tts', module)
+    monkeypatch.setattr(text_frontend, '_caches', {})
+
+    assert text_frontend.install(maxsize=8)
+    assert module.preprocess_text('Привіт') == module.preprocess_text('Привіт') == 'привіт'
+    assert module.sentence_to_stress('так', stress=['x']) == '+так'  # нехешований аргумент — без кешу
+    assert module.sentence_to_stress('так', stress=['x']) == '+так'
+    assert calls == ['Привіт', 'так', 'так']
+    assert text_frontend.cache_stats()['preprocess_text']['hits'] == 1
+    # Повторний install не обгортає вже обгорнуте
+    wrapped = module.preprocess_text
+    text_frontend.install(maxsize=8)
+    assert module.preprocess_text is wrapped
+
+
+def test_short_sentences_are_merged_up_to_max_chars():
+    assert split_chunks('Привіт. Як справи? Все добре!') == [('Привіт. Як справи? Все добре!', 'sentence')]
+    assert split_chunks('Привіт. Як справи? Все добре!', max_chars=20) == [
+        ('Привіт. Як справи?', 'sentence'), ('Все добре!', 'sentence')]
+
+
+def test_long_sentence_is_split_on_clauses():
+    text = 'Перше речення. ' + 'Слово, ' * 30 + 'кінець.'
+    chunks = split_chunks(text, max_chars=60)
+    assert chunks[0] == ('Перше речення.', 'sentence')
+    assert all(boundary == 'clause' for _, boundary in chunks[1:-1])
+    assert chunks[-1][1] == 'sentence'
+    assert all(len(chunk) <= 60 for chunk, _ in chunks)
+    # Жодне слово не загубилось і не розірване
+    assert ' '.join(chunk for chunk, _ in chunks).split() == text.split()
+
+
+def test_clause_without_boundaries_is_cut_on_words():
+    text = ' '.join(['слово'] * 40) + '.'
+    chunks = split_chunks(text, max_chars=50)
+    assert len(chunks) > 1
+    assert all(len(chunk) <= 50 for chunk, _ in chunks)
+    assert ' '.join(chunk for chunk, _ in chunks).split() == text.split()
+
+
+def test_empty_text():
+    assert split_chunks('') == []
@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+"""
+Ukrainian TTS Text Front-end Cache
+Кеш нормалізації тексту та розстановки наголосів на рівні речень.
+
+TTS.tts() щоразу викликає preprocess_text() і sentence_to_stress() з модуля
+ukrainian_tts.tts. install() підміняє ці функції мемоізованими версіями з
+обмеженим LRU, тож повторювані речення агентів не проходять front-end вдруге.
+"""
+
+import re
+import logging
+import threading
+from collections import OrderedDict
+
+logger = logging.getLogger('ukrainian-tts-frontend')
+
+# Функції модуля ukrainian_tts.tts, які мемоізуємо
+FRONTEND_FUNCTIONS = ('preprocess_text', 'sentence_to_stress')
+
+# Межа речення: .!?… + пробіл, далі велика літера, цифра, лапки або дужка
+_SENTENCE_BOUNDARY = re.compile(r'(?<=[.!?…])\s+(?=[«"\'(\[0-9A-ZА-ЯІЇЄҐ])')
+# Межа клаузи всередині довгого речення: , ; : або тире, оточене пробілами
+_CLAUSE_BOUNDARY = re.compile(r'(?<=[,;:])\s+|\s+(?=[—–]\s)')
+
+
+class LRUCache:
+    """Потокобезпечний LRU з лічильниками влучань"""
+
+    def __init__(self, maxsize=2048):
+        self.maxsize = maxsize
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, default=None):
+        with self._lock:
+            if key in self._items:
+                self._items.move_to_end(key)
+                self.hits += 1
+                return self._items[key]
+            self.misses += 1
+            return default
+
+    def put(self, key, value):
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._items[key] = value
+            self._items.move_to_end(key)
+            while len(self._items) > self.maxsize:
+                self._items.popitem(last=False)
+
+    def __len__(self):
+        return len(self._items)
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            'size': len(self._items),
+            'maxsize': self.maxsize,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': round(self.hits / total, 3) if total else 0.0
+        }
+
+
+_MISSING = object()
+_caches = {}
+
+
+def _memoize(name, fn, cache):
+    def wrapper(*args, **kwargs):
+        try:
+            key = (args, tuple(sorted(kwargs.items())))
+            hash(key)
+        except TypeError:
+            return fn(*args, **kwargs)
+        value = cache.get(key, _MISSING)
+        if value is _MISSING:
+            value = fn(*args, **kwargs)
+            cache.put(key, value)
+        return value
+
+    wrapper.__name__ = name
+    wrapper.__wrapped__ = fn
+    return wrapper
+
+
+def install(maxsize=2048):
+    """Підміняє front-end функції ukrainian_tts.tts мемоізованими; повертає True при успіху"""
+    try:
+        from ukrainian_tts import tts as tts_module
+    except ImportError:
+        return False
+
+    installed = []
+    for name in FRONTEND_FUNCTIONS:
+        fn = getattr(tts_module, name, None)
+        if fn is None or getattr(fn, '__wrapped__', None) is not None:
+            continue
+        cache = _caches.setdefault(name, LRUCache(maxsize))
+        setattr(tts_module, name, _memoize(name, fn, cache))
+        installed.append(name)
+
+    if installed:
+        logger.info(f"Front-end cache installed for {', '.join(installed)} (maxsize={maxsize})")
+    elif not _caches:
+        logger.warning("ukrainian_tts.tts has no known front-end functions — cache disabled")
+    return bool(_caches)
+
+
+def split_sentences(text):
+    """Розбиває текст на речення (пунктуація залишається в реченні)"""
+    return [s.strip() for s in _SENTENCE_BOUNDARY.split(text.strip()) if s.strip()]
+
+
+def _split_long(sentence, max_chars):
+    """Довге речення → клаузи, жадібно злиті до max_chars; без меж — розрив по словах"""
+    pieces = [p.strip() for p in _CLAUSE_BOUNDARY.split(sentence) if p.strip()]
+    chunks, current = [], ''
+    for piece in pieces:
+        while len(piece) > max_chars:
+            cut = piece.rfind(' ', 0, max_chars)
+            cut = cut if cut > 0 else max_chars
+            if current:
+                chunks.append(current)
+                current = ''
+            chunks.append(piece[:cut].strip())
+            piece = piece[cut:].strip()
+        if current and len(current) + 1 + len(piece) > max_chars:
+            chunks.append(current)
+            current = piece
+        else:
+            current = f"{current} {piece}" if current else piece
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+def split_chunks(text, max_chars=220):
+    """Розбиває довгий текст на шматки для паралельного синтезу.
+
+    Короткі сусідні речення зливаються до max_chars, довгі — діляться по клаузах.
+    Повертає [(chunk, boundary)], де boundary — 'sentence' або 'clause' (межа після шматка).
+    """
+    chunks = []
+    current = ''
+    for sentence in split_sentences(text):
+        if len(sentence) > max_chars:
+            if current:
+                chunks.append((current, 'sentence'))
+                current = ''
+            parts = _split_long(sentence, max_chars)
+            chunks.extend((part, 'clause') for part in parts[:-1])
+            chunks.append((parts[-1], 'sentence'))
+        elif current and len(current) + 1 + len(sentence) > max_chars:
+            chunks.append((current, 'sentence'))
+            current = sentence
+        else:
+            current = f"{current} {sentence}" if current else sentence
+    if current:
+        chunks.append((current, 'sentence'))
+    return chunks
+
+
+def cache_stats():
+    return {name: cache.stats() for name, cache in _caches.items()}
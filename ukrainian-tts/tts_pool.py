@@ -0,0 +1,447 @@
+#!/usr/bin/env python3
+"""
+Ukrainian TTS Inference Pool
+Пул процесів-реплік TTS: кожен воркер тримає власну модель TTS(device=...),
+запити розподіляються через спільну обмежену чергу
+"""
+
+import io
+import os
+import time
+import queue
+import logging
+import threading
+import itertools
+import multiprocessing as mp
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+
+import text_frontend
+
+logger = logging.getLogger('ukrainian-tts-pool')
+
+
+class PoolBusy(Exception):
+    """Черга пулу заповнена — запит слід відхилити (503)"""
+
+
+def _load_tts(device):
+    """Завантажує модель TTS; на MPS без float64 відкочується на CPU"""
+    from ukrainian_tts.tts import TTS
+    try:
+        return TTS(device=device), device
+    except Exception as e:
+        if device == "mps" and "float64" in str(e).lower():
+            logger.warning("MPS doesn't support float64, falling back to CPU")
+            return TTS(device="cpu"), "cpu"
+        raise
+
+
+def _synthesize_one(tts, text, voice, stress):
+    import soundfile as sf
+    buf = io.BytesIO()
+    _, accented = tts.tts(text, voice, stress, buf)
+    buf.seek(0)
+    audio, sr = sf.read(buf, dtype="float32")
+    if audio.ndim > 1:
+        audio = audio.mean(axis=1)
+    return audio, int(sr), accented
+
+
+def _synthesize(tts, text, voice, stress, split=False, pause_ms=150):
+    """Синтез у пам'яті: повертає моно float32, sample rate та наголошений текст.
+
+    split=True синтезує кожне речення окремо й склеює з паузою pause_ms, тож
+    повторювані речення беруть нормалізацію й наголоси з кешу text_frontend.
+    """
+    import numpy as np
+    started = time.time()
+    sentences = text_frontend.split_sentences(text) if split else [text]
+    if len(sentences) <= 1:
+        audio, sr, accented = _synthesize_one(tts, text, voice, stress)
+    else:
+        parts, accents, sr = [], [], None
+        for sentence in sentences:
+            part, sr, accented = _synthesize_one(tts, sentence, voice, stress)
+            if parts and pause_ms > 0:
+                parts.append(np.zeros(int(sr * pause_ms / 1000), dtype=np.float32))
+            parts.append(part)
+            accents.append(accented)
+        audio = np.concatenate(parts)
+        accented = ' '.join(accents)
+    return {
+        'audio': audio,
+        'sample_rate': sr,
+        'accented_text': accented,
+        'synthesis_time': time.time() - started,
+        'sentences': len(sentences),
+        'frontend_cache': text_frontend.cache_stats()
+    }
+
+
+def _warmup(tts, voices, text):
+    """Прогрів моделі: коротка фраза кожним голосом (граф, алокації, кеш front-end).
+
+    Повертає dict(sample_rate, seconds, voices, errors).
+    """
+    from ukrainian_tts.tts import Stress
+    started = time.time()
+    sample_rate, warmed, errors = None, [], {}
+    for voice in voices:
+        try:
+            _, sample_rate, _ = _synthesize_one(tts, text, voice, Stress.Dictionary.value)
+            warmed.append(voice)
+        except Exception as e:
+            errors[voice] = f"{type(e).__name__}: {e}"
+    return {
+        'sample_rate': sample_rate,
+        'seconds': round(time.time() - started, 3),
+        'voices': warmed,
+        'errors': errors
+    }
+
+
+def _worker_main(worker_id, device, threads, frontend_cache, tasks, results, warmup_voices=(), warmup_text=''):
+    """Цикл процесу-воркера: власна модель, обмежена кількість потоків torch"""
+    try:
+        import torch
+        torch.set_num_threads(threads)
+        torch.set_num_interop_threads(1)
+    except Exception:
+        pass
+
+    try:
+        tts, device = _load_tts(device)
+    except Exception as e:
+        results.put(('started', worker_id, None, f"{type(e).__name__}: {e}"))
+        return
+    text_frontend.install(frontend_cache)
+    results.put(('started', worker_id, device, None))
+    if warmup_voices:
+        # Прогрів до першої задачі з черги: воркер уже «ready», але ще не «warm»
+        results.put(('warm', worker_id, None, _warmup(tts, warmup_voices, warmup_text)))
+
+    while True:
+        item = tasks.get()
+        if item is None:
+            break
+        task_id, enqueued_at, text, voice, stress, options = item
+        results.put(('taken', worker_id, task_id, time.time() - enqueued_at))
+        try:
+            results.put(('done', worker_id, task_id, _synthesize(tts, text, voice, stress, **options)))
+        except Exception as e:
+            results.put(('error', worker_id, task_id, f"{type(e).__name__}: {e}"))
+
+
+class TTSInferencePool:
+    """Пул реплік TTS з обмеженою чергою та метриками очікування.
+
+    workers >= 1 — окремі процеси (spawn), кожен зі своєю моделлю;
+    workers == 0 — одна модель у цьому процесі, виклики серіалізуються.
+    warmup_voices — голоси для прогріву кожного воркера після завантаження моделі.
+    """
+
+    def __init__(self, device='cpu', workers=2, threads=None, max_queue=None, start_timeout=300.0,
+                 frontend_cache=2048, warmup_voices=(), warmup_text=''):
+        self.device = device
+        self.frontend_cache = frontend_cache
+        self.workers = max(0, int(workers))
+        cpu_count = os.cpu_count() or 1
+        self.threads = int(threads) if threads else max(1, cpu_count // max(1, self.workers))
+        # Скільки запитів може чекати понад зайняті воркери
+        self.max_queue = int(max_queue) if max_queue is not None else max(4, 8 * max(1, self.workers))
+        self.start_timeout = start_timeout
+        self.warmup_voices = tuple(warmup_voices or ())
+        self.warmup_text = warmup_text
+        self.sample_rate = None
+
+        self._lock = threading.Lock()
+        self._ids = itertools.count(1)
+        self._futures = {}          # task_id -> Future
+        self._worker_task = {}      # worker_id -> task_id, що виконується
+        self._procs = {}            # worker_id -> Process
+        self._started = threading.Event()
+        self._ready_workers = set()
+        self._initialized = set()   # воркери, що хоч раз завантажили модель
+        self._warm_workers = set()
+        self._warm_event = threading.Event()
+        self._warmup_info = {}      # worker_id -> результат _warmup
+        self._closing = False
+
+        self._tasks = None
+        self._results = None
+        self._collector = None
+        self._inline_tts = None
+        self._inline_executor = None
+
+        self.metrics = {
+            'submitted': 0,
+            'completed': 0,
+            'failed': 0,
+            'rejected': 0,
+            'restarts': 0
+        }
+        self._wait_ms = deque(maxlen=512)
+        self._synth_ms = deque(maxlen=512)
+        self._frontend_stats = {}   # worker_id -> останній знімок кешу text_frontend
+
+    # ---- життєвий цикл ----
+
+    def start(self):
+        """Запускає воркери і чекає, поки вони завантажать моделі"""
+        if self.workers == 0:
+            try:
+                self._inline_tts, self.device = _load_tts(self.device)
+                text_frontend.install(self.frontend_cache)
+                self._ready_workers.add(0)
+            except Exception as e:
+                logger.error(f"Failed to initialize Ukrainian TTS: {e}")
+            self._inline_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='tts-inline')
+            if self._inline_tts is not None and self.warmup_voices:
+                # Першою задачею executor'а, тож запити чекають прогріву в черзі
+                self._inline_executor.submit(self._warmup_inline)
+            self._started.set()
+            self._update_warm()
+            return self.ready
+
+        ctx = mp.get_context('spawn')
+        self._ctx = ctx
+        self._tasks = ctx.Queue()
+        self._results = ctx.Queue()
+        for worker_id in range(self.workers):
+            self._spawn(worker_id)
+
+        self._collector = threading.Thread(target=self._collect, name='tts-pool-collector', daemon=True)
+        self._collector.start()
+
+        logger.info(f"Starting {self.workers} TTS workers on {self.device} ({self.threads} torch threads each)")
+        self._started.wait(self.start_timeout)
+        logger.info(f"TTS pool ready: {len(self._ready_workers)}/{self.workers} workers")
+        return self.ready
+
+    def _spawn(self, worker_id):
+        proc = self._ctx.Process(
+            target=_worker_main,
+            args=(worker_id, self.device, self.threads, self.frontend_cache, self._tasks, self._results,
+                  self.warmup_voices, self.warmup_text),
+            name=f'tts-worker-{worker_id}',
+            daemon=True
+        )
+        proc.start()
+        self._procs[worker_id] = proc
+
+    def shutdown(self):
+        self._closing = True
+        if self._inline_executor:
+            self._inline_executor.shutdown(wait=False)
+        for _ in self._procs:
+            self._tasks.put(None)
+        for proc in self._procs.values():
+            proc.join(timeout=5)
+            if proc.is_alive():
+                proc.terminate()
+
+    @property
+    def ready(self):
+        return bool(self._ready_workers)
+
+    @property
+    def warm(self):
+        """Усі готові воркери пройшли прогрів (без warmup_voices збігається з ready)"""
+        return self._warm_event.is_set()
+
+    def wait_warm(self, timeout=None):
+        return self._warm_event.wait(timeout)
+
+    def _update_warm(self):
+        ready = set(self._ready_workers)
+        if ready and (not self.warmup_voices or ready <= self._warm_workers):
+            self._warm_event.set()
+        else:
+            self._warm_event.clear()
+
+    def _on_warm(self, worker_id, info):
+        if info.get('sample_rate'):
+            self.sample_rate = info['sample_rate']
+        self._warmup_info[worker_id] = info
+        self._warm_workers.add(worker_id)
+        if info.get('errors'):
+            logger.warning(f"TTS worker {worker_id} warmup errors: {info['errors']}")
+        logger.info(f"TTS worker {worker_id} warm in {info['seconds']:.2f}s ({', '.join(info['voices'])})")
+        self._update_warm()
+
+    def _warmup_inline(self):
+        self._on_warm(0, _warmup(self._inline_tts, self.warmup_voices, self.warmup_text))
+
+    # ---- подання задач ----
+
+    def submit(self, text, voice, stress, **options):
+        """Ставить синтез у чергу; повертає Future з dict(audio, sample_rate, ...).
+
+        options передаються у _synthesize (split, pause_ms).
+        """
+        with self._lock:
+            inflight = len(self._futures)
+            if inflight >= max(1, self.workers) + self.max_queue:
+                self.metrics['rejected'] += 1
+                raise PoolBusy(f"TTS queue is full ({inflight} requests in flight)")
+            task_id = next(self._ids)
+            future = Future()
+            self._futures[task_id] = future
+            self.metrics['submitted'] += 1
+
+        if self.workers == 0:
+            enqueued_at = time.time()
+            self._inline_executor.submit(self._run_inline, task_id, enqueued_at, text, voice, stress, options)
+        else:
+            self._tasks.put((task_id, time.time(), text, voice, stress, options))
+        return future
+
+    def synthesize(self, text, voice, stress, timeout=None, **options):
+        """Синхронна обгортка над submit()"""
+        return self.submit(text, voice, stress, **options).result(timeout=timeout)
+
+    def _run_inline(self, task_id, enqueued_at, text, voice, stress, options):
+        self._on_taken(0, task_id, time.time() - enqueued_at)
+        try:
+            if self._inline_tts is None:
+                raise RuntimeError('TTS not initialized')
+            self._on_result('done', 0, task_id, _synthesize(self._inline_tts, text, voice, stress, **options))
+        except Exception as e:
+            self._on_result('error', 0, task_id, f"{type(e).__name__}: {e}")
+
+    # ---- збір результатів ----
+
+    def _collect(self):
+        """Потік, що читає результати воркерів і завершує відповідні Future"""
+        while not self._closing:
+            try:
+                kind, worker_id, a, b = self._results.get(timeout=1.0)
+            except queue.Empty:
+                self._check_workers()
+                continue
+            except (EOFError, OSError):
+                break
+
+            if kind == 'started':
+                if b is None:
+                    self._ready_workers.add(worker_id)
+                    self._initialized.add(worker_id)
+                    self.device = a
+                    logger.info(f"TTS worker {worker_id} ready on {a}")
+                else:
+                    self._init_failed(worker_id, b)
+                self._check_started()
+                self._update_warm()
+            elif kind == 'warm':
+                self._on_warm(worker_id, b)
+            elif kind == 'taken':
+                self._on_taken(worker_id, a, b)
+            else:
+                self._on_result(kind, worker_id, a, b)
+
+    def _init_failed(self, worker_id, error):
+        # Воркер, що не зміг завантажити модель, не перезапускаємо
+        logger.error(f"TTS worker {worker_id} failed to initialize: {error}")
+        self._procs.pop(worker_id, None)
+
+    def _check_started(self):
+        if len(self._ready_workers) + (self.workers - len(self._procs)) >= self.workers:
+            self._started.set()
+
+    def _on_taken(self, worker_id, task_id, wait_seconds):
+        with self._lock:
+            self._worker_task[worker_id] = task_id
+            self._wait_ms.append(wait_seconds * 1000.0)
+
+    def _on_result(self, kind, worker_id, task_id, payload):
+        with self._lock:
+            future = self._futures.pop(task_id, None)
+            if self._worker_task.get(worker_id) == task_id:
+                del self._worker_task[worker_id]
+            if kind == 'done':
+                self.metrics['completed'] += 1
+                self._synth_ms.append(payload['synthesis_time'] * 1000.0)
+                self.sample_rate = payload['sample_rate']
+                self._frontend_stats[worker_id] = payload.pop('frontend_cache', {})
+            else:
+                self.metrics['failed'] += 1
+        if future is None:
+            return
+        if kind == 'done':
+            future.set_result(payload)
+        else:
+            future.set_exception(RuntimeError(payload))
+
+    def _check_workers(self):
+        """Перезапускає воркери, що впали; їхня поточна задача завершується з помилкою"""
+        for worker_id, proc in list(self._procs.items()):
+            if proc.is_alive() or self._closing:
+                continue
+            if worker_id not in self._initialized:
+                self._init_failed(worker_id, f"exit code {proc.exitcode}")
+                self._check_started()
+                continue
+            logger.error(f"TTS worker {worker_id} died (exit code {proc.exitcode}), restarting")
+            self._ready_workers.discard(worker_id)
+            self._warm_workers.discard(worker_id)
+            self._update_warm()
+            task_id = self._worker_task.get(worker_id)
+            if task_id is not None:
+                self._on_result('error', worker_id, task_id, 'TTS worker process died')
+            self.metrics['restarts'] += 1
+            self._spawn(worker_id)
+
+    # ---- метрики ----
+
+    @staticmethod
+    def _percentiles(values):
+        if not values:
+            return {'avg': 0.0, 'p50': 0.0, 'p95': 0.0}
+        ordered = sorted(values)
+        n = len(ordered)
+        return {
+            'avg': round(sum(ordered) / n, 1),
+            'p50': round(ordered[n // 2], 1),
+            'p95': round(ordered[min(n - 1, int(n * 0.95))], 1)
+        }
+
+    def _aggregate_frontend_stats(self):
+        """Сумує кеші front-end по воркерах (у кожного процесу свій кеш)"""
+        total = {}
+        for snapshot in self._frontend_stats.values():
+            for name, st in snapshot.items():
+                agg = total.setdefault(name, {'size': 0, 'hits': 0, 'misses': 0})
+                for key in agg:
+                    agg[key] += st.get(key, 0)
+        for agg in total.values():
+            lookups = agg['hits'] + agg['misses']
+            agg['hit_rate'] = round(agg['hits'] / lookups, 3) if lookups else 0.0
+        return total
+
+    def stats(self):
+        with self._lock:
+            inflight = len(self._futures)
+            busy = len(self._worker_task)
+            wait_ms = list(self._wait_ms)
+            synth_ms = list(self._synth_ms)
+            metrics = dict(self.metrics)
+            frontend = self._aggregate_frontend_stats()
+            warmup = dict(self._warmup_info)
+        return {
+            'mode': 'inline' if self.workers == 0 else 'processes',
+            'workers': self.workers,
+            'workers_ready': len(self._ready_workers),
+            'workers_warm': len(self._warm_workers),
+            'warmup_seconds': {str(w): info['seconds'] for w, info in sorted(warmup.items())},
+            'device': self.device,
+            'threads_per_worker': self.threads,
+            'max_queue': self.max_queue,
+            'inflight': inflight,
+            'busy': busy,
+            'queue_depth': max(0, inflight - busy),
+            'wait_ms': self._percentiles(wait_ms),
+            'synthesis_ms': self._percentiles(synth_ms),
+            'frontend_cache': frontend,
+            **metrics
+        }
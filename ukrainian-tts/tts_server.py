@@ -9,15 +9,20 @@ import sys
 import time
 import logging
 import argparse
-import io
 import json
-import tempfile
+import base64
+import threading
 from pathlib import Path
-from flask import Flask, request, jsonify, send_file
-from ukrainian_tts.tts import TTS, Voices, Stress
-import soundfile as sf
+from concurrent.futures import TimeoutError as FutureTimeout, wait, FIRST_COMPLETED
+from flask import Flask, Response, request, jsonify
+from ukrainian_tts.tts import Voices, Stress
 import numpy as np
-import librosa
+
+import dsp
+import audio_codec
+import text_frontend
+from tts_pool import TTSInferencePool, PoolBusy
+from fx_engine import FXEngine
 
 # Налаштування логування
 logging.basicConfig(
@@ -26,8 +31,54 @@ logging.basicConfig(
 )
 logger = logging.getLogger('ukrainian-tts-server')
 
+# Пул реплік TTS (можна перевизначити аргументами командного рядка)
+TTS_WORKERS = int(os.environ.get('TTS_WORKERS', 2))
+TTS_THREADS = int(os.environ.get('TTS_THREADS', 0)) or None
+TTS_MAX_QUEUE = int(os.environ['TTS_MAX_QUEUE']) if os.environ.get('TTS_MAX_QUEUE') else None
+TTS_REQUEST_TIMEOUT = float(os.environ.get('TTS_REQUEST_TIMEOUT', 120))
+# Синтез по реченнях з кешем наголосів/нормалізації (text_frontend)
+TTS_SPLIT_SENTENCES = os.environ.get('TTS_SPLIT_SENTENCES', '1').lower() not in ('0', 'false', 'no')
+TTS_SENTENCE_PAUSE_MS = int(os.environ.get('TTS_SENTENCE_PAUSE_MS', 150))
+TTS_FRONTEND_CACHE_SIZE = int(os.environ.get('TTS_FRONTEND_CACHE_SIZE', 2048))
+TTS_BATCH_MAX_ITEMS = int(os.environ.get('TTS_BATCH_MAX_ITEMS', 64))
+# Довгий текст: шматки по реченнях/клаузах паралельно в пулі, склейка з кросфейдом
+TTS_LONG_TEXT_CHARS = int(os.environ.get('TTS_LONG_TEXT_CHARS', 400))
+TTS_CHUNK_CHARS = int(os.environ.get('TTS_CHUNK_CHARS', 220))
+TTS_CLAUSE_PAUSE_MS = int(os.environ.get('TTS_CLAUSE_PAUSE_MS', 60))
+TTS_CROSSFADE_MS = float(os.environ.get('TTS_CROSSFADE_MS', 15))
+# Прогрів після старту: фраза кожним голосом у кожному воркері + прогін FX-пресетів
+TTS_WARMUP = os.environ.get('TTS_WARMUP', '1').lower() not in ('0', 'false', 'no')
+TTS_WARMUP_TEXT = os.environ.get('TTS_WARMUP_TEXT', 'Привіт! Це перевірка голосу.')
+TTS_WARMUP_VOICES = os.environ.get('TTS_WARMUP_VOICES', '')  # порожньо — усі Voices
+TTS_WARMUP_FX = os.environ.get('TTS_WARMUP_FX', 'all')      # all | none | список через кому
+
+_TRUE = ('1', 'true', 'yes', 'on')
+_FALSE = ('0', 'false', 'no', 'off', '')
+
+
+def _parse_flag(value, default=False, allow_auto=False):
+    """Прапорець із JSON: bool, 0/1 або рядок ("false" — це False); allow_auto пропускає 'auto'.
+    
+    Невідоме значення → ValueError (400 у відповіді).
+    """
+    if value is None:
+        return default
+    if isinstance(value, bool):
+        return value
+    if isinstance(value, (int, float)):
+        return bool(value)
+    s = str(value).strip().lower()
+    if allow_auto and s == 'auto':
+        return 'auto'
+    if s in _TRUE:
+        return True
+    if s in _FALSE:
+        return False
+    raise ValueError(f"Invalid boolean value: {value!r}")
+
 class UkrainianTTSServer:
-    def __init__(self, host='127.0.0.1', port=3001, device='cpu'):
+    def __init__(self, host='127.0.0.1', port=3001, device='cpu',
+                 workers=TTS_WORKERS, threads=TTS_THREADS, max_queue=TTS_MAX_QUEUE, warmup=TTS_WARMUP):
         self.host = host
         self.port = port
         self.device = device
@@ -36,8 +87,18 @@ class UkrainianTTSServer:
         self.app = Flask(__name__)
         self.app.config['SECRET_KEY'] = 'ukrainian-tts-server-key'
         
-        # Ініціалізуємо TTS
-        self.tts = None
+        # FX-пресети з fx_presets/*.json (компілюються ліниво на (пресет, sample rate))
+        self.fx = FXEngine()
+        
+        # Стан прогріву FX (TTS-воркери прогріваються самі, див. TTSInferencePool)
+        self.warmup = warmup
+        self.fx_warmup = {'done': not warmup, 'presets': [], 'seconds': 0.0}
+        
+        # Ініціалізуємо пул TTS (кожен воркер — окрема модель)
+        self.pool = TTSInferencePool(device=device, workers=workers, threads=threads, max_queue=max_queue,
+                                     frontend_cache=TTS_FRONTEND_CACHE_SIZE,
+                                     warmup_voices=self._warmup_voices() if warmup else (),
+                                     warmup_text=TTS_WARMUP_TEXT)
         self._init_tts()
         
         # Реєструємо маршрути
@@ -48,24 +109,57 @@ class UkrainianTTSServer:
     def _init_tts(self):
         """Ініціалізуємо TTS систему"""
         try:
-            logger.info(f"Initializing Ukrainian TTS on device: {self.device}")
-            
-            # Спробуємо з заданим девайсом, fallback до CPU якщо помилка
-            try:
-                self.tts = TTS(device=self.device)
-            except Exception as e:
-                if self.device == "mps" and "float64" in str(e).lower():
-                    logger.warning("MPS doesn't support float64, falling back to CPU")
-                    self.tts = TTS(device="cpu")
-                    self.device = "cpu"
-                else:
-                    raise
-            
-            logger.info("Ukrainian TTS initialized successfully")
-            
+            logger.info(f"Initializing Ukrainian TTS on device: {self.device} "
+                        f"(workers={self.pool.workers}, threads={self.pool.threads})")
+            if self.pool.start():
+                self.device = self.pool.device
+                logger.info("Ukrainian TTS initialized successfully")
+                if self.warmup:
+                    threading.Thread(target=self._warmup_fx, name='tts-fx-warmup', daemon=True).start()
+            else:
+                logger.error("Failed to initialize Ukrainian TTS: no workers ready")
         except Exception as e:
             logger.error(f"Failed to initialize Ukrainian TTS: {e}")
-            self.tts = None
+    
+    @staticmethod
+    def _warmup_voices():
+        voices = [v.value for v in Voices]
+        if TTS_WARMUP_VOICES:
+            requested = [v.strip() for v in TTS_WARMUP_VOICES.split(',') if v.strip()]
+            voices = [v for v in requested if v in voices]
+        return voices
+    
+    def _warmup_presets(self):
+        names = [p['id'] for p in self.fx.list_presets()]
+        if TTS_WARMUP_FX.lower() == 'all':
+            return names
+        if TTS_WARMUP_FX.lower() in ('', 'none'):
+            return []
+        return [n.strip() for n in TTS_WARMUP_FX.split(',') if n.strip() in names]
+    
+    def _warmup_fx(self):
+        """Після прогріву воркерів компілює FX-пресети під їхню частоту і проганяє їх на короткому сигналі"""
+        if not self.pool.wait_warm(self.pool.start_timeout):
+            logger.warning("TTS workers did not warm up in time; skipping FX warmup")
+            return
+        sr = self.pool.sample_rate or 22050
+        started = time.time()
+        # 0.5 с шуму низького рівня — досить, щоб пройти всі стадії ланцюга (pitch, фільтри, затримки)
+        probe = (np.random.default_rng(0).standard_normal(sr // 2) * 0.05).astype(np.float32)
+        warmed = []
+        for preset_id in self._warmup_presets():
+            try:
+                self.fx.apply(preset_id, probe, sr)
+                warmed.append(preset_id)
+            except Exception as e:
+                logger.warning(f"FX warmup failed for {preset_id}: {e}")
+        audio_codec.encode(probe, sr, audio_codec.DEFAULT_FORMAT)
+        self.fx_warmup = {'done': True, 'presets': warmed, 'seconds': round(time.time() - started, 3)}
+        logger.info(f"FX warmup done: {len(warmed)} presets in {self.fx_warmup['seconds']:.2f}s")
+    
+    @property
+    def warm(self):
+        return self.pool.warm and self.fx_warmup['done']
     
     def _register_routes(self):
         """Реєструємо API маршрути"""
@@ -73,13 +167,28 @@ class UkrainianTTSServer:
         @self.app.route('/health', methods=['GET'])
         def health():
             """Health check endpoint"""
+            pool_stats = self.pool.stats()
             return jsonify({
-                'status': 'ok' if self.tts else 'error',
-                'tts_ready': self.tts is not None,
+                'status': 'ok' if self.pool.ready else 'error',
+                'tts_ready': self.pool.ready,
+                'warm': self.warm,
+                'warmup': {
+                    'enabled': self.warmup,
+                    'voices': list(self.pool.warmup_voices),
+                    'workers_warm': pool_stats['workers_warm'],
+                    'fx': self.fx_warmup
+                },
                 'device': self.device,
+                'pool': pool_stats,
+                'formats': audio_codec.supported_formats(),
                 'timestamp': time.time()
             })
         
+        @self.app.route('/stats', methods=['GET'])
+        def stats():
+            """Метрики пулу: глибина черги, час очікування та синтезу"""
+            return jsonify({**self.pool.stats(), 'timestamp': time.time()})
+        
         @self.app.route('/voices', methods=['GET'])
         def get_voices():
             """Список доступних голосів"""
@@ -94,11 +203,22 @@ class UkrainianTTSServer:
                 logger.error(f"Error getting voices: {e}")
                 return jsonify({'error': str(e)}), 500
         
+        @self.app.route('/fx', methods=['GET'])
+        def get_fx_presets():
+            """Список FX-пресетів"""
+            return jsonify({
+                'presets': self.fx.list_presets(),
+                'default': 'none',
+                # Бекенд зміни темпу/висоти тону (запит може перевизначити полем "dsp")
+                'dsp': {'default': dsp.DEFAULT_BACKEND, 'backends': list(dsp.BACKENDS)},
+                'timestamp': time.time()
+            })
+        
         @self.app.route('/tts', methods=['POST'])
         def synthesize_text():
             """Основний ендпойнт для синтезу мови"""
             try:
-                if not self.tts:
+                if not self.pool.ready:
                     return jsonify({'error': 'TTS not initialized'}), 503
                 
                 data = request.get_json()
@@ -112,51 +232,60 @@ class UkrainianTTSServer:
                 voice = data.get('voice', 'dmytro')
                 fx = data.get('fx', 'none')  # Звукові ефекти
                 speed = float(data.get('speed', 1.0))
-                return_audio = data.get('return_audio', False)  # Повертати аудіо файл
-                
-                logger.info(f"TTS request: text='{text[:50]}...', voice={voice}, fx={fx}")
-                
-                # Синтезуємо в пам'яті
-                buf = io.BytesIO()
-                start_time = time.time()
-                _, accented = self.tts.tts(text, voice, Stress.Dictionary.value, buf)
-                synthesis_time = time.time() - start_time
+                try:
+                    return_audio = _parse_flag(data.get('return_audio'), False)  # Повертати аудіо файл
+                    split = _parse_flag(data.get('split'), TTS_SPLIT_SENTENCES)  # синтез по реченнях
+                    long_mode = _parse_flag(data.get('long'), 'auto', allow_auto=True)  # true | false | 'auto'
+                except ValueError as e:
+                    return jsonify({'error': str(e)}), 400
+                dsp_backend = dsp.resolve_backend(data.get('dsp'))  # 'fast' або 'librosa'
+                audio_format = audio_codec.resolve_format(data.get('format'))  # wav | ogg | opus
+                if audio_format is None:
+                    return jsonify({'error': f"Unsupported format: {data.get('format')}",
+                                    'formats': audio_codec.supported_formats()}), 400
+                try:
+                    out_rate = audio_codec.resolve_sample_rate(data.get('sample_rate'))  # необов'язкове зниження частоти
+                except ValueError as e:
+                    return jsonify({'error': str(e), 'sample_rates': list(audio_codec.SAMPLE_RATES)}), 400
+                if long_mode == 'auto':  # за довжиною тексту
+                    long_mode = len(text) >= TTS_LONG_TEXT_CHARS and self.pool.workers >= 2
                 
-                # Читаємо аудіо
-                buf.seek(0)
-                audio, sr = sf.read(buf, dtype="float32")
+                logger.info(f"TTS request: text='{text[:50]}...', voice={voice}, fx={fx}, long={bool(long_mode)}")
                 
-                if audio.ndim > 1:
-                    audio = audio.mean(axis=1)
-                
-                # Застосовуємо швидкість
-                if speed and abs(speed - 1.0) > 1e-3:
-                    try:
-                        audio = librosa.effects.time_stretch(audio, rate=speed)
-                    except Exception:
-                        pass
-                
-                # Застосовуємо звукові ефекти (простий варіант)
-                if fx == "robot":
-                    try:
-                        audio = librosa.effects.pitch_shift(audio, sr=sr, n_steps=-4)
-                    except Exception:
-                        pass
-                
-                # Нормалізуємо
-                peak = float(np.max(np.abs(audio)) or 1.0)
-                audio = (audio / peak) * 0.95
+                # Синтезуємо у вільному воркері пулу (довгий текст — шматками в усіх воркерах)
+                try:
+                    if long_mode:
+                        result = self._synthesize_long(text, voice, timeout=TTS_REQUEST_TIMEOUT)
+                    else:
+                        result = self.pool.synthesize(text, voice, Stress.Dictionary.value,
+                                                      timeout=TTS_REQUEST_TIMEOUT,
+                                                      split=split, pause_ms=TTS_SENTENCE_PAUSE_MS)
+                except PoolBusy as e:
+                    logger.warning(f"TTS pool busy: {e}")
+                    return jsonify({'error': str(e), 'retry': True}), 503
+                except FutureTimeout:
+                    return jsonify({'error': 'TTS synthesis timed out'}), 504
+                sr = result['sample_rate']
+                accented = result['accented_text']
+                synthesis_time = result['synthesis_time']
+                audio, fx_time = self._postprocess(result, speed, fx, dsp_backend)
                 
                 if return_audio:
-                    # Повертаємо аудіо файл
-                    temp_file = tempfile.NamedTemporaryFile(delete=False, suffix='.wav')
-                    sf.write(temp_file.name, audio, sr, subtype="PCM_16")
-                    
-                    return send_file(
-                        temp_file.name,
-                        mimetype='audio/wav',
-                        as_attachment=True,
-                        download_name=f'tts_{int(time.time())}.wav'
+                    # Кодуємо один раз тут; проксі передають байти далі без перекодування
+                    encoded = audio_codec.encode(audio, sr, audio_format, out_rate)
+                    return Response(
+                        encoded['data'],
+                        mimetype=encoded['mimetype'],
+                        headers={
+                            'Content-Disposition': f"attachment; filename=tts_{int(time.time())}.{encoded['extension']}",
+                            'X-Audio-Format': audio_format,
+                            'X-Audio-Bytes': str(len(encoded['data'])),
+                            'X-Audio-Duration': f"{len(audio) / sr:.3f}",
+                            'X-Sample-Rate': str(encoded['sample_rate']),
+                            'X-DSP-Backend': dsp_backend,
+                            'X-Synthesis-Time': f"{synthesis_time:.3f}",
+                            'X-Encode-Time': f"{encoded['encode_time']:.4f}"
+                        }
                     )
                 else:
                     # Повертаємо JSON відповідь
@@ -164,10 +293,14 @@ class UkrainianTTSServer:
                         'status': 'success',
                         'accented_text': accented,
                         'synthesis_time': round(synthesis_time, 3),
+                        'fx_time': round(fx_time, 3),
+                        'sentences': result.get('sentences', 1),
+                        'chunks': result.get('chunks', 1),
                         'audio_duration': round(len(audio) / sr, 3),
                         'sample_rate': int(sr),
                         'voice': voice,
                         'fx': fx,
+                        'dsp': dsp_backend,
                         'timestamp': time.time()
                     })
                 
@@ -175,6 +308,37 @@ class UkrainianTTSServer:
                 logger.error(f"TTS synthesis error: {e}")
                 return jsonify({'error': str(e)}), 500
         
+        @self.app.route('/tts/batch', methods=['POST'])
+        def synthesize_batch():
+            """Пакетний синтез: items=[{text, voice, speed, fx, ...}], NDJSON-потік у порядку готовності"""
+            if not self.pool.ready:
+                return jsonify({'error': 'TTS not initialized'}), 503
+            
+            data = request.get_json(silent=True) or {}
+            items = data.get('items')
+            if not isinstance(items, list) or not items:
+                return jsonify({'error': 'items list is required'}), 400
+            if len(items) > TTS_BATCH_MAX_ITEMS:
+                return jsonify({'error': f'Too many items: {len(items)} > {TTS_BATCH_MAX_ITEMS}'}), 413
+            try:
+                return_audio = _parse_flag(data.get('return_audio'), True)
+            except ValueError as e:
+                return jsonify({'error': str(e)}), 400
+            audio_format = audio_codec.resolve_format(data.get('format'))
+            if audio_format is None:
+                return jsonify({'error': f"Unsupported format: {data.get('format')}",
+                                'formats': audio_codec.supported_formats()}), 400
+            try:
+                out_rate = audio_codec.resolve_sample_rate(data.get('sample_rate'))
+            except ValueError as e:
+                return jsonify({'error': str(e), 'sample_rates': list(audio_codec.SAMPLE_RATES)}), 400
+            
+            return Response(
+                self._stream_batch(items, return_audio, audio_format, out_rate),
+                mimetype='application/x-ndjson',
+                headers={'Cache-Control': 'no-store', 'X-Accel-Buffering': 'no'}
+            )
+        
         @self.app.route('/speak', methods=['POST'])
         def speak_text():
             """Альтернативний ендпойнт (сумісність)"""
@@ -189,11 +353,194 @@ class UkrainianTTSServer:
             logger.error(f"Internal server error: {error}")
             return jsonify({'error': 'Internal server error'}), 500
     
+    def _synthesize_long(self, text, voice, timeout=None):
+        """Довгий текст: шматки паралельно в пулі → вирівнювання гучності → склейка з кросфейдом.
+        
+        Результат має ту саму форму, що й у pool.synthesize (плюс 'chunks').
+        """
+        started = time.time()
+        deadline = started + timeout if timeout else None
+        chunks = text_frontend.split_chunks(text, TTS_CHUNK_CHARS)
+        window = max(1, self.pool.workers) * 2
+        futures = [None] * len(chunks)
+        pending = set()
+        next_index = 0
+        
+        while next_index < len(chunks) or pending:
+            while next_index < len(chunks) and len(pending) < window:
+                try:
+                    future = self.pool.submit(chunks[next_index][0], voice, Stress.Dictionary.value, split=False)
+                except PoolBusy:
+                    if not pending:
+                        raise
+                    break
+                futures[next_index] = future
+                pending.add(future)
+                next_index += 1
+            remaining = None if deadline is None else max(0.0, deadline - time.time())
+            done, pending = wait(pending, timeout=remaining, return_when=FIRST_COMPLETED)
+            if not done:
+                raise FutureTimeout()
+        
+        results = [future.result() for future in futures]
+        sr = results[0]['sample_rate']
+        # Повністю тихий шматок після обрізання порожній: пропускаємо його явно, а паузу між
+        # сусідніми непорожніми шматками беремо найбільшу з тих, що були між ними
+        gap_after = [TTS_SENTENCE_PAUSE_MS if boundary == 'sentence' else TTS_CLAUSE_PAUSE_MS
+                     for _, boundary in chunks]
+        parts, gaps, pause = [], [], 0
+        for result, gap in zip(results, gap_after):
+            part = dsp.trim_silence(result['audio'], sr)
+            if part.size:
+                if parts:
+                    gaps.append(pause)
+                parts.append(part)
+                pause = gap
+            elif parts:
+                pause = max(pause, gap)
+        if not parts:
+            parts = [np.asarray(results[0]['audio'], dtype=np.float32)]
+        parts = dsp.match_loudness(parts, sr)
+        return {
+            'audio': dsp.crossfade_concat(parts, sr, gaps, fade_ms=TTS_CROSSFADE_MS),
+            'sample_rate': sr,
+            'accented_text': ' '.join(r['accented_text'] for r in results),
+            'synthesis_time': time.time() - started,
+            'sentences': len(text_frontend.split_sentences(text)),
+            'chunks': len(chunks)
+        }
+    
+    def _postprocess(self, result, speed, fx, dsp_backend):
+        """Швидкість → FX-пресет → нормалізація піку; повертає (audio, fx_time)"""
+        sr = result['sample_rate']
+        audio = dsp.time_stretch(result['audio'], sr, speed, backend=dsp_backend)
+        
+        # Застосовуємо звукові ефекти (пресет з fx_presets або вбудований 'robot')
+        fx_start = time.time()
+        audio = self.fx.apply(fx, audio, sr, dsp_backend=dsp_backend)
+        fx_time = time.time() - fx_start
+        
+        # Нормалізуємо
+        peak = float(np.max(np.abs(audio)) or 1.0)
+        return (audio / peak) * 0.95, fx_time
+    
+    def _stream_batch(self, items, return_audio, audio_format='wav', out_rate=None):
+        """Розподіляє елементи пакета по пулу й віддає NDJSON-рядок на кожен готовий результат.
+        
+        У польоті тримається не більше вікна задач, щоб пакет не витісняв одиночні /tts запити
+        з черги пулу; наступний елемент подається, щойно звільняється місце.
+        """
+        started = time.time()
+        window = max(1, self.pool.workers) * 2
+        pending = {}  # Future -> (index, item, options)
+        next_index = 0
+        succeeded = 0
+        
+        def line(payload):
+            return json.dumps(payload, ensure_ascii=False) + '\n'
+        
+        def error_line(index, item, message):
+            return line({'index': index, 'id': item.get('id'), 'status': 'error', 'error': message})
+        
+        while next_index < len(items) or pending:
+            # Доповнюємо вікно
+            while next_index < len(items) and len(pending) < window:
+                index, item = next_index, items[next_index]
+                if not isinstance(item, dict):
+                    next_index += 1
+                    yield error_line(index, {}, 'Text is required')
+                    continue
+                text = item.get('text')
+                if text is not None and not isinstance(text, str):
+                    next_index += 1
+                    yield error_line(index, item, 'Text must be a string')
+                    continue
+                text = (text or '').strip()
+                if not text:
+                    next_index += 1
+                    yield error_line(index, item, 'Text is required')
+                    continue
+                try:
+                    speed = float(item.get('speed', 1.0))
+                except (TypeError, ValueError):
+                    next_index += 1
+                    yield error_line(index, item, 'Invalid speed')
+                    continue
+                try:
+                    split = _parse_flag(item.get('split'), TTS_SPLIT_SENTENCES)
+                except ValueError as e:
+                    next_index += 1
+                    yield error_line(index, item, str(e))
+                    continue
+                options = {
+                    'split': split,
+                    'voice': item.get('voice', 'dmytro'),
+                    'fx': item.get('fx', 'none'),
+                    'speed': speed,
+                    'dsp': dsp.resolve_backend(item.get('dsp')),
+                }
+                try:
+                    future = self.pool.submit(text, options['voice'], Stress.Dictionary.value,
+                                              split=options['split'],
+                                              pause_ms=TTS_SENTENCE_PAUSE_MS)
+                except PoolBusy as e:
+                    if pending:
+                        break  # чекаємо, поки щось завершиться
+                    next_index += 1
+                    yield error_line(index, item, str(e))
+                    continue
+                pending[future] = (index, item, options)
+                next_index += 1
+            
+            if not pending:
+                continue
+            done, _ = wait(list(pending), timeout=TTS_REQUEST_TIMEOUT, return_when=FIRST_COMPLETED)
+            if not done:
+                for future, (index, item, _) in pending.items():
+                    yield error_line(index, item, 'TTS synthesis timed out')
+                break
+            for future in done:
+                index, item, options = pending.pop(future)
+                try:
+                    result = future.result()
+                    sr = result['sample_rate']
+                    audio, fx_time = self._postprocess(result, options['speed'], options['fx'], options['dsp'])
+                    payload = {
+                        'index': index,
+                        'id': item.get('id'),
+                        'status': 'success',
+                        'voice': options['voice'],
+                        'fx': options['fx'],
+                        'accented_text': result['accented_text'],
+                        'synthesis_time': round(result['synthesis_time'], 3),
+                        'fx_time': round(fx_time, 3),
+                        'audio_duration': round(len(audio) / sr, 3),
+                        'sample_rate': int(sr)
+                    }
+                    if return_audio:
+                        encoded = audio_codec.encode(audio, sr, audio_format, out_rate)
+                        payload['audio_format'] = audio_format
+                        payload['audio_mimetype'] = encoded['mimetype']
+                        payload['audio_sample_rate'] = encoded['sample_rate']
+                        payload['audio_b64'] = base64.b64encode(encoded['data']).decode('ascii')
+                    succeeded += 1
+                    yield line(payload)
+                except Exception as e:
+                    logger.error(f"TTS batch item {index} failed: {e}")
+                    yield error_line(index, item, str(e))
+        
+        yield line({
+            'done': True,
+            'count': len(items),
+            'succeeded': succeeded,
+            'elapsed': round(time.time() - started, 3)
+        })
+    
     def run(self, debug=False):
         """Запускаємо сервер"""
         try:
             logger.info(f"Starting Ukrainian TTS Server on {self.host}:{self.port}")
-            logger.info(f"TTS ready: {self.tts is not None}")
+            logger.info(f"TTS ready: {self.pool.ready}")
             logger.info(f"Device: {self.device}")
             
             self.app.run(
@@ -209,6 +556,8 @@ class UkrainianTTSServer:
         except Exception as e:
             logger.error(f"Server error: {e}")
             raise
+        finally:
+            self.pool.shutdown()
 
 def main():
     """Головна функція"""
@@ -216,6 +565,13 @@ def main():
     parser.add_argument("--host", default="127.0.0.1", help="Host to bind to")
     parser.add_argument("--port", type=int, default=3001, help="Port to bind to")
     parser.add_argument("--device", default="cpu", choices=["cpu", "mps", "gpu"], help="Device to use")
+    parser.add_argument("--workers", type=int, default=TTS_WORKERS,
+                        help="TTS worker processes, each with its own model (0 = in-process)")
+    parser.add_argument("--threads", type=int, default=TTS_THREADS,
+                        help="torch threads per worker (default: cpu_count / workers)")
+    parser.add_argument("--max-queue", type=int, default=TTS_MAX_QUEUE,
+                        help="Requests allowed to wait beyond busy workers before 503")
+    parser.add_argument("--no-warmup", action="store_true", help="Skip startup warmup (voices and FX presets)")
     parser.add_argument("--debug", action="store_true", help="Enable debug mode")
     
     args = parser.parse_args()
@@ -224,7 +580,11 @@ def main():
     server = UkrainianTTSServer(
         host=args.host,
         port=args.port,
-        device=args.device
+        device=args.device,
+        workers=args.workers,
+        threads=args.threads,
+        max_queue=args.max_queue,
+        warmup=TTS_WARMUP and not args.no_warmup
     )
     server.run(debug=args.debug)
 